@@ -0,0 +1,147 @@
+"""Benchmark /api/voice/stream output encodings.
+
+Measures, for each negotiated output format:
+    - bytes on the wire per 80ms audio chunk
+    - server-side encode CPU per chunk (paid once per format, shared by clients;
+      for Opus this is passthrough framing only, and the agent's Opus decode
+      is skipped when no PCM client is connected)
+    - fan-out CPU per client per chunk over loopback WebSockets (includes the
+      in-process clients' receive cost, so read it as an upper bound)
+
+No Moshi server or model is needed: synthetic audio is serialized by the
+API's StreamEncoder, broadcast by MoshiAgentAPI and received by local
+stream clients.
+
+Usage:
+    python scripts/bench_stream_protocol.py [--clients 8] [--chunks 250]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, "src")
+
+import numpy as np
+
+try:
+    import aiohttp
+    from aiohttp.test_utils import TestServer
+except ImportError:
+    print("ERROR: aiohttp not installed. Run: pip install aiohttp")
+    sys.exit(1)
+
+from conscious.voice.agent_api import SAMPLE_RATE, MoshiAgentAPI
+from conscious.voice.fanout import FanoutConfig
+from conscious.voice.stream_protocol import StreamEncoder, StreamFormat, is_passthrough
+
+FRAME_SAMPLES = 1920  # 80ms at 24kHz
+
+FORMATS = [
+    ("json/f32 (legacy)", {}),
+    ("binary/f32", {"protocol": "binary", "encoding": "f32"}),
+    ("binary/s16", {"protocol": "binary", "encoding": "s16"}),
+    ("binary/opus", {"protocol": "binary", "encoding": "opus"}),  # passthrough
+]
+
+
+def synth_chunks(n: int) -> list[np.ndarray]:
+    """Speech-like synthetic audio: a few harmonics with amplitude modulation."""
+    t = np.arange(n * FRAME_SAMPLES, dtype=np.float32) / SAMPLE_RATE
+    wav = 0.3 * np.sin(2 * np.pi * 180 * t) + 0.1 * np.sin(2 * np.pi * 720 * t)
+    wav *= 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    return [wav[i * FRAME_SAMPLES:(i + 1) * FRAME_SAMPLES].astype(np.float32) for i in range(n)]
+
+
+def server_opus_packets(chunks: list[np.ndarray]) -> list[bytes]:
+    """Opus packets as the Moshi server would send them for these chunks."""
+    import sphn
+    writer = sphn.OpusStreamWriter(SAMPLE_RATE)
+    return [writer.append_pcm(pcm) for pcm in chunks]
+
+
+def encode_all(encoder: StreamEncoder, fmt: StreamFormat, chunks: list[np.ndarray],
+               packets: list[bytes]) -> list[dict]:
+    """Serialize every chunk for one format, as the API callbacks would."""
+    if is_passthrough(fmt):
+        return [encoder.encode_opus(pkt, {fmt}, seq) for seq, pkt in enumerate(packets)]
+    return [encoder.encode_audio(pcm, {fmt}, seq) for seq, pcm in enumerate(chunks)]
+
+
+def bench_encode(fmt: StreamFormat, chunks: list[np.ndarray],
+                 packets: list[bytes]) -> tuple[float, float]:
+    """Return (avg wire bytes per chunk, encode CPU us per chunk)."""
+    start = time.process_time()
+    messages = encode_all(StreamEncoder(), fmt, chunks, packets)
+    cpu = time.process_time() - start
+    total_bytes = sum(len(m[fmt]) for m in messages)
+    return total_bytes / len(chunks), cpu / len(chunks) * 1e6
+
+
+async def bench_fanout(params: dict, chunks: list[np.ndarray], packets: list[bytes],
+                       n_clients: int) -> float:
+    """Return fan-out CPU us per client per chunk over loopback."""
+    # Queue sized so no chunk is dropped; this measures delivery cost, not policy
+    api = MoshiAgentAPI(fanout_config=FanoutConfig(queue_size=len(chunks) + 8))
+    server = TestServer(api.build_app())
+    await server.start_server()
+    session = aiohttp.ClientSession()
+    url = server.make_url("/api/voice/stream").with_query(params)
+    clients = [await session.ws_connect(url) for _ in range(n_clients)]
+    if params:
+        for ws in clients:
+            await ws.receive()  # config ack
+
+    async def drain(ws):
+        count = 0
+        while count < len(chunks):
+            msg = await ws.receive()
+            if msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                count += 1
+            else:
+                break
+
+    # Encoding cost is measured separately; pre-encode so this isolates sending
+    fmt = next(iter(api._stream_clients.formats()))
+    messages = encode_all(api._stream_encoder, fmt, chunks, packets)
+
+    drains = [asyncio.create_task(drain(ws)) for ws in clients]
+    start = time.process_time()
+    for m in messages:
+        api._stream_clients.publish(m)
+        await asyncio.sleep(0)
+    await asyncio.wait_for(asyncio.gather(*drains), timeout=30)
+    send_cpu = time.process_time() - start
+
+    for ws in clients:
+        await ws.close()
+    await session.close()
+    await server.close()
+    return send_cpu / (len(messages) * n_clients) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark stream output encodings")
+    parser.add_argument("--clients", type=int, default=8, help="Loopback stream clients")
+    parser.add_argument("--chunks", type=int, default=250, help="80ms chunks per format")
+    args = parser.parse_args()
+
+    chunks = synth_chunks(args.chunks)
+    packets = server_opus_packets(chunks)
+    print("=" * 72)
+    print(f"Stream encoding benchmark: {args.chunks} x 80ms chunks, {args.clients} clients")
+    print("=" * 72)
+    print(f"{'format':<20}{'bytes/chunk':>12}{'kbit/s':>10}{'encode us':>12}"
+          f"{'fanout us/client':>18}")
+    for name, params in FORMATS:
+        fmt = StreamFormat.from_params(params)
+        avg_bytes, encode_us = bench_encode(fmt, chunks, packets)
+        send_us = await bench_fanout(params, chunks, packets, args.clients)
+        kbps = avg_bytes * 8 / 0.080 / 1000
+        print(f"{name:<20}{avg_bytes:>12.0f}{kbps:>10.0f}{encode_us:>12.1f}{send_us:>18.1f}")
+    print("\nencode us is paid once per format per chunk; fanout us is paid per client.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
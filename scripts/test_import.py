@@ -1,8 +1,37 @@
-"""Quick smoke test: verify config loading and basic imports work."""
+"""Quick smoke test: verify config loading and basic imports work.
 
+Also guards import cost: the lightweight modules must not load torch, moshi,
+sounddevice or aiohttp, and lightweight CLI commands must start within
+CONSCIOUS_IMPORT_BUDGET_S (default 1.0s). Exits 1 if either regresses.
+
+Usage:
+    python scripts/test_import.py
+"""
+
+import os
+import subprocess
 import sys
+import time
 sys.path.insert(0, "src")
 
+BUDGET_S = float(os.environ.get("CONSCIOUS_IMPORT_BUDGET_S", "1.0"))
+HEAVY = ("torch", "moshi", "huggingface_hub", "sounddevice", "aiohttp", "sphn")
+# module -> heavy dependencies it may legitimately load at import time
+LIGHT_MODULES = {
+    "conscious.cli": (),
+    "conscious.config": (),
+    "conscious.voice": (),
+    "conscious.server": (),
+    "conscious.bench": (),
+    "conscious.voice.moshi_engine": ("torch",),
+}
+LIGHT_COMMANDS = {
+    "conscious --help": ["--help"],
+    "conscious config": ["config"],
+    "conscious bench --list": ["bench", "--list"],
+    "conscious status": ["status", "--api-url", "http://127.0.0.1:9", "--timeout", "0.5"],
+}
+
 print("=" * 60)
 print("CONSCIOUS - Import & Config Smoke Test")
 print("=" * 60)
@@ -38,7 +67,39 @@ try:
 except ImportError as e:
     print(f"[SKIP] ConsciousServer — missing dependency ({e})")
 
+# 5. Import cost
+env = dict(os.environ, PYTHONPATH="src" + os.pathsep + os.environ.get("PYTHONPATH", ""))
+failures = 0
+for module, allowed in LIGHT_MODULES.items():
+    probe = (f"import sys; import {module}; "
+             f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", probe], env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"[SKIP] import {module} — {result.stderr.strip().splitlines()[-1]}")
+        continue
+    loaded = [m for m in result.stdout.split() if m not in allowed]
+    if loaded:
+        failures += 1
+        print(f"[FAIL] import {module} loads {', '.join(loaded)}")
+    else:
+        print(f"[PASS] import {module} loads no heavy dependencies")
+
+for label, command in LIGHT_COMMANDS.items():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "conscious.cli", *command], env=env,
+                   capture_output=True)
+    elapsed = time.perf_counter() - start
+    if elapsed > BUDGET_S:
+        failures += 1
+        print(f"[FAIL] {label}: {elapsed:.2f}s (budget {BUDGET_S:.1f}s)")
+    else:
+        print(f"[PASS] {label}: {elapsed:.2f}s")
+
 print()
 print("Core config system works. Install deps to unlock full imports:")
 print("  pip install -e .[all]")
 print("=" * 60)
+
+if failures:
+    print(f"{failures} import-cost regression(s)")
+    sys.exit(1)
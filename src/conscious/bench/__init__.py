@@ -0,0 +1,28 @@
+"""Benchmark suite — Headless, repeatable measurements of the voice pipeline.
+
+Runs the real AudioStream, ConsciousServer loop, MoshiAgent and
+MoshiAgentAPI code against synthetic audio and a deterministic StubEngine,
+so no microphone, GPU or model weights are needed.
+
+Usage:
+    conscious bench                          # all benchmarks, JSON to stdout
+    conscious bench server_loop --speed 4
+    conscious bench --save-baseline bench/baseline.json
+    conscious bench --baseline bench/baseline.json   # exit 1 on regression
+
+The load test (conscious.bench.loadtest, `conscious loadtest`) ramps
+stream clients against a real MoshiAgentAPI process and reports capacity.
+The failover test (conscious.bench.failover, `conscious failover`) kills
+stub servers under MoshiServerManager's N+1 mode and times the outage.
+The jitter benchmark (conscious.bench.jitter, `conscious jitter`) measures
+audio-thread wake-up lateness under CPU contention, with and without the
+real-time policy from conscious.scheduling.
+"""
+
+from .stubs import StubEngine, StubEngineConfig, synthetic_audio
+from .suite import BENCHMARKS, BenchConfig, BenchResult, compare_to_baseline, run_benchmarks
+
+__all__ = [
+    "StubEngine", "StubEngineConfig", "synthetic_audio",
+    "BENCHMARKS", "BenchConfig", "BenchResult", "compare_to_baseline", "run_benchmarks",
+]
@@ -0,0 +1,262 @@
+"""Failover test — Measure warm-standby promotion against a cold restart.
+
+Runs MoshiServerManager in N+1 mode with stub Moshi servers on two free
+localhost ports, streams paced audio through a client that reconnects
+eagerly to manager.ws_url, and kills the active server (SIGKILL, or SIGSTOP
+to hang it so only health checks notice). Each trial measures:
+
+    failover_ms         failure detected -> promoted standby READY (manager)
+    kill_to_ready_ms    kill -> manager READY on the new port
+    client_gap_ms       kill -> first audio back on a fresh connection,
+                        i.e. the outage a client actually sees
+    standby_rebuild_ms  kill -> replacement standby warm again
+
+With compare_cold, one more trial runs without a standby so the report
+shows what the same failure costs through the backoff-and-reload path.
+
+Usage:
+    conscious failover --trials 3 --load-seconds 5
+    conscious failover --mode hang
+"""
+
+import asyncio
+import os
+import signal
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+from .loadtest import _free_port
+from .stubs import FRAME_SIZE, SAMPLE_RATE, synthetic_audio
+
+FRAME_S = FRAME_SIZE / SAMPLE_RATE
+
+
+@dataclass
+class FailoverConfig:
+    """Trials and failure mode for a failover test."""
+    trials: int = 3
+    mode: str = "crash"  # crash (SIGKILL) | hang (SIGSTOP; detected by health checks)
+    load_seconds: float = 5.0  # simulated model load of each stub server
+    health_check_interval: float = 0.5
+    compare_cold: bool = True
+    trial_timeout: float = 60.0
+
+
+class _EagerClient:
+    """Streams paced Opus to the active server, reconnecting every 20ms while it is down."""
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.connections = 0
+        self.first_audio: dict[int, float] = {}
+        self._pcm = synthetic_audio(SAMPLE_RATE * 4, seed=3)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="failover-client")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def wait_audio_after(self, connection: int, timeout: float) -> Optional[float]:
+        """perf_counter of the first audio on any connection newer than connection."""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            newer = [t for conn, t in self.first_audio.items() if conn > connection]
+            if newer:
+                return min(newer)
+            await asyncio.sleep(0.005)
+        return None
+
+    async def _run(self) -> None:
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._session(session)
+                except (aiohttp.ClientError, OSError, asyncio.TimeoutError):
+                    pass
+                await asyncio.sleep(0.02)
+
+    async def _session(self, session) -> None:
+        # A hung server still accepts TCP, so bound the whole upgrade + handshake
+        ws = await asyncio.wait_for(session.ws_connect(
+            self.manager.ws_url, timeout=aiohttp.ClientWSTimeout(ws_close=1.0), heartbeat=0.5,
+        ), 1.0)
+        async with ws:
+            msg = await asyncio.wait_for(ws.receive(), 1.0)
+            if msg.type != aiohttp.WSMsgType.BINARY or msg.data != b"\x00":
+                return
+            self.connections += 1
+            conn = self.connections
+            sender = asyncio.create_task(self._send(ws), name="failover-client-send")
+            try:
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.BINARY:
+                        break
+                    if msg.data[:1] == b"\x01" and conn not in self.first_audio:
+                        self.first_audio[conn] = time.perf_counter()
+            finally:
+                sender.cancel()
+
+    async def _send(self, ws) -> None:
+        writer = sphn.OpusStreamWriter(SAMPLE_RATE)
+        frames = len(self._pcm) // FRAME_SIZE
+        i = 0
+        next_at = time.perf_counter()
+        while not ws.closed:
+            frame = self._pcm[(i % frames) * FRAME_SIZE:(i % frames + 1) * FRAME_SIZE]
+            page = writer.append_pcm(frame)
+            if page:
+                await ws.send_bytes(b"\x01" + page)
+            i += 1
+            next_at += FRAME_S
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+class FailoverTest:
+    """Runs the trials described in the module docstring."""
+
+    def __init__(self, config: Optional[FailoverConfig] = None):
+        if aiohttp is None or sphn is None:
+            raise ImportError("aiohttp and sphn are required: pip install aiohttp moshi")
+        self.config = config or FailoverConfig()
+
+    def _manager(self, standby: bool):
+        from conscious.voice.server_manager import MoshiServerManager
+        from conscious.voice.stub_server import StubServerConfig, manager_config
+
+        cfg = manager_config(
+            StubServerConfig(load_time_s=self.config.load_seconds),
+            port=_free_port(), host="127.0.0.1",
+            health_check_interval=self.config.health_check_interval,
+            health_check_timeout=self.config.health_check_interval,
+            deep_health_interval=0,
+            restart_backoff_base=1.0,
+            standby_port=_free_port() if standby else 0,
+        )
+        return MoshiServerManager(cfg)
+
+    async def _wait(self, predicate, timeout: float) -> Optional[float]:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if predicate():
+                return time.perf_counter()
+            await asyncio.sleep(0.005)
+        return None
+
+    def _kill(self, pid: int) -> None:
+        os.kill(pid, signal.SIGSTOP if self.config.mode == "hang" else signal.SIGKILL)
+
+    async def _trial(self, manager, client: _EagerClient, standby: bool) -> dict:
+        timeout = self.config.trial_timeout
+        if standby:
+            await self._wait(lambda: manager.standby_status.get("ready"), timeout)
+        await client.wait_audio_after(0, timeout)
+        port, pid, conn = manager.port, manager.pid, client.connections
+
+        killed_at = time.perf_counter()
+        self._kill(pid)
+        if standby:
+            ready_at = await self._wait(
+                lambda: manager.is_ready and manager.port != port, timeout)
+        else:
+            await self._wait(lambda: not manager.is_ready, timeout)
+            ready_at = await self._wait(lambda: manager.is_ready, timeout)
+        audio_at = await client.wait_audio_after(conn, timeout)
+        rebuilt_at = None
+        if standby:
+            rebuilt_at = await self._wait(lambda: manager.standby_status.get("ready"), timeout)
+        if self.config.mode == "hang":
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        def since_kill(t):
+            return round((t - killed_at) * 1000, 1) if t else None
+
+        return {
+            "failover_ms": manager.last_failover.get("failover_ms") if standby else None,
+            "kill_to_ready_ms": since_kill(ready_at),
+            "client_gap_ms": since_kill(audio_at),
+            "standby_rebuild_ms": since_kill(rebuilt_at),
+        }
+
+    async def _run_mode(self, standby: bool, trials: int) -> list[dict]:
+        manager = self._manager(standby)
+        client = _EagerClient(manager)
+        results = []
+        try:
+            await manager.start()
+            if not await manager.wait_ready(self.config.trial_timeout):
+                raise RuntimeError("stub server did not become ready")
+            client.start()
+            for _ in range(trials):
+                results.append(await self._trial(manager, client, standby))
+        finally:
+            await client.stop()
+            await manager.stop()
+        return results
+
+    async def run(self) -> dict:
+        warm = await self._run_mode(standby=True, trials=self.config.trials)
+        cold = await self._run_mode(standby=False, trials=1) if self.config.compare_cold else []
+
+        def median(rows, key):
+            values = [r[key] for r in rows if r[key] is not None]
+            return round(float(np.median(values)), 1) if values else None
+
+        return {
+            "config": asdict(self.config),
+            "warm": warm,
+            "cold": cold,
+            "summary": {
+                "warm_client_gap_ms": median(warm, "client_gap_ms"),
+                "warm_failover_ms": median(warm, "failover_ms"),
+                "warm_standby_rebuild_ms": median(warm, "standby_rebuild_ms"),
+                "cold_client_gap_ms": median(cold, "client_gap_ms"),
+            },
+        }
+
+
+def run_failover_test(config: Optional[FailoverConfig] = None) -> dict:
+    """Run a failover test (blocking) and return its report."""
+    return asyncio.run(FailoverTest(config).run())
+
+
+def format_report(report: dict) -> str:
+    """Human-readable table of a failover report."""
+    lines = [f"{'trial':>8} {'failover':>10} {'ready':>10} {'client gap':>11} {'rebuild':>10}"]
+
+    def ms(value):
+        return f"{value:.0f}ms" if value is not None else "-"
+
+    for kind in ("warm", "cold"):
+        for i, row in enumerate(report[kind], 1):
+            lines.append(
+                f"{kind + str(i):>8} {ms(row['failover_ms']):>10} "
+                f"{ms(row['kill_to_ready_ms']):>10} "
+                f"{ms(row['client_gap_ms']):>11} {ms(row['standby_rebuild_ms']):>10}"
+            )
+    summary = report["summary"]
+    lines.append(f"client-visible outage: warm {ms(summary['warm_client_gap_ms'])}, "
+                 f"cold {ms(summary['cold_client_gap_ms'])}")
+    return "\n".join(lines)
@@ -0,0 +1,168 @@
+"""Jitter benchmark — Wake-up jitter of a periodic audio-style thread under CPU contention.
+
+A thread wakes every period_ms (like a PortAudio callback), spins for
+work_ms, and records how late each wake-up was. It runs three times on the
+same CPUs:
+
+    idle        no contention: the floor for this machine
+    contended   `contention` busy-looping processes pinned to the same CPUs,
+                thread at default priority
+    scheduled   same contention, thread under conscious.scheduling's "audio"
+                policy (SCHED_FIFO where permitted, else nice)
+
+and reports lateness p50/p99/max and missed deadlines (a wake-up more than
+one period late) per run. The "policy" field records what the scheduled run
+actually got, so an unprivileged run that fell back to nice (or nothing) is
+visible in the report.
+
+Usage:
+    conscious jitter --seconds 5 --period-ms 10 --contention 4
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from conscious.scheduling import SchedulingConfig, apply_thread_policy, reset_thread_policy
+
+MODES = ("idle", "contended", "scheduled")
+
+_BUSY_LOOP = "while True:\n    pass"
+
+
+@dataclass
+class JitterConfig:
+    """Timing, contention and scheduling for a jitter run."""
+    seconds: float = 5.0
+    period_ms: float = 10.0
+    work_ms: float = 1.0  # simulated callback work per wake-up
+    contention: int = 0  # busy processes; 0 = two per CPU under test
+    cpus: list = field(default_factory=list)  # empty = the last allowed CPU
+    priority: int = 70  # SCHED_FIFO priority for the scheduled run
+    fallback_nice: int = -10
+
+
+def _pin(pid: int, cpus: list) -> None:
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(pid, cpus)
+
+
+class _Contention:
+    """Busy-looping child processes pinned to the CPUs under test."""
+
+    def __init__(self, count: int, cpus: list):
+        self.count = count
+        self.cpus = cpus
+        self._procs: list[subprocess.Popen] = []
+
+    def __enter__(self):
+        for _ in range(self.count):
+            proc = subprocess.Popen([sys.executable, "-c", _BUSY_LOOP])
+            self._procs.append(proc)
+            try:
+                _pin(proc.pid, self.cpus)
+            except OSError:
+                pass
+        time.sleep(0.2)  # let them reach the loop
+        return self
+
+    def __exit__(self, *exc):
+        for proc in self._procs:
+            proc.kill()
+        for proc in self._procs:
+            proc.wait()
+
+
+def _periodic(config: JitterConfig, scheduled: bool, out: dict) -> None:
+    """Thread body: optional policy, then wake every period and record lateness."""
+    _pin(0, config.cpus)  # 0 = the calling thread
+    if scheduled:
+        out["policy"] = apply_thread_policy("audio", SchedulingConfig(
+            enabled=True, audio_cpus=list(config.cpus), audio_priority=config.priority,
+            fallback_nice=config.fallback_nice,
+        ))
+    period = config.period_ms / 1000
+    work = config.work_ms / 1000
+    lateness = []
+    try:
+        next_at = time.perf_counter() + period
+        end = next_at + config.seconds
+        while next_at < end:
+            remaining = next_at - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+            woke = time.perf_counter()
+            lateness.append((woke - next_at) * 1000)
+            spin_until = woke + work
+            while time.perf_counter() < spin_until:
+                pass
+            next_at += period
+            if time.perf_counter() > next_at:
+                # Overran: skip the periods that are already gone, like a callback would
+                skipped = int((time.perf_counter() - next_at) / period) + 1
+                next_at += skipped * period
+    finally:
+        if scheduled:
+            reset_thread_policy()
+    out["lateness_ms"] = lateness
+
+
+def _run_mode(config: JitterConfig, mode: str) -> dict:
+    out: dict = {}
+    contention = config.contention if mode != "idle" else 0
+    with _Contention(contention, config.cpus):
+        thread = threading.Thread(target=_periodic, args=(config, mode == "scheduled", out),
+                                  name=f"jitter-{mode}")
+        thread.start()
+        thread.join()
+
+    lateness = np.asarray(out["lateness_ms"])
+    expected = int(config.seconds * 1000 / config.period_ms)
+    policy = out.get("policy")
+    return {
+        "mode": mode,
+        "contention": contention,
+        "wakeups": int(lateness.size),
+        "missed": int(np.sum(lateness > config.period_ms)) + max(0, expected - lateness.size),
+        "p50_ms": round(float(np.percentile(lateness, 50)), 3) if lateness.size else None,
+        "p99_ms": round(float(np.percentile(lateness, 99)), 3) if lateness.size else None,
+        "max_ms": round(float(lateness.max()), 3) if lateness.size else None,
+        "policy": policy["policy"] if policy else "default",
+        "notes": policy["notes"] if policy else [],
+    }
+
+
+def run_jitter_benchmark(config: Optional[JitterConfig] = None) -> dict:
+    """Run idle, contended and scheduled trials (blocking) and return the report."""
+    config = config or JitterConfig()
+    if not config.cpus:
+        allowed = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") \
+            else list(range(os.cpu_count() or 1))
+        config.cpus = allowed[-1:]
+    if not config.contention:
+        config.contention = 2 * len(config.cpus)
+    return {
+        "config": asdict(config),
+        "runs": [_run_mode(config, mode) for mode in MODES],
+    }
+
+
+def format_report(report: dict) -> str:
+    """Human-readable table of a jitter report."""
+    lines = [f"{'mode':>10} {'busy':>5} {'p50':>9} {'p99':>9} {'max':>9} {'missed':>7}  policy"]
+
+    def ms(value):
+        return f"{value:.2f}ms" if value is not None else "-"
+
+    for run in report["runs"]:
+        lines.append(
+            f"{run['mode']:>10} {run['contention']:>5} {ms(run['p50_ms']):>9} "
+            f"{ms(run['p99_ms']):>9} {ms(run['max_ms']):>9} {run['missed']:>7}  {run['policy']}"
+        )
+    return "\n".join(lines)
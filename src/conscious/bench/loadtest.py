@@ -0,0 +1,409 @@
+"""Load test — Ramp /api/voice/stream clients against one MoshiAgentAPI process.
+
+Runs entirely on localhost. Unless --api-url points at a running API, the
+harness launches `python -m conscious.voice.agent_api --stub-server` in a
+subprocess. That process in turn launches the stub Moshi server, so the
+API's CPU is measured without the load generator or the backend mixed in.
+
+One sender client pushes paced float32 PCM frames. The stub server echoes
+them back through the agent, and MoshiAgentAPI fans the replies out to K
+listening clients. K is ramped through the configured steps, and each step
+measures:
+
+    latency_p50/p99_ms  sender push -> listener receipt (replies matched to
+                        pushed frames in order; includes coalescer hold and
+                        the stub's reply delay)
+    fanout_p99_ms       spread between the first and last listener receiving
+                        the same message: the cost of fan-out itself
+    jitter_p99_ms       |inter-arrival - 80ms| per listener
+    loss                fraction of messages a listener never received
+    server_cpu_percent  CPU of the API process during the step
+
+A step passes when fanout, latency growth over the first step and jitter
+stay within the 80ms budget and loss stays under max_loss. The capacity is
+the largest K that passes.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from .stubs import FRAME_SIZE, SAMPLE_RATE, synthetic_audio
+
+FRAME_S = FRAME_SIZE / SAMPLE_RATE
+FRAME_MS = FRAME_S * 1000
+
+
+@dataclass
+class LoadTestConfig:
+    """Ramp and pass criteria for a load test."""
+    steps: list = field(default_factory=lambda: [1, 2, 4, 8, 16, 32, 64])
+    step_seconds: float = 10.0
+    warmup_seconds: float = 2.0
+    encoding: str = "s16"  # listener format: json | f32 | s16 | opus
+    budget_ms: float = FRAME_MS
+    max_loss: float = 0.01
+    api_url: Optional[str] = None  # existing API; otherwise one is launched
+    api_pid: Optional[int] = None  # for CPU sampling of an existing API
+    startup_timeout: float = 60.0
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _CpuSampler:
+    """CPU% of a process between two samples (psutil, or /proc on Linux)."""
+
+    def __init__(self, pid: Optional[int]):
+        self.pid = pid
+        self._proc = psutil.Process(pid) if (psutil is not None and pid) else None
+        self._last: Optional[tuple[float, float]] = None
+
+    def _cpu_seconds(self) -> Optional[float]:
+        if self._proc is not None:
+            times = self._proc.cpu_times()
+            return times.user + times.system
+        if self.pid and os.path.exists(f"/proc/{self.pid}/stat"):
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            return (int(fields[11]) + int(fields[12])) / ticks
+        return None
+
+    def start(self) -> None:
+        cpu = self._cpu_seconds()
+        self._last = (time.monotonic(), cpu) if cpu is not None else None
+
+    def percent(self) -> Optional[float]:
+        cpu = self._cpu_seconds()
+        if cpu is None or self._last is None:
+            return None
+        wall = time.monotonic() - self._last[0]
+        return round((cpu - self._last[1]) / wall * 100, 1) if wall > 0 else None
+
+
+class _Listener:
+    """One stream client recording the arrival time of every audio message."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.arrivals: dict[int, float] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    async def run(self, session, url: str) -> None:
+        async with session.ws_connect(url, max_msg_size=0) as ws:
+            await self.consume(ws)
+
+    async def consume(self, ws) -> None:
+        import aiohttp
+
+        from conscious.voice.stream_protocol import FRAME_AUDIO, FRAME_HEADER
+
+        async for msg in ws:
+            now = time.perf_counter()
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                kind, seq = FRAME_HEADER.unpack_from(msg.data)
+                if kind == FRAME_AUDIO:
+                    self.arrivals.setdefault(seq, now)
+            elif msg.type == aiohttp.WSMsgType.TEXT:
+                if msg.data.startswith('{"type": "audio"'):
+                    seq = int(msg.data.rsplit('"seq": ', 1)[1].rstrip("}"))
+                    self.arrivals.setdefault(seq, now)
+            else:
+                break
+
+
+class LoadTest:
+    """Ramps stream clients and builds a capacity report.
+
+    Usage:
+        report = asyncio.run(LoadTest(LoadTestConfig(steps=[1, 8, 32])).run())
+    """
+
+    def __init__(self, config: Optional[LoadTestConfig] = None):
+        self.config = config or LoadTestConfig()
+        self._process: Optional[subprocess.Popen] = None
+        self._api_url = self.config.api_url
+        self._send_times: list[float] = []
+        # The sender also listens (Opus passthrough) from before the first reply,
+        # which anchors the seq of the reply to its first pushed frame
+        self._echo = _Listener(-1)
+        self._listeners: list[_Listener] = []
+
+    async def run(self) -> dict:
+        import aiohttp
+
+        cfg = self.config
+        session = aiohttp.ClientSession()
+        try:
+            pid = await self._start_api(session)
+            stream_url = self._api_url.replace("http", "ws", 1) + "/api/voice/stream"
+            listen_query = ("" if cfg.encoding == "json"
+                            else f"?protocol=binary&encoding={cfg.encoding}")
+
+            sender = asyncio.create_task(self._sender(session, stream_url),
+                                         name="load-sender")
+            await asyncio.sleep(cfg.warmup_seconds)
+
+            cpu = _CpuSampler(pid)
+            steps = []
+            for k in cfg.steps:
+                while len(self._listeners) < k:
+                    listener = _Listener(len(self._listeners))
+                    listener.task = asyncio.create_task(
+                        listener.run(session, stream_url + listen_query), name="load-listener"
+                    )
+                    self._listeners.append(listener)
+                await self._wait_clients(session, k)
+
+                window_start = time.perf_counter()
+                cpu.start()
+                lag = await self._measure_loop_lag(cfg.step_seconds)
+                window_end = time.perf_counter()
+                step = self._summarize(k, window_start, window_end)
+                step["server_cpu_percent"] = cpu.percent()
+                step["generator_loop_lag_p99_ms"] = lag
+                step["server_stream_stats"] = await self._server_stream_stats(session)
+                steps.append(step)
+                print(self._format_step(step), file=sys.stderr, flush=True)
+
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            return self._report(steps)
+        finally:
+            for listener in self._listeners:
+                if listener.task:
+                    listener.task.cancel()
+            await asyncio.gather(*(x.task for x in self._listeners if x.task),
+                                 return_exceptions=True)
+            await self._stop_api(session)
+            await session.close()
+
+    # ── API process ──────────────────────────────────────────────
+
+    async def _start_api(self, session) -> Optional[int]:
+        cfg = self.config
+        if self._api_url:
+            return cfg.api_pid
+
+        api_port, moshi_port = _free_port(), _free_port()
+        self._api_url = f"http://127.0.0.1:{api_port}"
+        cmd = [sys.executable, "-m", "conscious.voice.agent_api", "--stub-server",
+               "--api-port", str(api_port), "--moshi-port", str(moshi_port)]
+        self._process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+
+        deadline = time.monotonic() + cfg.startup_timeout
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(self._api_url + "/api/voice/status") as resp:
+                    if resp.status == 200:
+                        break
+            except Exception:
+                pass
+            await asyncio.sleep(0.2)
+        else:
+            raise RuntimeError("API process did not start")
+
+        async with session.post(self._api_url + "/api/voice/start") as resp:
+            data = await resp.json()
+        if not data.get("success"):
+            raise RuntimeError("API failed to start the stub server / connect the agent")
+        return self._process.pid
+
+    async def _stop_api(self, session) -> None:
+        if self._process is None:
+            return
+        try:
+            async with session.post(self._api_url + "/api/voice/stop") as resp:
+                await resp.read()
+        except Exception:
+            pass
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+        self._process = None
+
+    async def _wait_clients(self, session, k: int, timeout: float = 30.0) -> None:
+        # k listeners + the sender
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            stats = await self._server_stream_stats(session)
+            if stats and stats.get("clients", 0) >= k + 1:
+                return
+            await asyncio.sleep(0.1)
+
+    async def _server_stream_stats(self, session) -> Optional[dict]:
+        try:
+            async with session.get(self._api_url + "/api/voice/status") as resp:
+                return (await resp.json()).get("stream")
+        except Exception:
+            return None
+
+    # ── Load ─────────────────────────────────────────────────────
+
+    async def _sender(self, session, url: str) -> None:
+        """Push one 80ms float32 frame per tick, recording what comes back."""
+        audio = synthetic_audio(SAMPLE_RATE * 10)
+        n_frames = len(audio) // FRAME_SIZE
+        async with session.ws_connect(url + "?protocol=binary&encoding=opus") as ws:
+            drain = asyncio.create_task(self._echo.consume(ws), name="load-sender-echo")
+            try:
+                start = time.perf_counter()
+                i = 0
+                while True:
+                    frame = audio[(i % n_frames) * FRAME_SIZE:(i % n_frames + 1) * FRAME_SIZE]
+                    self._send_times.append(time.perf_counter())
+                    await ws.send_bytes(frame.tobytes())
+                    i += 1
+                    delay = start + i * FRAME_S - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+            finally:
+                drain.cancel()
+
+    async def _measure_loop_lag(self, seconds: float) -> float:
+        """Sleep for the step while sampling this process's event-loop lag (p99 ms)."""
+        lags = []
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            t = time.perf_counter()
+            await asyncio.sleep(0.05)
+            lags.append((time.perf_counter() - t - 0.05) * 1000)
+        return round(float(np.percentile(lags, 99)), 2) if lags else 0.0
+
+    # ── Analysis ─────────────────────────────────────────────────
+
+    def _summarize(self, k: int, start: float, end: float) -> dict:
+        listeners = self._listeners[:k]
+        # Messages first delivered (to anyone) inside the window
+        first_arrival: dict[int, float] = {}
+        for listener in listeners:
+            for seq, t in listener.arrivals.items():
+                if seq not in first_arrival or t < first_arrival[seq]:
+                    first_arrival[seq] = t
+        window = sorted(s for s, t in first_arrival.items() if start <= t < end)
+        if not window:
+            return {"clients": k, "messages": 0, "pass": False}
+
+        # Replies are matched to pushed frames in order (the stub echoes 1:1)
+        seq0 = min(self._echo.arrivals, default=min(first_arrival))
+        latencies, fanout, jitter = [], [], []
+        received = 0
+        for listener in listeners:
+            prev = None
+            for seq in window:
+                t = listener.arrivals.get(seq)
+                if t is None:
+                    prev = None
+                    continue
+                received += 1
+                fanout.append((t - first_arrival[seq]) * 1000)
+                index = seq - seq0
+                if 0 <= index < len(self._send_times):
+                    latencies.append((t - self._send_times[index]) * 1000)
+                if prev is not None:
+                    jitter.append(abs((t - prev) * 1000 - FRAME_MS))
+                prev = t
+
+        expected = len(window) * len(listeners)
+
+        def p(values, q):
+            return round(float(np.percentile(values, q)), 2) if values else None
+
+        return {
+            "clients": k,
+            "messages": received,
+            "throughput_msgs_per_s": round(received / (end - start), 1),
+            "latency_p50_ms": p(latencies, 50),
+            "latency_p99_ms": p(latencies, 99),
+            "fanout_p99_ms": p(fanout, 99),
+            "jitter_p99_ms": p(jitter, 99),
+            "loss": round(1 - received / expected, 4) if expected else None,
+        }
+
+    def _report(self, steps: list[dict]) -> dict:
+        cfg = self.config
+        base = next((s["latency_p50_ms"] for s in steps
+                     if s.get("latency_p50_ms") is not None), None)
+        capacity = 0
+        for step in steps:
+            reasons = []
+            if step.get("messages", 0) == 0:
+                reasons.append("no messages")
+            else:
+                if step["fanout_p99_ms"] > cfg.budget_ms:
+                    reasons.append("fanout over budget")
+                if base is not None and step["latency_p99_ms"] - base > cfg.budget_ms:
+                    reasons.append("latency growth over budget")
+                if step["jitter_p99_ms"] > cfg.budget_ms:
+                    reasons.append("jitter over budget")
+                if step["loss"] > cfg.max_loss:
+                    reasons.append("loss over limit")
+            step["pass"] = not reasons
+            # A lagging generator loop inflates every client-side number
+            lag = step.get("generator_loop_lag_p99_ms", 0)
+            step["generator_saturated"] = lag > cfg.budget_ms / 4
+            step["fail_reasons"] = reasons
+            if step["pass"] and step["clients"] > capacity:
+                capacity = step["clients"]
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": asdict(cfg),
+            "api_url": self._api_url,
+            "capacity_clients": capacity,
+            "baseline_latency_p50_ms": base,
+            "steps": steps,
+        }
+
+    @staticmethod
+    def _format_step(step: dict) -> str:
+        if not step.get("messages"):
+            return f"K={step['clients']:>4}  no messages delivered"
+        cpu = step.get("server_cpu_percent")
+        return (
+            f"K={step['clients']:>4}  latency p99 {step['latency_p99_ms']:>7.1f}ms  "
+            f"fanout p99 {step['fanout_p99_ms']:>6.1f}ms  "
+            f"jitter p99 {step['jitter_p99_ms']:>6.1f}ms  "
+            f"loss {step['loss'] * 100:5.2f}%  cpu {cpu if cpu is not None else '?':>5}%"
+        )
+
+
+def run_load_test(config: Optional[LoadTestConfig] = None) -> dict:
+    """Run a load test to completion and return the capacity report."""
+    return asyncio.run(LoadTest(config).run())
+
+
+def format_report(report: dict) -> str:
+    """Plain-text capacity summary."""
+    lines = [f"Capacity: {report['capacity_clients']} stream clients "
+             f"(budget {report['config']['budget_ms']:.0f}ms, "
+             f"max loss {report['config']['max_loss'] * 100:.1f}%)"]
+    for step in report["steps"]:
+        status = "ok" if step["pass"] else "FAIL " + ", ".join(step["fail_reasons"])
+        if step.get("generator_saturated"):
+            status += " (generator saturated)"
+        lines.append(f"  {LoadTest._format_step(step)}  {status}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_load_test(), indent=2))
@@ -0,0 +1,170 @@
+"""Bench stubs — Deterministic stand-ins for the model and the microphone.
+
+StubEngine implements the MoshiEngine interface (streaming() context,
+process_frame(), process_batch(), last_text_token, decode_text_token(),
+get_performance_stats()) with fixed per-stage delays plus
+seeded jitter, so the real pipeline around it can be measured without
+weights or a GPU. synthetic_audio() and callback_block_sizes() stand in for
+the microphone.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from conscious.tracing import DECODE_END, DECODE_START, ENCODE_START, LM_START, NO_TRACE, TRACER
+
+SAMPLE_RATE = 24000
+FRAME_SIZE = 1920
+
+# Stub text vocabulary; token ids are _TOKEN_BASE + index, other ids are padding
+_WORDS = ("hello", "there", "I", "am", "listening", "tell", "me", "more", "about", "that")
+_TOKEN_BASE = 100
+_PAD_TOKEN = 3
+
+
+@dataclass
+class StubEngineConfig:
+    """Per-stage latencies of the stub engine (wall-clock ms at speed 1)."""
+    encode_ms: float = 4.0
+    lm_ms: float = 35.0
+    decode_ms: float = 4.0
+    jitter_ms: float = 2.0  # uniform +/- on the LM step
+    warmup_frames: int = 2  # frames returning None, like the LM's initial delay
+    seed: int = 0
+
+
+class StubEngine:
+    """MoshiEngine stand-in: echoes input after deterministic stage delays.
+
+    Delays are divided by time_scale, so a bench run at 10x real time keeps
+    the same load relative to the frame budget.
+    """
+
+    def __init__(self, config: Optional[StubEngineConfig] = None, time_scale: float = 1.0):
+        self.config = config or StubEngineConfig()
+        self.time_scale = time_scale
+        self._rng = random.Random(self.config.seed)
+        self._streaming = False
+        self._batch_size = 1
+        self._frame_count = 0
+        self._total_ms = 0.0
+        self._last_token: Optional[int] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return True
+
+    @property
+    def is_streaming(self) -> bool:
+        return self._streaming
+
+    @property
+    def last_text_token(self) -> Optional[int]:
+        return self._last_token
+
+    def load_models(self) -> None:
+        pass
+
+    def streaming(self, batch_size: int = 1):
+        return _StubStreamingContext(self, batch_size)
+
+    def stage_delays(self) -> tuple[float, float, float]:
+        """Next frame's (encode, lm, decode) delays in seconds."""
+        cfg = self.config
+        jitter = self._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        lm_ms = max(0.0, cfg.lm_ms + jitter)
+        return (cfg.encode_ms / 1000 / self.time_scale,
+                lm_ms / 1000 / self.time_scale,
+                cfg.decode_ms / 1000 / self.time_scale)
+
+    def process_frame(self, audio_in, trace_id: int = NO_TRACE):
+        if not self._streaming:
+            raise RuntimeError("Must be in streaming mode. Use `with engine.streaming():`")
+        encode_s, lm_s, decode_s = self.stage_delays()
+        t0 = time.perf_counter()
+        time.sleep(encode_s)
+        t1 = time.perf_counter()
+        time.sleep(lm_s)
+        t2 = time.perf_counter()
+        time.sleep(decode_s)
+        t3 = time.perf_counter()
+
+        self._frame_count += 1
+        self._total_ms += (t3 - t0) * 1000
+        if trace_id >= 0:
+            TRACER.mark(trace_id, ENCODE_START, int(t0 * 1e9))
+            TRACER.mark(trace_id, LM_START, int(t1 * 1e9))
+            TRACER.mark(trace_id, DECODE_START, int(t2 * 1e9))
+            TRACER.mark(trace_id, DECODE_END, int(t3 * 1e9))
+
+        if self._frame_count <= self.config.warmup_frames:
+            self._last_token = None
+            return None
+        n = self._frame_count
+        self._last_token = _TOKEN_BASE + n // 4 % len(_WORDS) if n % 4 == 0 else _PAD_TOKEN
+        return audio_in
+
+    def process_batch(self, pcm: np.ndarray) -> tuple[Optional[np.ndarray], Optional[list]]:
+        """One step for every stream: echoed audio plus a word every fourth frame."""
+        if pcm.shape[0] != self._batch_size:
+            raise ValueError(f"Expected {self._batch_size} streams, got {pcm.shape[0]}")
+        audio = self.process_frame(pcm)
+        if audio is None:
+            return None, None
+        return np.asarray(audio, dtype=np.float32), [self._last_token] * self._batch_size
+
+    def decode_text_token(self, token: int) -> Optional[str]:
+        index = token - _TOKEN_BASE
+        return f" {_WORDS[index]}" if 0 <= index < len(_WORDS) else None
+
+    def get_performance_stats(self) -> dict:
+        if self._frame_count == 0:
+            return {"frame_count": 0}
+        return {
+            "frame_count": self._frame_count,
+            "avg_total_ms": round(self._total_ms / self._frame_count, 2),
+        }
+
+
+class _StubStreamingContext:
+    def __init__(self, engine: StubEngine, batch_size: int = 1):
+        self._engine = engine
+        self._batch_size = batch_size
+
+    def __enter__(self):
+        self._engine._streaming = True
+        self._engine._batch_size = self._batch_size
+        self._engine._frame_count = 0
+        return self._engine
+
+    def __exit__(self, *exc):
+        self._engine._streaming = False
+        return False
+
+
+def synthetic_audio(n_samples: int, seed: int = 0) -> np.ndarray:
+    """Deterministic speech-like float32 signal: a wobbling tone over noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_samples, dtype=np.float64) / SAMPLE_RATE
+    pitch = 180 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    tone = 0.3 * np.sin(2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE)
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 2.5 * t) ** 2
+    noise = 0.02 * rng.standard_normal(n_samples)
+    return (tone * envelope + noise).astype(np.float32)
+
+
+def callback_block_sizes(n_samples: int, seed: int = 0,
+                         choices: tuple = (256, 441, 480, 512, 960, 1024, 1920, 2048)) -> list[int]:
+    """Irregular audio-callback block sizes covering n_samples."""
+    rng = random.Random(seed)
+    sizes = []
+    total = 0
+    while total < n_samples:
+        size = min(rng.choice(choices), n_samples - total)
+        sizes.append(size)
+        total += size
+    return sizes
@@ -0,0 +1,520 @@
+"""Bench suite — Headless benchmarks of the voice pipeline with synthetic audio.
+
+Benchmarks (run with `conscious bench [names...]`):
+    audio_framing  AudioStream input callback framing -> get_input_frame
+    server_loop    ConsciousServer conversation loop with StubEngine, capture to playout
+    agent_codec    MoshiAgent coalescing, Opus encode/decode against the stub Moshi server
+    api_fanout     MoshiAgentAPI fan-out of agent audio to mixed-format stream clients
+
+Each produces the same core metrics, compared against a stored baseline:
+    throughput_fps            frames (or client messages) per second
+    latency_p50_ms / _p99_ms  per-frame latency, from the frame trace ring
+    drops                     frames or messages dropped on full queues
+    retained_blocks_per_frame net allocator blocks retained per frame (leak signal)
+    gc_collections            garbage collections during the run (allocation churn)
+    gc_pause_max_ms / gc_pauses_in_frame
+                              longest collection, and collections that landed
+                              inside a frame (server_loop; see conscious.gcquiet)
+
+Benchmarks whose dependencies are missing (torch, sounddevice, sphn) are
+reported as skipped rather than failing the run.
+"""
+
+import asyncio
+import gc
+import math
+import platform
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+from conscious.gcquiet import GC_MONITOR
+from conscious.tracing import (
+    CAPTURE,
+    DECODE_END,
+    DELIVERED,
+    DEQUEUE,
+    NO_TRACE,
+    PLAYOUT,
+    SUBMIT,
+    TRACER,
+    WS_SENT,
+)
+
+from .stubs import (
+    FRAME_SIZE,
+    SAMPLE_RATE,
+    StubEngine,
+    StubEngineConfig,
+    callback_block_sizes,
+    synthetic_audio,
+)
+
+FRAME_S = FRAME_SIZE / SAMPLE_RATE
+
+# metric -> (direction, absolute slack) used when comparing with a baseline
+COMPARED_METRICS = {
+    "throughput_fps": ("higher", 0.0),
+    "latency_p50_ms": ("lower", 0.5),
+    "latency_p99_ms": ("lower", 1.0),
+    "drops": ("lower", 0.0),
+    "retained_blocks_per_frame": ("lower", 1.0),
+}
+
+
+@dataclass
+class BenchConfig:
+    """Parameters shared by all benchmarks."""
+    frames: int = 250  # 20s of audio at speed 1
+    speed: float = 1.0  # pacing multiple of real time; stub delays scale with it
+    clients: int = 4
+    seed: int = 0
+    gc_quiet: bool = False  # run server_loop in GC-quiet mode (freeze + deferred GC)
+    engine: StubEngineConfig = field(default_factory=StubEngineConfig)
+
+
+@dataclass
+class BenchResult:
+    name: str
+    status: str = "ok"  # ok | skipped | error
+    metrics: dict = field(default_factory=dict)
+    reason: str = ""
+
+
+# ── Measurement helpers ──────────────────────────────────────────
+
+
+class _Measure:
+    """Wall time, allocator growth and GC activity around one benchmark."""
+
+    def __enter__(self):
+        gc.collect()
+        self._blocks = sys.getallocatedblocks()
+        self._collections = sum(s["collections"] for s in gc.get_stats())
+        GC_MONITOR.install()
+        GC_MONITOR.max_ms = 0.0
+        self._in_frame = GC_MONITOR.in_frame
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.gc_collections = sum(s["collections"] for s in gc.get_stats()) - self._collections
+        self.gc_pause_max_ms = GC_MONITOR.max_ms
+        self.gc_pauses_in_frame = GC_MONITOR.in_frame - self._in_frame
+        gc.collect()
+        self.retained_blocks = sys.getallocatedblocks() - self._blocks
+        return False
+
+    def metrics(self, frames: int) -> dict:
+        return {
+            "frames": frames,
+            "elapsed_s": round(self.elapsed, 3),
+            "throughput_fps": round(frames / self.elapsed, 2) if self.elapsed else 0.0,
+            "retained_blocks_per_frame": round(self.retained_blocks / frames, 2) if frames else 0.0,
+            "gc_collections": self.gc_collections,
+            "gc_pause_max_ms": round(self.gc_pause_max_ms, 3),
+            "gc_pauses_in_frame": self.gc_pauses_in_frame,
+        }
+
+
+def _trace_latencies(first_tid: int, start: int, end: int) -> dict:
+    """p50/p99 of (end - start) for traces allocated since first_tid."""
+    values = [
+        (ts[end] - ts[start]) / 1e6
+        for tid, ts in TRACER.snapshot()
+        if tid >= first_tid and ts[start] and ts[end] and ts[end] >= ts[start]
+    ]
+    return _percentiles(values)
+
+
+def _percentiles(values: list) -> dict:
+    if not values:
+        return {"latency_p50_ms": None, "latency_p99_ms": None, "latency_samples": 0}
+    p50, p99 = np.percentile(np.asarray(values, dtype=np.float64), (50, 99))
+    return {
+        "latency_p50_ms": round(float(p50), 3),
+        "latency_p99_ms": round(float(p99), 3),
+        "latency_samples": len(values),
+    }
+
+
+def _next_trace_id() -> int:
+    """First trace ID that the benchmark about to run will allocate."""
+    tid = TRACER.begin()
+    return tid + 1 if tid != NO_TRACE else 0
+
+
+class _ThreadPacer:
+    """Absolute-deadline pacing for driver threads."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = time.perf_counter()
+
+    def wait(self) -> None:
+        self._next += self.interval
+        delay = self._next - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ── Benchmarks ───────────────────────────────────────────────────
+
+
+def bench_audio_framing(config: BenchConfig) -> BenchResult:
+    """Irregular callback blocks -> 1920-sample frames -> consumer thread."""
+    from conscious.voice.audio_stream import AudioStream, AudioStreamConfig
+
+    stream = AudioStream(AudioStreamConfig())
+    stream._running = True  # drive the callbacks directly, no device
+    audio = synthetic_audio(config.frames * FRAME_SIZE, config.seed)
+    sizes = callback_block_sizes(len(audio), config.seed)
+    received = 0
+    done = threading.Event()
+
+    def consume():
+        nonlocal received
+        while not done.is_set() or not stream._input_queue.empty():
+            if stream.get_input_frame(timeout=0.05) is not None:
+                received += 1
+
+    first_tid = _next_trace_id()
+    consumer = threading.Thread(target=consume, name="bench-consumer", daemon=True)
+    with _Measure() as m:
+        consumer.start()
+        pos = 0
+        pacer = _ThreadPacer(0)
+        for size in sizes:
+            pacer.interval = size / SAMPLE_RATE / config.speed
+            block = audio[pos:pos + size].reshape(-1, 1)
+            stream._input_callback(block, size, None, None)
+            pos += size
+            pacer.wait()
+        done.set()
+        consumer.join()
+    stream._running = False
+
+    metrics = m.metrics(received)
+    metrics.update(_trace_latencies(first_tid, CAPTURE, DEQUEUE))
+    metrics["drops"] = stream._frames_dropped
+    metrics["callbacks"] = len(sizes)
+    return BenchResult("audio_framing", metrics=metrics)
+
+
+def bench_server_loop(config: BenchConfig) -> BenchResult:
+    """ConsciousServer loop with StubEngine; paced capture and playout threads."""
+    from conscious.server import ConsciousServer
+
+    server = ConsciousServer({"moshi": {"device": "cpu"},
+                              "performance": {"gc_quiet": {"enabled": config.gc_quiet}}})
+    server._engine = StubEngine(config.engine, time_scale=config.speed)
+    server._gc_quiet.after_load()
+    audio_stream = server._audio
+    audio_stream._running = True
+    server._running = True
+    audio = synthetic_audio(config.frames * FRAME_SIZE, config.seed)
+    underruns = 0
+    captured = threading.Event()
+
+    def playout():
+        nonlocal underruns
+        out = np.zeros((FRAME_SIZE, 1), dtype=np.float32)
+        pacer = _ThreadPacer(FRAME_S / config.speed)
+        # Playback starts one frame behind capture, like a real duplex device
+        pacer.wait()
+        while not (captured.is_set() and audio_stream._output_queue.empty()):
+            played = audio_stream._frames_played
+            audio_stream._output_callback(out, FRAME_SIZE, None, None)
+            if audio_stream._frames_played == played and not captured.is_set():
+                underruns += 1
+            pacer.wait()
+
+    first_tid = _next_trace_id()
+    loop_thread = threading.Thread(target=server._conversation_loop, name="bench-loop", daemon=True)
+    player = threading.Thread(target=playout, name="bench-playout", daemon=True)
+    with _Measure() as m:
+        loop_thread.start()
+        player.start()
+        pacer = _ThreadPacer(FRAME_S / config.speed)
+        for i in range(config.frames):
+            block = audio[i * FRAME_SIZE:(i + 1) * FRAME_SIZE].reshape(-1, 1)
+            audio_stream._input_callback(block, FRAME_SIZE, None, None)
+            pacer.wait()
+        # Let the loop drain what was captured before stopping it
+        while not audio_stream._input_queue.empty():
+            time.sleep(0.01)
+        captured.set()
+        player.join(timeout=10)
+        server._running = False
+        loop_thread.join(timeout=10)
+    audio_stream._running = False
+
+    metrics = m.metrics(audio_stream._frames_played)
+    metrics.update(_trace_latencies(first_tid, CAPTURE, PLAYOUT))
+    inference = _trace_latencies(first_tid, CAPTURE, DECODE_END)
+    metrics["capture_to_decoded_p99_ms"] = inference["latency_p99_ms"]
+    metrics["drops"] = audio_stream._frames_dropped
+    metrics["underruns"] = underruns
+    return BenchResult("server_loop", metrics=metrics)
+
+
+async def _start_stub_server(config: BenchConfig):
+    """Loopback stub Moshi server echoing each frame after the StubEngine delays."""
+    from aiohttp import web
+
+    from conscious.voice.stub_server import StubMoshiServer, StubServerConfig
+
+    engine = config.engine
+    server = StubMoshiServer(StubServerConfig(
+        response_delay_ms=(engine.encode_ms + engine.lm_ms + engine.decode_ms) / config.speed,
+        jitter_ms=engine.jitter_ms / config.speed,
+        text_tokens_per_s=0,
+        seed=engine.seed,
+    ))
+    runner = web.AppRunner(server.build_app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    await server.wait_loaded()
+    port = runner.addresses[0][1]
+    return runner, f"ws://127.0.0.1:{port}/api/chat"
+
+
+async def _feed_agent(agent, config: BenchConfig) -> None:
+    """Push synthetic audio into the agent in irregular chunks, like a live source.
+
+    Each chunk is released once its last sample would have been captured.
+    """
+    audio = synthetic_audio(config.frames * FRAME_SIZE, config.seed)
+    sizes = callback_block_sizes(len(audio), config.seed)
+    start = time.perf_counter()
+    pos = 0
+    for size in sizes:
+        pos += size
+        delay = start + pos / SAMPLE_RATE / config.speed - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await agent.send_audio(audio[pos - size:pos])
+
+
+async def _wait_idle(counter: Callable[[], int], idle_s: float = 0.5,
+                     timeout: float = 10.0) -> None:
+    """Wait until counter() stops changing for idle_s."""
+    last = counter()
+    quiet_since = time.monotonic()
+    deadline = quiet_since + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        value = counter()
+        if value != last:
+            last = value
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= idle_s:
+            return
+
+
+def _agent_config(url: str, config: BenchConfig):
+    from conscious.voice.moshi_agent import AgentConfig
+
+    return AgentConfig(
+        server_ws_url=url,
+        audio_send_interval_ms=FRAME_S * 1000 / config.speed,
+        auto_reconnect=False,
+        metrics_role="bench",
+    )
+
+
+async def bench_agent_codec(config: BenchConfig) -> BenchResult:
+    """MoshiAgent send path (coalesce + Opus encode) and receive path (Opus decode)."""
+    from conscious.voice.moshi_agent import MoshiAgent
+
+    runner, url = await _start_stub_server(config)
+    agent = MoshiAgent(_agent_config(url, config))
+    received = 0
+
+    def on_audio(pcm):
+        nonlocal received
+        received += 1
+
+    agent.on_audio_received = on_audio
+    try:
+        if not await agent.connect():
+            return BenchResult("agent_codec", status="error", reason="agent failed to connect")
+        first_tid = _next_trace_id()
+        with _Measure() as m:
+            await _feed_agent(agent, config)
+            await _wait_idle(lambda: received)
+        coalescer = agent.get_coalescer_stats() or {}
+        metrics = m.metrics(received)
+        metrics.update(_trace_latencies(first_tid, SUBMIT, DELIVERED))
+        metrics["send_p99_ms"] = _trace_latencies(first_tid, SUBMIT, WS_SENT)["latency_p99_ms"]
+        metrics["drops"] = coalescer.get("frames_dropped", 0)
+        metrics["frames_padded"] = coalescer.get("frames_padded", 0)
+        return BenchResult("agent_codec", metrics=metrics)
+    finally:
+        await agent.disconnect()
+        await runner.cleanup()
+
+
+async def bench_api_fanout(config: BenchConfig) -> BenchResult:
+    """Agent audio fanned out by MoshiAgentAPI to stream clients of mixed formats."""
+    import aiohttp
+    from aiohttp import web
+
+    from conscious.voice.agent_api import MoshiAgentAPI
+    from conscious.voice.stream_protocol import FRAME_AUDIO, FRAME_HEADER
+
+    stub_runner, url = await _start_stub_server(config)
+    api = MoshiAgentAPI(agent_config=_agent_config(url, config))
+    api_runner = web.AppRunner(api.build_app())
+    await api_runner.setup()
+    site = web.TCPSite(api_runner, "127.0.0.1", 0)
+    await site.start()
+    api_url = f"http://127.0.0.1:{api_runner.addresses[0][1]}/api/voice/stream"
+
+    # Publish time per sequence number, matched against each client's receive time
+    published: dict[int, float] = {}
+    publish = api._stream_clients.publish
+
+    def timed_publish(messages):
+        published.setdefault(api.agent.stats.total_audio_received, time.perf_counter())
+        publish(messages)
+
+    api._stream_clients.publish = timed_publish
+
+    formats = ["", "?protocol=binary&encoding=f32", "?protocol=binary&encoding=s16",
+               "?protocol=binary&encoding=opus"]
+    latencies: list[float] = []
+    delivered = 0
+
+    async def client(session, query):
+        nonlocal delivered
+        async with session.ws_connect(api_url + query) as ws:
+            async for msg in ws:
+                now = time.perf_counter()
+                if msg.type == aiohttp.WSMsgType.BINARY:
+                    kind, seq = FRAME_HEADER.unpack_from(msg.data)
+                    if kind != FRAME_AUDIO:
+                        continue
+                elif msg.type == aiohttp.WSMsgType.TEXT:
+                    if '"type": "audio"' not in msg.data[:20]:
+                        continue
+                    seq = int(msg.data.rsplit('"seq": ', 1)[1].rstrip("}"))
+                else:
+                    break
+                delivered += 1
+                sent = published.get(seq)
+                if sent is not None:
+                    latencies.append((now - sent) * 1000)
+
+    session = aiohttp.ClientSession()
+    tasks = []
+    try:
+        if not await api.agent.connect():
+            return BenchResult("api_fanout", status="error", reason="agent failed to connect")
+        tasks = [asyncio.create_task(client(session, formats[i % len(formats)]))
+                 for i in range(config.clients)]
+        while len(api._stream_clients) < config.clients:
+            await asyncio.sleep(0.01)
+        with _Measure() as m:
+            await _feed_agent(api.agent, config)
+            await _wait_idle(lambda: delivered)
+        stats = api._stream_clients.get_stats()
+        metrics = m.metrics(delivered)
+        metrics.update(_percentiles(latencies))
+        metrics["drops"] = stats["dropped"]
+        metrics["clients"] = config.clients
+        metrics["laggards_disconnected"] = stats["laggards_disconnected"]
+        return BenchResult("api_fanout", metrics=metrics)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await session.close()
+        await api.agent.disconnect()
+        await api_runner.cleanup()
+        await stub_runner.cleanup()
+
+
+# name -> (description, function)
+BENCHMARKS: dict[str, tuple[str, Callable]] = {
+    "audio_framing": ("AudioStream callback framing into 80ms frames", bench_audio_framing),
+    "server_loop": ("ConsciousServer loop with a stub engine, capture to playout",
+                    bench_server_loop),
+    "agent_codec": ("MoshiAgent coalescing and Opus encode/decode round trip", bench_agent_codec),
+    "api_fanout": ("MoshiAgentAPI fan-out to mixed-format stream clients", bench_api_fanout),
+}
+
+
+def run_benchmarks(names: Optional[list[str]] = None,
+                   config: Optional[BenchConfig] = None) -> dict:
+    """Run the selected benchmarks (all by default) and return a JSON-able report.
+
+    Raises:
+        ValueError: On an unknown benchmark name.
+    """
+    config = config or BenchConfig()
+    names = names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)} (use {', '.join(BENCHMARKS)})")
+
+    # Bench runs must not fill ~/.conscious/traces with deadline-miss dumps
+    auto_dump_interval = TRACER.auto_dump_interval
+    TRACER.auto_dump_interval = math.inf
+    results = {}
+    try:
+        for name in names:
+            fn = BENCHMARKS[name][1]
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    result = asyncio.run(fn(config))
+                else:
+                    result = fn(config)
+            except ImportError as e:
+                result = BenchResult(name, status="skipped", reason=str(e))
+            except Exception as e:
+                result = BenchResult(name, status="error", reason=f"{type(e).__name__}: {e}")
+            results[name] = asdict(result)
+    finally:
+        TRACER.auto_dump_interval = auto_dump_interval
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": asdict(config),
+        "results": results,
+    }
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = 0.10) -> list[str]:
+    """Regressions of report against baseline, as human-readable lines.
+
+    A metric regresses when it is worse than the baseline by more than
+    `tolerance` (relative) plus the metric's absolute slack.
+    """
+    regressions = []
+    for name, result in report.get("results", {}).items():
+        base = baseline.get("results", {}).get(name)
+        if not base or result.get("status") != "ok" or base.get("status") != "ok":
+            continue
+        for metric, (direction, slack) in COMPARED_METRICS.items():
+            new = result["metrics"].get(metric)
+            old = base["metrics"].get(metric)
+            if new is None or old is None:
+                continue
+            if direction == "higher":
+                limit = old * (1 - tolerance) - slack
+                worse = new < limit
+            else:
+                limit = old * (1 + tolerance) + slack
+                worse = new > limit
+            if worse:
+                regressions.append(f"{name}.{metric}: {new} vs baseline {old} (limit {limit:.3f})")
+    return regressions
@@ -0,0 +1,424 @@
+"""Command line — the `conscious` entry point.
+
+    conscious                 Start the voice companion (same as `conscious run`)
+    conscious run             Start the voice companion
+    conscious status          Query a running agent API's /api/voice/status
+    conscious config [FILE]   Validate the configuration and show what the pipeline will use
+    conscious bench [...]     Headless pipeline benchmarks (see conscious.bench)
+    conscious loadtest [...]  Ramp stream clients against the agent API (capacity report)
+    conscious failover [...]  Kill stub servers under N+1 mode; warm vs cold outage
+    conscious jitter [...]    Audio-thread wake-up jitter under CPU contention, with/without RT
+    conscious replay FILE     Replay a recorded agent session through MoshiAgent
+    conscious offline FILES   Run WAV/Opus files through MoshiEngine, unpaced
+
+Subcommands import their modules lazily, and the package itself loads
+torch, moshi, sounddevice and aiohttp only where they are used, so status,
+config and `conscious bench --list` start in a fraction of a second
+(scripts/test_import.py checks this).
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    from conscious.server import main as server_main
+
+    server_main()
+    return 0
+
+
+def _cmd_status(args: argparse.Namespace) -> int:
+    import urllib.error
+    import urllib.request
+
+    url = args.api_url.rstrip("/") + "/api/voice/status"
+    try:
+        with urllib.request.urlopen(url, timeout=args.timeout) as response:
+            status = json.loads(response.read())
+    except (OSError, ValueError) as e:  # URLError is an OSError
+        print(f"error: no agent API at {url}: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(status, indent=2))
+        return 0
+    agent, server = status.get("agent", {}), status.get("server", {})
+    stats = agent.get("stats", {})
+    print(f"server  {server.get('status', '?'):<12} {server.get('url', '')}")
+    print(f"agent   {agent.get('state', '?'):<12} "
+          f"latency {stats.get('current_latency_ms', '-')}ms "
+          f"(avg {stats.get('avg_latency_ms', '-')}ms), "
+          f"reconnects {stats.get('reconnect_count', 0)}")
+    print(f"stream  {status.get('stream', {}).get('clients', 0)} clients")
+    return 0
+
+
+def _check_section(config: dict, prefix: str, defaults) -> list[str]:
+    """Type-check config[prefix].* against a config dataclass's defaults."""
+    from conscious.config import get_config_value
+
+    section = get_config_value(config, prefix, {})
+    if not isinstance(section, dict):
+        return [f"{prefix}: expected a mapping, got {type(section).__name__}"]
+    problems = []
+    fields = defaults.__dataclass_fields__
+    for key, value in section.items():
+        if key not in fields:
+            problems.append(
+                f"{prefix}.{key}: unknown setting (expected one of {', '.join(fields)})")
+            continue
+        expected = type(getattr(defaults, key))
+        ok = isinstance(value, expected) and not (expected is not bool and isinstance(value, bool))
+        if expected is float:
+            ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if not ok:
+            problems.append(f"{prefix}.{key}: expected {expected.__name__}, "
+                            f"got {type(value).__name__} ({value!r})")
+    return problems
+
+
+def _cmd_config(args: argparse.Namespace) -> int:
+    import os
+
+    import yaml
+
+    from conscious.config import get_config_value, load_config
+    from conscious.gcquiet import GcQuietConfig
+    from conscious.governor import ResourceLimits
+    from conscious.scheduling import ROLES, SchedulingConfig
+
+    try:
+        config = load_config(args.path)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    problems = []
+    for key in ("personality.active", "moshi.device"):
+        if not isinstance(get_config_value(config, key), str):
+            problems.append(f"{key}: missing or not a string")
+    for key, maximum in (("resources.max_cpu_percent", 100), ("resources.max_memory_gb", None),
+                         ("resources.max_gpu_memory_gb", None), ("performance.num_workers", None)):
+        value = get_config_value(config, key, 0) or 0
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            problems.append(f"{key}: expected a number >= 0, got {value!r}")
+        elif maximum is not None and value > maximum:
+            problems.append(f"{key}: {value} is over {maximum}")
+    problems += _check_section(config, "performance.gc_quiet", GcQuietConfig())
+    problems += _check_section(config, "scheduling", SchedulingConfig())
+    cpu_count = os.cpu_count() or 1
+    for role in ROLES:
+        cpus = get_config_value(config, f"scheduling.{role}_cpus", [])
+        bad = [cpu for cpu in cpus if not isinstance(cpu, int) or not 0 <= cpu < cpu_count] \
+            if isinstance(cpus, list) else []
+        if bad:
+            problems.append(f"scheduling.{role}_cpus: {bad} not in 0-{cpu_count - 1}")
+
+    effective = {} if problems else {
+        "resources": asdict(ResourceLimits.from_config(config)),
+        "scheduling": asdict(SchedulingConfig.from_config(config)),
+        "gc_quiet": asdict(GcQuietConfig.from_config(config)),
+    }
+
+    for line in problems:
+        print(f"INVALID {line}", file=sys.stderr)
+    if args.show and effective:
+        print(json.dumps(effective, indent=2))
+    if not problems:
+        print(f"config ok ({args.path or 'default + user config'})", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    from conscious.bench import (
+        BENCHMARKS,
+        BenchConfig,
+        StubEngineConfig,
+        compare_to_baseline,
+        run_benchmarks,
+    )
+
+    if args.list:
+        for name, (description, _) in BENCHMARKS.items():
+            print(f"{name:<16} {description}")
+        return 0
+
+    config = BenchConfig(
+        frames=args.frames,
+        speed=args.speed,
+        clients=args.clients,
+        seed=args.seed,
+        gc_quiet=args.gc_quiet,
+        engine=StubEngineConfig(
+            encode_ms=args.encode_ms,
+            lm_ms=args.lm_ms,
+            decode_ms=args.decode_ms,
+            jitter_ms=args.jitter_ms,
+            seed=args.seed,
+        ),
+    )
+    try:
+        report = run_benchmarks(args.names or None, config)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(report, baseline, args.tolerance)
+        report["baseline"] = {"path": args.baseline, "tolerance": args.tolerance,
+                              "regressions": regressions}
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            status = 1
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.save_baseline:
+        path = Path(args.save_baseline)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text + "\n", encoding="utf-8")
+    return status
+
+
+def _cmd_loadtest(args: argparse.Namespace) -> int:
+    from conscious.bench.loadtest import LoadTestConfig, format_report, run_load_test
+
+    try:
+        steps = sorted({int(k) for k in args.ramp.split(",")})
+    except ValueError:
+        print(f"error: --ramp must be comma-separated integers, got {args.ramp!r}", file=sys.stderr)
+        return 2
+
+    config = LoadTestConfig(
+        steps=steps,
+        step_seconds=args.step_seconds,
+        warmup_seconds=args.warmup_seconds,
+        encoding=args.encoding,
+        budget_ms=args.budget_ms,
+        max_loss=args.max_loss,
+        api_url=args.api_url,
+        api_pid=args.api_pid,
+    )
+    report = run_load_test(config)
+    print(format_report(report), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+def _cmd_failover(args: argparse.Namespace) -> int:
+    from conscious.bench.failover import FailoverConfig, format_report, run_failover_test
+
+    config = FailoverConfig(
+        trials=args.trials,
+        mode=args.mode,
+        load_seconds=args.load_seconds,
+        health_check_interval=args.health_check_interval,
+        compare_cold=not args.no_cold,
+    )
+    report = run_failover_test(config)
+    print(format_report(report), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+def _cmd_jitter(args: argparse.Namespace) -> int:
+    from conscious.bench.jitter import JitterConfig, format_report, run_jitter_benchmark
+
+    config = JitterConfig(
+        seconds=args.seconds,
+        period_ms=args.period_ms,
+        work_ms=args.work_ms,
+        contention=args.contention,
+        cpus=[int(c) for c in args.cpus.split(",")] if args.cpus else [],
+        priority=args.priority,
+    )
+    report = run_jitter_benchmark(config)
+    print(format_report(report), file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+def _cmd_replay(args: argparse.Namespace) -> int:
+    import asyncio
+
+    from conscious.voice.session_log import replay_session
+
+    try:
+        report = asyncio.run(replay_session(args.path, args.speed))
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    text = json.dumps(report.to_dict(), indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+def _cmd_offline(args: argparse.Namespace) -> int:
+    from conscious.voice.offline import OfflineConfig, OfflineProcessor
+
+    if args.stub_engine:
+        from conscious.bench.stubs import StubEngine, StubEngineConfig
+        engine = StubEngine(StubEngineConfig(encode_ms=0, lm_ms=0, decode_ms=0, jitter_ms=0))
+    else:
+        from conscious.voice.moshi_engine import MoshiConfig, MoshiEngine
+        engine = MoshiEngine(MoshiConfig(device=args.device))
+        engine.load_models()
+
+    config = OfflineConfig(batch_size=args.batch_size, tail_seconds=args.tail_seconds)
+    try:
+        report = OfflineProcessor(engine, config).run(args.inputs, args.output_dir)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="conscious", description="Conscious voice companion")
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="Start the voice companion")
+    run.set_defaults(func=_cmd_run)
+
+    status = sub.add_parser("status", help="Query a running agent API's status")
+    status.add_argument("--api-url", default="http://localhost:8999", help="Agent API base URL")
+    status.add_argument("--timeout", type=float, default=2.0, help="Seconds to wait for a reply")
+    status.add_argument("--json", action="store_true", help="Print the full status JSON")
+    status.set_defaults(func=_cmd_status)
+
+    config = sub.add_parser("config", help="Validate the configuration")
+    config.add_argument("path", nargs="?",
+                        help="Config file to check (default: bundled default + user config)")
+    config.add_argument("--show", action="store_true",
+                        help="Print the resource, scheduling and GC settings that will apply")
+    config.set_defaults(func=_cmd_config)
+
+    bench = sub.add_parser("bench", help="Run headless pipeline benchmarks")
+    bench.add_argument("names", nargs="*", help="Benchmarks to run (default: all)")
+    bench.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    bench.add_argument("--frames", type=int, default=250, help="80ms frames per benchmark")
+    bench.add_argument("--speed", type=float, default=1.0,
+                       help="Pacing multiple of real time (stub delays scale with it)")
+    bench.add_argument("--clients", type=int, default=4, help="Stream clients for api_fanout")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--gc-quiet", action="store_true",
+                       help="Run server_loop with GC-quiet mode (frozen heap, deferred GC)")
+    bench.add_argument("--encode-ms", type=float, default=4.0, help="Stub engine encode latency")
+    bench.add_argument("--lm-ms", type=float, default=35.0, help="Stub engine LM step latency")
+    bench.add_argument("--decode-ms", type=float, default=4.0, help="Stub engine decode latency")
+    bench.add_argument("--jitter-ms", type=float, default=2.0, help="Stub engine LM jitter (+/-)")
+    bench.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    bench.add_argument("--baseline", help="Compare against this report; exit 1 on regression")
+    bench.add_argument("--tolerance", type=float, default=0.10,
+                       help="Relative slack before a metric counts as regressed")
+    bench.add_argument("--save-baseline", help="Also write the report here as the new baseline")
+    bench.set_defaults(func=_cmd_bench)
+
+    load = sub.add_parser("loadtest", help="Ramp stream clients against the agent API")
+    load.add_argument("--ramp", default="1,2,4,8,16,32,64",
+                      help="Comma-separated client counts, one step each")
+    load.add_argument("--step-seconds", type=float, default=10.0, help="Measurement time per step")
+    load.add_argument("--warmup-seconds", type=float, default=2.0)
+    load.add_argument("--encoding", default="s16", choices=["json", "f32", "s16", "opus"],
+                      help="Listener stream format")
+    load.add_argument("--budget-ms", type=float, default=80.0,
+                      help="Fanout / latency-growth / jitter budget for a passing step")
+    load.add_argument("--max-loss", type=float, default=0.01)
+    load.add_argument("--api-url", help="Test a running API instead of launching one with the stub")
+    load.add_argument("--api-pid", type=int, help="PID of --api-url's process, for CPU sampling")
+    load.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    load.set_defaults(func=_cmd_loadtest)
+
+    failover = sub.add_parser("failover", help="Measure warm-standby failover with stub servers")
+    failover.add_argument("--trials", type=int, default=3)
+    failover.add_argument("--mode", default="crash", choices=["crash", "hang"],
+                          help="crash = SIGKILL the active server, hang = SIGSTOP it")
+    failover.add_argument("--load-seconds", type=float, default=5.0,
+                          help="Simulated model load time of each stub server")
+    failover.add_argument("--health-check-interval", type=float, default=0.5)
+    failover.add_argument("--no-cold", action="store_true",
+                          help="Skip the comparison trial without a standby")
+    failover.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    failover.set_defaults(func=_cmd_failover)
+
+    jitter = sub.add_parser(
+        "jitter", help="Audio-thread wake-up jitter under CPU contention, with/without RT")
+    jitter.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+    jitter.add_argument("--period-ms", type=float, default=10.0, help="Wake-up period")
+    jitter.add_argument("--work-ms", type=float, default=1.0, help="Busy work per wake-up")
+    jitter.add_argument("--contention", type=int, default=0,
+                        help="Busy-looping processes (default: two per CPU under test)")
+    jitter.add_argument("--cpus", help="Comma-separated CPUs to run on (default: the last one)")
+    jitter.add_argument("--priority", type=int, default=70,
+                        help="SCHED_FIFO priority for the scheduled run")
+    jitter.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    jitter.set_defaults(func=_cmd_jitter)
+
+    replay = sub.add_parser("replay", help="Replay a recorded agent session through MoshiAgent")
+    replay.add_argument("path", help="Recording made with AgentConfig.record_path / --record")
+    replay.add_argument("--speed", type=float, default=1.0,
+                        help="Playback rate (1 = real time, 4 = 4x, 0 = as fast as possible)")
+    replay.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+    replay.set_defaults(func=_cmd_replay)
+
+    offline = sub.add_parser("offline", help="Run WAV/Opus files through MoshiEngine, unpaced")
+    offline.add_argument("inputs", nargs="+", help="WAV or Ogg Opus files")
+    offline.add_argument("--output-dir", "-o", required=True,
+                         help="Directory for <stem>.wav and <stem>.tokens.jsonl")
+    offline.add_argument("--batch-size", type=int, default=1,
+                         help="Files processed side by side in one batched engine step")
+    offline.add_argument("--tail-seconds", type=float, default=1.0,
+                         help="Silence appended to each file so the reply can finish")
+    offline.add_argument("--device", default="cuda")
+    offline.add_argument("--stub-engine", action="store_true",
+                         help="Use the bench stub engine (pipeline/I/O testing, no model)")
+    offline.set_defaults(func=_cmd_offline)
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point for the conscious command."""
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        args.func = _cmd_run
+    if args.command in ("bench", "loadtest", "failover", "replay", "offline"):
+        from conscious.logqueue import setup_logging
+
+        setup_logging("WARNING")
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""GC-quiet streaming — Keep garbage collection pauses out of the 80ms frame budget.
+
+Every frame allocates tensors, arrays, bytes and dicts, so CPython's
+generational collector runs every few frames, and now and then an older
+generation scan of the whole model-sized heap lands inside a frame. In
+GC-quiet mode:
+
+    freeze      after the models load, one full collection and gc.freeze()
+                move everything alive into the permanent generation, so
+                later collections never scan it again
+    defer       while streaming, automatic collection is off; the loop calls
+                idle() when a frame finished with slack to spare, and collects
+                what automatic GC would have by then (up to generation 2).
+                note_text() is called for every text token of the reply; once
+                none has come for turn_gap_ms the reply is over, and the next
+                idle() does a full collection at that turn boundary. With no
+                input at all (mic closed) idle(full=True) does the same
+    backstop    if no idle moment came for max_deferred_s, tick() forces a
+                young collection so cyclic garbage can't grow without bound
+
+Without defer, gen0_threshold can instead just make collections rarer.
+
+GC_MONITOR records every collection via gc.callbacks: generation, pause
+duration, objects collected and the trace ID of the frame in progress (set
+by frame_begin()/frame_end()), so pauses inside frames can be told apart
+from pauses at idle moments. Histograms are exported as conscious_gc_pause_ms.
+
+Usage:
+    quiet = GcQuiet(GcQuietConfig(enabled=True))
+    engine.load_models()
+    quiet.after_load()
+    with quiet.streaming():
+        while running:
+            GC_MONITOR.frame_begin(trace_id); ...; GC_MONITOR.frame_end()
+            if text_piece:
+                quiet.note_text()
+            quiet.idle(slack_ms)
+    GC_MONITOR.get_stats()
+"""
+
+import gc
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+from conscious.config import get_config_value
+from conscious.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_PAUSE_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 40, 80, 160)
+_PAUSE_MS = {
+    generation: REGISTRY.histogram(
+        "conscious_gc_pause_ms", "Garbage collection pause (ms)",
+        labels={"generation": str(generation)}, buckets=_PAUSE_BUCKETS,
+    )
+    for generation in range(3)
+}
+_IN_FRAME = REGISTRY.counter(
+    "conscious_gc_pauses_in_frame_total",
+    "Garbage collections that ran while a frame was in progress",
+)
+
+
+class GcMonitor:
+    """Records each collection's pause and the frame it landed in (see module docstring)."""
+
+    def __init__(self, history: int = 256):
+        self.recent: deque = deque(maxlen=history)
+        self.collections = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.in_frame = 0
+        self._frames_affected: set = set()
+        self._frame: Optional[int] = None
+        self._started_ns = 0
+        self._installed = False
+
+    def install(self) -> None:
+        if not self._installed:
+            gc.callbacks.append(self._callback)
+            self._installed = True
+
+    def uninstall(self) -> None:
+        if self._installed:
+            gc.callbacks.remove(self._callback)
+            self._installed = False
+
+    def frame_begin(self, trace_id: int) -> None:
+        self._frame = trace_id
+
+    def frame_end(self) -> None:
+        self._frame = None
+
+    def _callback(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._started_ns = time.perf_counter_ns()
+            return
+        ms = (time.perf_counter_ns() - self._started_ns) / 1e6
+        generation = info["generation"]
+        frame = self._frame
+        self.collections += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        _PAUSE_MS[generation].observe(ms)
+        if frame is not None:
+            self.in_frame += 1
+            self._frames_affected.add(frame)
+            _IN_FRAME.inc()
+        self.recent.append({
+            "t": round(time.time(), 3), "generation": generation, "ms": round(ms, 3),
+            "collected": info.get("collected", 0), "frame": frame,
+        })
+
+    def get_stats(self, recent: int = 20) -> dict:
+        return {
+            "collections": self.collections,
+            "total_ms": round(self.total_ms, 2),
+            "max_ms": round(self.max_ms, 3),
+            "in_frame": self.in_frame,
+            "frames_affected": len(self._frames_affected),
+            "frozen_objects": gc.get_freeze_count(),
+            "recent": list(self.recent)[-recent:] if recent > 0 else [],
+        }
+
+
+GC_MONITOR = GcMonitor()
+
+
+@dataclass
+class GcQuietConfig:
+    """GC-quiet mode settings; performance.gc_quiet.* in the config."""
+    enabled: bool = False
+    freeze: bool = True  # gc.freeze() the long-lived heap after model load
+    defer: bool = True  # no automatic collection while streaming; collect at idle moments
+    gen0_threshold: int = 0  # without defer: raise the gen-0 threshold (0 keeps it)
+    idle_min_ms: float = 20.0  # frame slack needed to run a collection
+    turn_gap_ms: float = 400.0  # no text token for this long ends a reply (turn boundary)
+    max_deferred_s: float = 10.0  # backstop: force a young collection after this long
+
+    @classmethod
+    def from_config(cls, config: dict) -> "GcQuietConfig":
+        defaults = cls()
+        return cls(**{
+            name: get_config_value(config, f"performance.gc_quiet.{name}", getattr(defaults, name))
+            for name in defaults.__dataclass_fields__
+        })
+
+
+class GcQuiet:
+    """Applies GcQuietConfig around a streaming loop; every method is a no-op when disabled."""
+
+    def __init__(self, config: Optional[GcQuietConfig] = None):
+        self.config = config or GcQuietConfig()
+        self._deferring = False
+        self._last_collect = time.monotonic()
+        self._last_text: Optional[float] = None
+        self.idle_collections = 0
+        self.turn_collections = 0
+        self.forced_collections = 0
+        GC_MONITOR.install()
+
+    def after_load(self) -> None:
+        """Move everything alive now into the permanent generation."""
+        if not (self.config.enabled and self.config.freeze):
+            return
+        start = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        logger.info(f"GC: froze {gc.get_freeze_count()} objects "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+
+    @contextmanager
+    def streaming(self):
+        """Defer (or thin out) automatic collection for the duration of a stream."""
+        if not self.config.enabled:
+            yield self
+            return
+        was_enabled = gc.isenabled()
+        thresholds = gc.get_threshold()
+        if self.config.defer:
+            gc.disable()
+            self._deferring = True
+            self._last_collect = time.monotonic()
+        elif self.config.gen0_threshold:
+            gc.set_threshold(self.config.gen0_threshold, *thresholds[1:])
+        try:
+            yield self
+        finally:
+            self._deferring = False
+            gc.set_threshold(*thresholds)
+            if was_enabled:
+                gc.enable()
+
+    def _due_generation(self) -> Optional[int]:
+        """Oldest generation automatic GC would have collected by now, if any."""
+        counts, thresholds = gc.get_count(), gc.get_threshold()
+        # Manual young collections advance counts[2] while counts[0] stays low,
+        # so the older generations are checked first
+        if counts[2] >= thresholds[2]:
+            return 2
+        if counts[1] >= thresholds[1]:
+            return 1
+        return 0 if counts[0] >= thresholds[0] else None
+
+    def note_text(self) -> None:
+        """A text token of the reply arrived (the turn is still going)."""
+        self._last_text = time.monotonic()
+
+    def _turn_ended(self) -> bool:
+        if self._last_text is None:
+            return False
+        if (time.monotonic() - self._last_text) * 1000 < self.config.turn_gap_ms:
+            return False
+        self._last_text = None
+        return True
+
+    def idle(self, slack_ms: float = float("inf"), full: bool = False) -> None:
+        """An idle moment: collect what is due if the slack allows.
+
+        At the first idle moment after a reply ended (see note_text()) every
+        generation is collected, due or not.
+
+        Args:
+            slack_ms: Time left in the current frame budget.
+            full: A longer pause is fine (no input): collect every generation
+                if anything is due.
+        """
+        if not self._deferring or slack_ms < self.config.idle_min_ms:
+            return
+        if self._turn_ended():
+            gc.collect(2)
+            self.turn_collections += 1
+        else:
+            generation = self._due_generation()
+            if generation is None:
+                return
+            gc.collect(2 if full else generation)
+            self.idle_collections += 1
+        self._last_collect = time.monotonic()
+
+    def tick(self) -> None:
+        """Per-frame backstop against unbounded deferral."""
+        if self._deferring and time.monotonic() - self._last_collect > self.config.max_deferred_s:
+            gc.collect(0)
+            self.forced_collections += 1
+            self._last_collect = time.monotonic()
+
+    def get_stats(self, recent: int = 20) -> dict:
+        return {
+            "enabled": self.config.enabled,
+            "deferring": self._deferring,
+            "idle_collections": self.idle_collections,
+            "turn_collections": self.turn_collections,
+            "forced_collections": self.forced_collections,
+            **GC_MONITOR.get_stats(recent),
+        }
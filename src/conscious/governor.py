@@ -0,0 +1,449 @@
+"""Resource governor — Enforce the config's resources.* limits on the voice pipeline.
+
+config/default.yaml declares a budget for the whole voice pipeline (the
+managed Moshi server plus any in-process MoshiEngine):
+
+    resources.max_cpu_percent    share of host CPU time
+    resources.max_memory_gb      resident memory
+    resources.max_gpu_memory_gb  CUDA memory
+    performance.num_workers      CPU threads for torch / OpenMP / MKL
+
+ResourceGovernor applies it with whatever the platform allows, degrading
+step by step rather than failing:
+
+    CPU     affinity to ceil(max_cpu_percent% of the allowed CPUs), plus an
+            exact cpu.max quota when a cgroup v2 group can be created
+    memory  memory.max on that cgroup; otherwise sampled and warned about
+            only (RLIMIT_AS would break CUDA's large virtual mappings)
+    GPU     torch.cuda.set_per_process_memory_fraction() in-process; a
+            managed server is a separate interpreter, so its GPU memory is
+            sampled (nvidia-smi) and warned about
+    threads OMP/MKL_NUM_THREADS for launched servers, torch.set_num_threads()
+            in-process, capped at the pinned CPU count
+
+A sampler task reads actual usage of every governed process every few
+seconds and exposes how close each limit is (snapshot(), /metrics).
+
+Usage:
+    governor = ResourceGovernor(ResourceLimits.from_config(load_config()))
+    governor.apply_in_process()          # before loading models
+    manager = MoshiServerManager(config, governor=governor)
+    await governor.start()
+    governor.snapshot()["usage"]["cpu"]  # {"used": 41.0, "limit": 60.0, "ratio": 0.68}
+"""
+
+import asyncio
+import logging
+import math
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from conscious.config import get_config_value
+from conscious.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = ("cpu", "memory", "gpu_memory")
+_UNITS = {"cpu": "percent", "memory": "gb", "gpu_memory": "gb"}
+_GB = 1024 ** 3
+_CGROUP_ROOT = Path("/sys/fs/cgroup")
+_CPU_PERIOD_US = 100_000
+
+
+@dataclass
+class ResourceLimits:
+    """Budget for the voice pipeline; 0 leaves a resource unlimited."""
+    max_cpu_percent: float = 0.0  # of the whole host, 100 = every CPU
+    max_memory_gb: float = 0.0
+    max_gpu_memory_gb: float = 0.0
+    num_workers: int = 0  # CPU threads for torch/OMP/MKL; 0 keeps the library default
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ResourceLimits":
+        """Read resources.* and performance.num_workers from a loaded config."""
+        return cls(
+            max_cpu_percent=float(get_config_value(config, "resources.max_cpu_percent", 0) or 0),
+            max_memory_gb=float(get_config_value(config, "resources.max_memory_gb", 0) or 0),
+            max_gpu_memory_gb=float(
+                get_config_value(config, "resources.max_gpu_memory_gb", 0) or 0),
+            num_workers=int(get_config_value(config, "performance.num_workers", 0) or 0),
+        )
+
+    def limit(self, resource: str) -> float:
+        return {"cpu": self.max_cpu_percent, "memory": self.max_memory_gb,
+                "gpu_memory": self.max_gpu_memory_gb}[resource]
+
+
+def allowed_cpus() -> list[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    if psutil is not None:
+        try:
+            return sorted(psutil.Process().cpu_affinity())
+        except (AttributeError, psutil.Error):
+            pass
+    return list(range(os.cpu_count() or 1))
+
+
+def cpus_for_percent(percent: float, cpus: Optional[list[int]] = None) -> list[int]:
+    """The highest-numbered CPUs covering percent of cpus (at least one).
+
+    CPU 0 is left to the rest of the system for as long as possible, since it
+    usually takes most device interrupts.
+    """
+    cpus = sorted(cpus if cpus is not None else allowed_cpus())
+    if percent <= 0 or percent >= 100:
+        return cpus
+    n = max(1, math.ceil(len(cpus) * percent / 100))
+    return cpus[-n:]
+
+
+def _set_affinity(pid: int, cpus: list[int]) -> None:
+    if psutil is not None:
+        psutil.Process(pid).cpu_affinity(cpus)
+    elif hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(pid, cpus)
+    else:
+        raise OSError("CPU affinity is not supported on this platform")
+
+
+# ── Per-process usage ────────────────────────────────────────────
+
+def _cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU time of pid, or None if it has exited."""
+    if psutil is not None:
+        try:
+            times = psutil.Process(pid).cpu_times()
+            return times.user + times.system
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+def _gpu_bytes_by_pid() -> dict[int, int]:
+    """CUDA memory per process from nvidia-smi; empty if unavailable (blocking)."""
+    if not shutil.which("nvidia-smi"):
+        return {}
+    try:
+        out = subprocess.run(
+            ["nvidia-smi", "--query-compute-apps=pid,used_memory", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=10,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    usage = {}
+    for line in out.splitlines():
+        try:
+            pid, mb = (int(v) for v in line.split(","))
+        except ValueError:
+            continue
+        usage[pid] = usage.get(pid, 0) + mb * 1024 * 1024
+    return usage
+
+
+# ── cgroup v2 ────────────────────────────────────────────────────
+
+class _CgroupV2:
+    """A child cgroup with cpu.max and memory.max, if the unified hierarchy is writable."""
+
+    def __init__(self, name: str, parent: Optional[Path] = None):
+        self.path: Optional[Path] = None
+        self.error = ""
+        if not (_CGROUP_ROOT / "cgroup.controllers").exists():
+            self.error = "no cgroup v2 unified hierarchy"
+            return
+        try:
+            parent = parent or self._own_cgroup()
+            path = parent / name
+            path.mkdir(exist_ok=True)
+            available = (parent / "cgroup.controllers").read_text().split()
+            wanted = [c for c in ("cpu", "memory") if c in available]
+            if wanted:
+                # Fails with EBUSY when parent holds processes (no-internal-process rule)
+                (parent / "cgroup.subtree_control").write_text(
+                    " ".join(f"+{c}" for c in wanted))
+            self.path = path
+        except OSError as e:
+            self.error = f"{e.strerror or e}"
+
+    @staticmethod
+    def _own_cgroup() -> Path:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                if line.startswith("0::"):
+                    return _CGROUP_ROOT / line.strip()[3:].lstrip("/")
+        raise OSError("process is not in a cgroup v2 hierarchy")
+
+    def set_limits(self, cpu_percent: float, memory_gb: float) -> None:
+        """Write cpu.max (cpu_percent of all host CPUs) and memory.max.
+
+        Raises:
+            OSError: If the controllers are not enabled or writable.
+        """
+        if cpu_percent > 0:
+            quota = int(_CPU_PERIOD_US * (os.cpu_count() or 1) * cpu_percent / 100)
+            (self.path / "cpu.max").write_text(f"{max(1000, quota)} {_CPU_PERIOD_US}")
+        if memory_gb > 0:
+            (self.path / "memory.max").write_text(str(int(memory_gb * _GB)))
+
+    def add(self, pid: int) -> None:
+        (self.path / "cgroup.procs").write_text(str(pid))
+
+
+# ── Governor ─────────────────────────────────────────────────────
+
+class ResourceGovernor:
+    """Applies ResourceLimits to governed processes and samples their usage.
+
+    Every process passed to govern() (and this process, after
+    apply_in_process()) shares one budget: one CPU set, one cgroup, and
+    usage summed across all of them.
+    """
+
+    def __init__(self, limits: ResourceLimits, sample_interval: float = 5.0,
+                 warn_ratio: float = 0.9, use_cgroup: bool = True,
+                 cgroup_parent: Optional[str] = None):
+        self.limits = limits
+        self.sample_interval = sample_interval
+        self.warn_ratio = warn_ratio
+        self.cpus = cpus_for_percent(limits.max_cpu_percent)
+        self.threads = min(limits.num_workers, len(self.cpus)) if limits.num_workers else 0
+        self.enforced = {"affinity": False, "cgroup": False, "gpu_fraction": False,
+                         "threads": False}
+        self.cgroup_error = ""
+        self._use_cgroup = use_cgroup and (limits.max_cpu_percent > 0 or limits.max_memory_gb > 0)
+        self._cgroup_parent = Path(cgroup_parent) if cgroup_parent else None
+        self._cgroup: Optional[_CgroupV2] = None
+        self._pids: set[int] = set()
+        self._cpu_prev: dict[int, float] = {}
+        self._sampled_at = 0.0
+        self._usage = {r: None for r in RESOURCES}
+        self._over: set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+        for resource in RESOURCES:
+            labels = {"resource": resource}
+            REGISTRY.register_callback(
+                "conscious_resource_used",
+                "Voice pipeline usage (cpu: percent of host; memory: GB)",
+                lambda g, r=resource: g._usage[r], labels=labels, owner=self,
+            )
+            REGISTRY.register_callback(
+                "conscious_resource_limit", "Configured voice pipeline limit (0 = unlimited)",
+                lambda g, r=resource: g.limits.limit(r), labels=labels, owner=self,
+            )
+            REGISTRY.register_callback(
+                "conscious_resource_limit_ratio", "Usage as a fraction of its limit",
+                lambda g, r=resource: g._ratio(r), labels=labels, owner=self,
+            )
+
+    # ── Enforcement ──────────────────────────────────────────────
+
+    def child_env(self) -> dict:
+        """Environment for a launched server: thread counts matching the CPU budget."""
+        if not self.threads:
+            return {}
+        self.enforced["threads"] = True
+        return {var: str(self.threads) for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS")}
+
+    def govern(self, pid: int, pin: bool = True) -> None:
+        """Put a process under the budget: cgroup, then CPU affinity. Failures only warn.
+
+        Args:
+            pid: Process to govern.
+            pin: False leaves its CPU affinity alone (e.g. placed explicitly
+                by a MoshiFleet instance spec); it still counts toward usage.
+        """
+        self._pids.add(pid)
+        cgroup = self._ensure_cgroup()
+        if cgroup is not None:
+            try:
+                cgroup.add(pid)
+            except OSError as e:
+                logger.warning(f"Could not move PID {pid} into {cgroup.path}: {e}")
+        if pin and self.limits.max_cpu_percent > 0:
+            try:
+                _set_affinity(pid, self.cpus)
+                self.enforced["affinity"] = True
+            except Exception as e:
+                logger.warning(f"Could not pin PID {pid} to CPUs {self.cpus}: {e}")
+
+    def apply_in_process(self) -> None:
+        """Govern this process and cap torch threads and GPU memory. Call before loading models."""
+        self.govern(os.getpid())
+        torch = sys.modules.get("torch")
+        if torch is None:
+            return
+        if self.threads:
+            torch.set_num_threads(self.threads)
+            self.enforced["threads"] = True
+        if self.limits.max_gpu_memory_gb > 0 and torch.cuda.is_available():
+            for device in range(torch.cuda.device_count()):
+                total = torch.cuda.get_device_properties(device).total_memory
+                fraction = min(1.0, self.limits.max_gpu_memory_gb * _GB / total)
+                torch.cuda.set_per_process_memory_fraction(fraction, device)
+                logger.info(f"cuda:{device} capped at {fraction:.0%} "
+                            f"({self.limits.max_gpu_memory_gb:g}GB of {total / _GB:.1f}GB)")
+            self.enforced["gpu_fraction"] = True
+
+    def _ensure_cgroup(self) -> Optional[_CgroupV2]:
+        if not self._use_cgroup:
+            return None
+        if self._cgroup is None:
+            self._cgroup = _CgroupV2("conscious-voice", self._cgroup_parent)
+            if self._cgroup.path is not None:
+                try:
+                    self._cgroup.set_limits(self.limits.max_cpu_percent, self.limits.max_memory_gb)
+                    self.enforced["cgroup"] = True
+                    logger.info(f"cgroup limits set on {self._cgroup.path}")
+                except OSError as e:
+                    self._cgroup.error = str(e)
+                    self._cgroup.path = None
+            if self._cgroup.path is None:
+                self.cgroup_error = self._cgroup.error
+                logger.info(f"cgroup v2 limits unavailable ({self.cgroup_error}); "
+                            "using CPU affinity and sampling only")
+        return self._cgroup if self._cgroup.path is not None else None
+
+    # ── Sampling ─────────────────────────────────────────────────
+
+    def sample(self) -> dict:
+        """Measure usage of every live governed process (blocking; run in an executor)."""
+        now = time.monotonic()
+        elapsed = now - self._sampled_at if self._sampled_at else 0.0
+        cpu_delta = 0.0
+        rss = 0
+        for pid in list(self._pids):
+            seconds = _cpu_seconds(pid)
+            if seconds is None:
+                self._pids.discard(pid)
+                self._cpu_prev.pop(pid, None)
+                continue
+            prev = self._cpu_prev.get(pid)
+            if prev is not None:
+                cpu_delta += seconds - prev
+            self._cpu_prev[pid] = seconds
+            rss += _rss_bytes(pid) or 0
+        self._sampled_at = now
+
+        host_cpus = os.cpu_count() or 1
+        self._usage["cpu"] = (round(cpu_delta / elapsed / host_cpus * 100, 1)
+                              if elapsed > 0 else None)
+        self._usage["memory"] = round(rss / _GB, 3)
+        self._usage["gpu_memory"] = self._gpu_usage()
+        self._check_limits()
+        return dict(self._usage)
+
+    def _gpu_usage(self) -> Optional[float]:
+        external = [pid for pid in self._pids if pid != os.getpid()]
+        total = 0
+        known = False
+        torch = sys.modules.get("torch")
+        if os.getpid() in self._pids and torch is not None:
+            try:
+                if torch.cuda.is_initialized():
+                    total += sum(torch.cuda.memory_reserved(d)
+                                 for d in range(torch.cuda.device_count()))
+                    known = True
+            except Exception:
+                pass
+        if external:
+            by_pid = _gpu_bytes_by_pid()
+            if by_pid:
+                total += sum(by_pid.get(pid, 0) for pid in external)
+                known = True
+        return round(total / _GB, 3) if known else None
+
+    def _ratio(self, resource: str) -> Optional[float]:
+        used, limit = self._usage[resource], self.limits.limit(resource)
+        if used is None or not limit:
+            return None
+        return round(used / limit, 3)
+
+    def _check_limits(self) -> None:
+        for resource in RESOURCES:
+            ratio = self._ratio(resource)
+            if ratio is None:
+                continue
+            if ratio >= self.warn_ratio and resource not in self._over:
+                self._over.add(resource)
+                logger.warning(
+                    f"Voice pipeline {resource} at {ratio:.0%} of its limit "
+                    f"({self._usage[resource]} / {self.limits.limit(resource):g} "
+                    f"{_UNITS[resource]})"
+                )
+            elif ratio < self.warn_ratio * 0.9 and resource in self._over:
+                self._over.discard(resource)
+                logger.info(f"Voice pipeline {resource} back to {ratio:.0%} of its limit")
+
+    async def start(self) -> None:
+        """Start sampling in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample_loop(), name="resource-governor")
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _sample_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.sample)
+            except Exception as e:
+                logger.debug(f"Resource sample failed: {e}")
+            await asyncio.sleep(self.sample_interval)
+
+    def snapshot(self) -> dict:
+        """Limits, latest usage and closeness per resource, and what is enforced how."""
+        return {
+            "limits": asdict(self.limits),
+            "usage": {
+                resource: {"used": self._usage[resource], "limit": self.limits.limit(resource),
+                           "ratio": self._ratio(resource), "unit": _UNITS[resource]}
+                for resource in RESOURCES
+            },
+            "cpus": self.cpus,
+            "threads": self.threads,
+            "pids": sorted(self._pids),
+            "enforced": dict(self.enforced),
+            "cgroup": str(self._cgroup.path) if self._cgroup and self._cgroup.path else None,
+            "cgroup_error": self.cgroup_error,
+        }
@@ -0,0 +1,172 @@
+"""Queue logging — Non-blocking log handling for real-time paths.
+
+setup_logging() puts a single NonBlockingQueueHandler on the root logger and
+hands its records to a "log-writer" thread that owns the real handlers, so a
+slow handler (a file on a busy disk, a paused terminal) never stalls the
+PortAudio callbacks, the inference loop or the event loop:
+
+    - emitting a record is a put_nowait(); when the queue is full the record
+      is dropped and counted (conscious_log_records_dropped_total), and a
+      summary is logged once there is room again
+    - records are queued with msg and args unmerged, so %-style arguments are
+      formatted on the writer thread, and only for records that passed the
+      level checks. An f-string is formatted by the caller before any of
+      that, which is why hot paths log with %-style arguments
+    - HotPathWarning aggregates events that can fire every frame: the first
+      is logged at once, then one line per window ("Input status: 37 in last
+      5.0s (input overflow: 35, ...)")
+
+Usage:
+    setup_logging("INFO")                      # once, at process start
+    overflows = HotPathWarning(logger, "Input status")
+    overflows.record(str(status))              # from the audio callback
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from conscious.metrics import REGISTRY
+
+DEFAULT_FORMAT = "%(asctime)s [%(name)s] %(levelname)s: %(message)s"
+
+_DROPPED = REGISTRY.counter(
+    "conscious_log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+
+_listener: Optional["_WriterListener"] = None
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks and never formats on the calling thread."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._unreported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() merges args into msg here, on the caller's thread.
+        # The queue never leaves this process, so the record can go as is.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            _DROPPED.inc()
+            return
+        if self._unreported:
+            summary = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "%d log records dropped (log queue full)", (self._unreported,), None,
+            )
+            try:
+                self.queue.put_nowait(summary)
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+
+class _WriterListener(QueueListener):
+    """QueueListener whose thread is named, so it shows up as such in profiles."""
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._monitor, name="log-writer", daemon=True)
+        self._thread.start()
+
+
+def setup_logging(level: str = "INFO", fmt: str = DEFAULT_FORMAT, datefmt: Optional[str] = None,
+                  handlers: Optional[list[logging.Handler]] = None,
+                  queue_size: int = 10000) -> NonBlockingQueueHandler:
+    """Route all logging through a bounded queue to a writer thread.
+
+    Replaces the root logger's handlers; calling it again replaces the
+    previous queue and writer. Handlers without a formatter get fmt/datefmt.
+
+    Args:
+        level: Root log level name.
+        handlers: Where records end up (default: one stderr StreamHandler).
+        queue_size: Records held before new ones are dropped.
+
+    Returns:
+        The root queue handler (its dropped attribute counts lost records).
+    """
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(fmt, datefmt)
+    handlers = handlers or [logging.StreamHandler()]
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO)
+                  if isinstance(level, str) else level)
+
+    _listener = _WriterListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return queue_handler
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the writer thread (also runs at exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class HotPathWarning:
+    """Aggregated, rate-limited warning for an event that can repeat every frame.
+
+    record() costs a dict increment and a clock read, and logs at most once
+    per window. It is meant for a single writer thread; a flush() from
+    another thread can race with it and lose an event from the counts.
+    """
+
+    def __init__(self, log: logging.Logger, what: str, window_s: float = 5.0):
+        self.log = log
+        self.what = what
+        self.window_s = window_s
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._window_began = 0.0
+        self._next_emit = 0.0  # the first event is logged straight away
+
+    def record(self, detail: str = "") -> None:
+        now = time.monotonic()
+        if not self._counts:
+            self._window_began = now
+        self._counts[detail] = self._counts.get(detail, 0) + 1
+        self.total += 1
+        if now >= self._next_emit:
+            self.flush(now)
+
+    def flush(self, now: Optional[float] = None) -> None:
+        """Log what has been counted since the last line, if anything."""
+        now = time.monotonic() if now is None else now
+        counts, self._counts = self._counts, {}
+        self._next_emit = now + self.window_s
+        if not counts:
+            return
+        self.log.warning(
+            "%s: %d in last %.1fs (%s)", self.what, sum(counts.values()),
+            now - self._window_began,
+            ", ".join(f"{detail or 'unspecified'}: {n}" for detail, n in counts.items()),
+        )
@@ -0,0 +1,221 @@
+"""Metrics registry — Prometheus text-format counters, gauges and histograms.
+
+One process-wide REGISTRY collects metrics from the voice engine, audio
+stream, agent, server manager and API. It is exposed by MoshiAgentAPI at
+GET /metrics for a local Prometheus to scrape.
+
+Hot-path rules (the PortAudio thread must never block):
+    - No locks. Every metric has a single writer; updates are plain
+      attribute/list increments, which the GIL keeps intact. A scrape may
+      see a histogram mid-update (count one ahead of its buckets), which
+      Prometheus tolerates.
+    - Values a component already tracks are not counted twice: they are
+      registered as callbacks and read only at scrape time.
+"""
+
+import bisect
+import math
+import weakref
+from typing import Callable, Optional
+
+# Millisecond buckets suited to the 80ms frame budget
+MS_BUCKETS = (1, 2, 5, 10, 20, 40, 60, 80, 120, 160, 250, 500, 1000, 2500, 5000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict, extra: Optional[tuple] = None) -> str:
+    items = list(labels.items())
+    if extra:
+        items.append(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "NaN"
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter."""
+    __slots__ = ("value",)
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def samples(self, name: str, labels: dict) -> list[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Gauge:
+    """Value that can go up and down."""
+    __slots__ = ("value",)
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def samples(self, name: str, labels: dict) -> list[str]:
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect plus three increments."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+    kind = "histogram"
+
+    def __init__(self, buckets=MS_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self, name: str, labels: dict) -> list[str]:
+        lines = []
+        cumulative = 0
+        counts = list(self.counts)
+        for bound, n in zip(self.bounds, counts):
+            cumulative += n
+            le = _format_labels(labels, ("le", _format_value(bound)))
+            lines.append(f"{name}_bucket{le} {cumulative}")
+        cumulative += counts[-1]
+        lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class _Callback:
+    """Metric whose value is computed at scrape time."""
+    __slots__ = ("fn", "owner", "kind")
+
+    def __init__(self, fn: Callable, kind: str, owner=None):
+        self.fn = fn
+        self.kind = kind
+        self.owner = weakref.ref(owner) if owner is not None else None
+
+    def is_orphaned(self) -> bool:
+        return self.owner is not None and self.owner() is None
+
+    def value(self):
+        """Current value, or None if the owner has been garbage collected."""
+        if self.owner is None:
+            return self.fn()
+        owner = self.owner()
+        if owner is None:
+            return None
+        return self.fn(owner)
+
+    def samples(self, name: str, labels: dict) -> list[str]:
+        value = self.value()
+        if value is None:
+            return []
+        return [f"{name}{_format_labels(labels)} {_format_value(value)}"]
+
+
+class MetricsRegistry:
+    """Named metric families, each holding one child per label set.
+
+    Usage:
+        frames = REGISTRY.counter("conscious_frames_total", "Frames processed")
+        frames.inc()
+        REGISTRY.register_callback("conscious_queue_depth", "Queued frames",
+                                   lambda s: s.qsize(), owner=stream)
+        text = REGISTRY.render()
+    """
+
+    def __init__(self):
+        # name -> (kind, help, {label_key: metric})
+        self._families: dict[str, tuple[str, str, dict]] = {}
+
+    def _child(self, name: str, help: str, kind: str, labels: Optional[dict], factory):
+        labels = labels or {}
+        family = self._families.get(name)
+        if family is None:
+            family = (kind, help, {})
+            self._families[name] = family
+        elif family[0] != kind:
+            raise ValueError(f"Metric {name} already registered as {family[0]}")
+        key = tuple(sorted(labels.items()))
+        children = family[2]
+        if key not in children:
+            children[key] = factory()
+        return children[key]
+
+    def counter(self, name: str, help: str, labels: Optional[dict] = None) -> Counter:
+        return self._child(name, help, "counter", labels, Counter)
+
+    def gauge(self, name: str, help: str, labels: Optional[dict] = None) -> Gauge:
+        return self._child(name, help, "gauge", labels, Gauge)
+
+    def histogram(self, name: str, help: str, labels: Optional[dict] = None,
+                  buckets=MS_BUCKETS) -> Histogram:
+        return self._child(name, help, "histogram", labels, lambda: Histogram(buckets))
+
+    def register_callback(self, name: str, help: str, fn: Callable, kind: str = "gauge",
+                          labels: Optional[dict] = None, owner=None) -> None:
+        """Register a scrape-time value, replacing any previous one for these labels.
+
+        With an owner, fn is called as fn(owner) and only a weak reference is
+        kept, so registering never extends the owner's lifetime; the series is
+        dropped once the owner is gone. Several live owners of one family need
+        distinct labels (e.g. role or instance), or the last one takes over.
+        """
+        labels = labels or {}
+        family = self._families.get(name)
+        if family is None:
+            family = (kind, help, {})
+            self._families[name] = family
+        family[2][tuple(sorted(labels.items()))] = _Callback(fn, kind, owner)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, (kind, help, children) in sorted(self._families.items()):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in list(children.items()):
+                if isinstance(metric, _Callback) and metric.is_orphaned():
+                    children.pop(key, None)
+                    continue
+                try:
+                    lines.extend(metric.samples(name, dict(key)))
+                except Exception:
+                    # A failing callback must not break the whole scrape
+                    continue
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,134 @@
+"""Sampling profiler — Periodic stack sampling of every thread, in collapsed-stack format.
+
+Walks sys._current_frames() at a fixed rate from a background thread and
+counts identical stacks. Nothing is installed in the profiled threads (no
+sys.setprofile / settrace), so the audio and event-loop threads only pay
+for the GIL hand-offs to the sampler: a sample of ~10 threads takes ~50µs,
+i.e. ~0.5% CPU at the default 100 Hz.
+
+Output is Brendan Gregg's collapsed format, one stack per line, root first:
+
+    thread:MainThread;task:stream-writer;_writer (fanout.py:90);send_bytes (...) 42
+
+which flamegraph.pl, speedscope and inferno read directly. On the event-loop
+thread the asyncio task that was running when the sample was taken is
+inserted after the thread name.
+
+Exposed by MoshiAgentAPI at GET /api/admin/profile when enable_profiler=True.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+MAX_SECONDS = 120.0
+MAX_HZ = 1000.0
+
+
+class SamplingProfiler:
+    """Samples all thread stacks for a fixed duration.
+
+    Usage:
+        profiler = SamplingProfiler(loop=asyncio.get_running_loop())
+        stacks = await loop.run_in_executor(None, profiler.run, 10.0, 100.0)
+        text = SamplingProfiler.collapse(stacks)
+    """
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 loop_thread_id: Optional[int] = None):
+        self._loop = loop
+        self._loop_thread_id = (loop_thread_id if loop_thread_id is not None
+                                else threading.get_ident())
+        self._labels: dict = {}
+        self._running = threading.Lock()
+        self.samples = 0
+        self.sample_cost_ms = 0.0
+
+    @property
+    def busy(self) -> bool:
+        return self._running.locked()
+
+    def run(self, seconds: float, hz: float = 100.0) -> Counter:
+        """Sample for `seconds` at `hz`; blocks the calling thread.
+
+        Raises:
+            ValueError: If seconds or hz are out of range.
+            RuntimeError: If a profile is already running.
+        """
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be in (0, {MAX_SECONDS:.0f}]")
+        if not 0 < hz <= MAX_HZ:
+            raise ValueError(f"hz must be in (0, {MAX_HZ:.0f}]")
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+
+        try:
+            stacks: Counter = Counter()
+            self.samples = 0
+            cost = 0.0
+            me = threading.get_ident()
+            interval = 1.0 / hz
+            start = time.perf_counter()
+            deadline = start + seconds
+            next_tick = start
+            while True:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                self._sample(stacks, me)
+                cost += time.perf_counter() - now
+                self.samples += 1
+                # Absolute schedule: a slow sample doesn't shift the ones after it
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+            self.sample_cost_ms = cost / self.samples * 1000 if self.samples else 0.0
+            return stacks
+        finally:
+            self._running.release()
+
+    def _sample(self, stacks: Counter, skip_ident: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip_ident:
+                continue
+            path = []
+            while frame is not None:
+                path.append(self._label(frame.f_code))
+                frame = frame.f_back
+            root = [f"thread:{names.get(ident, ident)}"]
+            if ident == self._loop_thread_id:
+                task = self._current_task()
+                if task is not None:
+                    root.append(f"task:{task}")
+            path.reverse()
+            stacks[";".join(root + path)] += 1
+
+    def _current_task(self) -> Optional[str]:
+        if self._loop is None:
+            return None
+        try:
+            # Read-only lookup of the loop's running task from another thread
+            task = asyncio.current_task(self._loop)
+        except Exception:
+            return None
+        return task.get_name() if task is not None else None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    @staticmethod
+    def collapse(stacks: Counter) -> str:
+        """Collapsed-stack text, most frequent stacks first."""
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,180 @@
+"""Thread scheduling — Opt-in real-time priority and CPU pinning for latency-critical threads.
+
+Three roles matter for audio latency:
+
+    audio       the PortAudio input/output callback threads (AudioStream)
+    inference   the thread running MoshiEngine.process_frame (ConsciousServer)
+    loop        the asyncio event loop thread (MoshiAgentAPI / MoshiAgent)
+
+apply_thread_policy(role, config) is called *from* the thread in question
+and, for that thread only:
+
+    1. pins it to the role's CPUs (sched_setaffinity on the thread id on
+       Linux, SetThreadAffinityMask on Windows)
+    2. requests SCHED_FIFO at the role's priority (Linux; needs CAP_SYS_NICE
+       or an rtprio rlimit), or THREAD_PRIORITY_TIME_CRITICAL/HIGHEST on Windows
+    3. if that is refused, falls back to a negative nice value, and if that
+       is refused too, leaves the thread alone
+
+Every step degrades to a logged note; nothing here raises. Results are kept
+per thread (applied_policies()) for /api/voice/status.
+
+SCHED_FIFO threads are never preempted by normal ones, so only give it to
+threads that block between frames (callbacks, the per-frame loop). The
+event loop defaults to nice only. `conscious jitter` measures the effect
+under synthetic CPU contention.
+
+Usage:
+    config = SchedulingConfig.from_config(load_config())   # scheduling.* section
+    apply_thread_policy("inference", config)               # from the inference thread
+"""
+
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+
+from conscious.config import get_config_value
+
+logger = logging.getLogger(__name__)
+
+ROLES = ("audio", "inference", "loop")
+
+_WIN_PRIORITIES = {"time_critical": 15, "highest": 2}
+
+_applied: dict[int, dict] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class SchedulingConfig:
+    """Per-role CPUs and priorities; nothing is changed unless enabled."""
+    enabled: bool = False
+    audio_cpus: list = field(default_factory=list)  # empty = leave affinity alone
+    inference_cpus: list = field(default_factory=list)
+    loop_cpus: list = field(default_factory=list)
+    # SCHED_FIFO priority 1-99; 0 skips real-time and goes straight to nice
+    audio_priority: int = 70
+    inference_priority: int = 50
+    loop_priority: int = 0
+    fallback_nice: int = -10  # when real-time is refused (or priority is 0)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "SchedulingConfig":
+        """Read the optional scheduling.* section of a loaded config."""
+        defaults = cls()
+        return cls(**{
+            name: get_config_value(config, f"scheduling.{name}", getattr(defaults, name))
+            for name in defaults.__dataclass_fields__
+        })
+
+    def cpus(self, role: str) -> list:
+        return list(getattr(self, f"{role}_cpus"))
+
+    def priority(self, role: str) -> int:
+        return int(getattr(self, f"{role}_priority"))
+
+
+def _pin(tid: int, cpus: list) -> None:
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(tid, cpus)  # Linux: a thread id targets just that thread
+    elif sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        mask = sum(1 << cpu for cpu in cpus)
+        if not kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask):
+            raise OSError(ctypes.get_last_error(), "SetThreadAffinityMask failed")
+    else:
+        raise OSError("thread affinity is not supported on this platform")
+
+
+def _realtime(tid: int, priority: int) -> str:
+    if hasattr(os, "sched_setscheduler"):
+        priority = max(os.sched_get_priority_min(os.SCHED_FIFO),
+                       min(priority, os.sched_get_priority_max(os.SCHED_FIFO)))
+        os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(priority))
+        return f"fifo:{priority}"
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        level = "time_critical" if priority >= 50 else "highest"
+        if not kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _WIN_PRIORITIES[level]):
+            raise OSError(ctypes.get_last_error(), "SetThreadPriority failed")
+        return level
+    raise OSError("real-time scheduling is not supported on this platform")
+
+
+def _nice(tid: int, nice: int) -> str:
+    if not hasattr(os, "setpriority"):
+        raise OSError("per-thread nice is not supported on this platform")
+    os.setpriority(os.PRIO_PROCESS, tid, nice)  # Linux: per thread
+    return f"nice:{nice}"
+
+
+def apply_thread_policy(role: str, config: SchedulingConfig) -> dict:
+    """Pin and prioritise the calling thread for role; failures degrade, never raise.
+
+    Returns:
+        What was applied: role, tid, cpus, policy ("fifo:70", "nice:-10",
+        "default") and notes for each step that was refused.
+
+    Raises:
+        ValueError: If role is not one of ROLES.
+    """
+    if role not in ROLES:
+        raise ValueError(f"Unknown role {role!r}; expected one of {ROLES}")
+    tid = threading.get_native_id()
+    result = {"role": role, "tid": tid, "thread": threading.current_thread().name,
+              "cpus": None, "policy": "default", "notes": []}
+    if not config.enabled:
+        return result
+
+    cpus = config.cpus(role)
+    if cpus:
+        try:
+            _pin(tid, cpus)
+            result["cpus"] = cpus
+        except (OSError, ValueError) as e:
+            result["notes"].append(f"pin {cpus}: {e}")
+
+    steps = []
+    if config.priority(role) > 0:
+        steps.append(("realtime", lambda: _realtime(tid, config.priority(role))))
+    if config.fallback_nice:
+        steps.append(("nice", lambda: _nice(tid, config.fallback_nice)))
+    for name, step in steps:
+        try:
+            result["policy"] = step()
+            break
+        except (OSError, ValueError) as e:
+            result["notes"].append(f"{name}: {e}")
+
+    level = logging.WARNING if steps and result["policy"] == "default" else logging.INFO
+    logger.log(level, f"Scheduling {role} thread {tid}: policy={result['policy']} "
+                      f"cpus={result['cpus'] or 'unchanged'}"
+                      + (f" ({'; '.join(result['notes'])})" if result["notes"] else ""))
+    with _lock:
+        _applied[tid] = result
+    return result
+
+
+def reset_thread_policy() -> None:
+    """Return the calling thread to SCHED_OTHER / nice 0 (best effort)."""
+    tid = threading.get_native_id()
+    try:
+        if hasattr(os, "sched_setscheduler"):
+            os.sched_setscheduler(tid, os.SCHED_OTHER, os.sched_param(0))
+        if hasattr(os, "setpriority"):
+            os.setpriority(os.PRIO_PROCESS, tid, 0)
+    except OSError:
+        pass
+    with _lock:
+        _applied.pop(tid, None)
+
+
+def applied_policies() -> list[dict]:
+    """Policies applied so far, one entry per thread."""
+    with _lock:
+        return [dict(r) for r in _applied.values()]
+
@@ -16,23 +16,19 @@ import sys
 import time
 from typing import Optional
 
-import torch
-
 from conscious.config import load_config, get_config_value
-from conscious.voice.audio_stream import AudioStream, AudioStreamConfig
-from conscious.voice.moshi_engine import MoshiEngine, MoshiConfig
+from conscious.gcquiet import GC_MONITOR, GcQuiet, GcQuietConfig
+from conscious.governor import ResourceGovernor, ResourceLimits
+from conscious.logqueue import setup_logging as setup_queue_logging
+from conscious.scheduling import SchedulingConfig, apply_thread_policy
+from conscious.tracing import CAPTURE, DECODE_END, TRACER
 
 logger = logging.getLogger("conscious")
 
 
 def setup_logging(level: str = "INFO") -> None:
-    """Configure structured logging."""
-    numeric_level = getattr(logging, level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
-        datefmt="%H:%M:%S",
-    )
+    """Configure structured logging through the non-blocking log queue."""
+    setup_queue_logging(level, datefmt="%H:%M:%S")
 
 
 class ConsciousServer:
@@ -46,6 +42,11 @@ class ConsciousServer:
     """
 
     def __init__(self, config: Optional[dict] = None):
+        # torch, moshi and sounddevice load here rather than at module import,
+        # so importing conscious.server (e.g. from the CLI) stays cheap
+        from conscious.voice.audio_stream import AudioStream, AudioStreamConfig
+        from conscious.voice.moshi_engine import MoshiConfig, MoshiEngine
+
         self._config = config or load_config()
         self._running = False
 
@@ -55,10 +56,13 @@ class ConsciousServer:
             temp=0.8,
             temp_text=0.7,
         )
-        audio_cfg = AudioStreamConfig()
+        self._scheduling = SchedulingConfig.from_config(self._config)
+        audio_cfg = AudioStreamConfig(scheduling=self._scheduling)
 
         self._engine = MoshiEngine(moshi_cfg)
         self._audio = AudioStream(audio_cfg)
+        self._governor = ResourceGovernor(ResourceLimits.from_config(self._config))
+        self._gc_quiet = GcQuiet(GcQuietConfig.from_config(self._config))
 
     def start(self) -> None:
         """Initialize models and start the conversation loop."""
@@ -66,9 +70,13 @@ class ConsciousServer:
         logger.info("CONSCIOUS — Starting Voice Companion")
         logger.info("=" * 60)
 
+        # CPU set, thread count and GPU memory cap must be in place before the models load
+        self._governor.apply_in_process()
+
         # Load models
         logger.info("Loading models...")
         self._engine.load_models()
+        self._gc_quiet.after_load()
 
         # Start audio streams
         logger.info("Starting audio streams...")
@@ -103,6 +111,8 @@ class ConsciousServer:
         audio_stats = self._audio.get_stats()
         logger.info(f"Engine stats: {engine_stats}")
         logger.info(f"Audio stats: {audio_stats}")
+        logger.info(f"Resource usage: {self._governor.snapshot()['usage']}")
+        logger.info(f"GC: {self._gc_quiet.get_stats(recent=0)}")
         logger.info("Conscious has stopped.")
 
     def _conversation_loop(self) -> None:
@@ -112,24 +122,57 @@ class ConsciousServer:
         Runs until interrupted or stop() is called.
         """
         logger.info("Entering conversation loop (Ctrl+C to exit)")
+        # This thread runs inference for every frame
+        apply_thread_policy("inference", self._scheduling)
+
+        audio_config = self._audio.config
+        frame_budget_ms = audio_config.frame_size / audio_config.sample_rate * 1000
+        next_sample = time.monotonic()
 
-        with self._engine.streaming():
+        with self._engine.streaming(), self._gc_quiet.streaming():
             while self._running:
                 # Get next mic frame (blocks up to 200ms)
                 frame = self._audio.get_input_frame(timeout=0.2)
                 if frame is None:
+                    # No input for 200ms (mic closed or stalled): nothing to keep up with
+                    self._gc_quiet.idle(full=True)
                     continue
+                frame_began = time.perf_counter()
+
+                # A few /proc reads every sample_interval; warns when near a limit
+                if time.monotonic() >= next_sample:
+                    self._governor.sample()
+                    next_sample = time.monotonic() + self._governor.sample_interval
+
+                trace_id = self._audio.last_trace_id
+                GC_MONITOR.frame_begin(trace_id)
+                self._gc_quiet.tick()
 
                 # Process through Moshi: encode -> LM -> decode
                 try:
-                    output = self._engine.process_frame(frame)
+                    output = self._engine.process_frame(frame, trace_id)
                 except Exception as e:
                     logger.error(f"Engine error: {e}")
+                    GC_MONITOR.frame_end()
                     continue
 
+                # Capture to decoded output must fit in one frame budget
+                TRACER.check_deadline(trace_id, CAPTURE, DECODE_END, frame_budget_ms)
+
                 # Queue output for playback
                 if output is not None:
-                    self._audio.put_output_frame(output)
+                    self._audio.put_output_frame(output, trace_id)
+                GC_MONITOR.frame_end()
+
+                # Text tokens mean the reply is still going; a gap in them is the
+                # turn boundary where GC-quiet runs its full collection
+                token = self._engine.last_text_token
+                if token is not None and self._engine.decode_text_token(token) is not None:
+                    self._gc_quiet.note_text()
+
+                # Collect what is due in the time left before the next frame
+                slack_ms = frame_budget_ms - (time.perf_counter() - frame_began) * 1000
+                self._gc_quiet.idle(slack_ms)
 
         logger.info("Conversation loop ended")
 
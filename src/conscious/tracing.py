@@ -0,0 +1,242 @@
+"""Frame tracing — Per-frame stage timestamps exported as Chrome/Perfetto trace JSON.
+
+Every 80ms frame gets a trace ID when it enters the pipeline, and each stage
+stamps a perf_counter_ns timestamp into a fixed-size ring:
+
+    Engine path (ConsciousServer):
+        capture -> dequeue -> encode -> lm_step -> decode -> output_queued -> playout
+        (AudioStream._input_callback ... MoshiEngine.process_frame ... _output_callback)
+
+    Agent path (MoshiAgent):
+        submit -> agent_dequeue -> opus_encoded -> ws_sent -> ws_received
+               -> opus_decoded -> delivered
+        (send_audio ... _send_loop ... _receive_loop)
+
+    Server replies are not tagged with the frame that caused them, so the
+    first packet received after a send is attributed to the last sent frame.
+
+Recording is lock-free: IDs come from itertools.count (atomic under the GIL),
+each stage column has a single writer thread, and a slot is reused once the
+ring wraps. Dumps are built from a snapshot, so readers never block writers.
+
+The ring can be dumped on demand (GET /api/voice/trace) and is dumped
+automatically to ~/.conscious/traces when a frame misses its deadline
+(rate limited; only the newest max_dump_files automatic dumps are kept).
+Open the JSON in chrome://tracing or ui.perfetto.dev.
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Stage columns
+CAPTURE = 0
+DEQUEUE = 1
+ENCODE_START = 2
+LM_START = 3
+DECODE_START = 4
+DECODE_END = 5
+OUTPUT_QUEUED = 6
+PLAYOUT = 7
+SUBMIT = 8
+AGENT_DEQUEUE = 9
+OPUS_ENCODED = 10
+WS_SENT = 11
+WS_RECEIVED = 12
+OPUS_DECODED = 13
+DELIVERED = 14
+NUM_STAGES = 15
+
+# (segment name, start stage, end stage, process, lane)
+SEGMENTS = (
+    ("input_queue", CAPTURE, DEQUEUE, "engine", 1),
+    ("encode", ENCODE_START, LM_START, "engine", 2),
+    ("lm_step", LM_START, DECODE_START, "engine", 2),
+    ("decode", DECODE_START, DECODE_END, "engine", 2),
+    ("output_queue", OUTPUT_QUEUED, PLAYOUT, "engine", 3),
+    ("coalesce", SUBMIT, AGENT_DEQUEUE, "agent", 1),
+    ("opus_encode", AGENT_DEQUEUE, OPUS_ENCODED, "agent", 2),
+    ("ws_send", OPUS_ENCODED, WS_SENT, "agent", 2),
+    ("server", WS_SENT, WS_RECEIVED, "agent", 3),
+    ("receive", WS_RECEIVED, DELIVERED, "agent", 4),
+    ("opus_decode", WS_RECEIVED, OPUS_DECODED, "agent", 4),
+)
+_PIDS = {"engine": 1, "agent": 2}
+_LANES = {
+    "engine": {1: "input queue", 2: "inference", 3: "output queue"},
+    "agent": {1: "coalescer", 2: "send", 3: "moshi server", 4: "receive"},
+}
+
+DEFAULT_TRACE_DIR = Path(os.path.expanduser("~/.conscious/traces"))
+
+NO_TRACE = -1
+
+
+class FrameTracer:
+    """Lock-free ring of per-frame stage timestamps.
+
+    Usage:
+        tid = TRACER.begin()
+        TRACER.mark(tid, CAPTURE)
+        ...
+        TRACER.check_deadline(tid, CAPTURE, DECODE_END, 80.0)
+        trace = TRACER.to_chrome_trace()
+    """
+
+    def __init__(self, capacity: int = 4096, trace_dir: Path = DEFAULT_TRACE_DIR,
+                 auto_dump_interval: float = 60.0, max_dump_files: int = 20):
+        self.capacity = capacity
+        self.trace_dir = Path(trace_dir)
+        self.auto_dump_interval = auto_dump_interval
+        self.max_dump_files = max_dump_files  # trace-*.json kept in trace_dir; 0 = unlimited
+        self.enabled = True
+        self._ids = [NO_TRACE] * capacity
+        self._ts = [[0] * NUM_STAGES for _ in range(capacity)]
+        self._counter = itertools.count()
+        self._deadline_misses = 0
+        self._last_auto_dump = 0.0
+        self._dumping = False
+        self.last_dump_path: Optional[Path] = None
+
+    @property
+    def deadline_misses(self) -> int:
+        return self._deadline_misses
+
+    def begin(self) -> int:
+        """Allocate a trace ID and clear its slot."""
+        if not self.enabled:
+            return NO_TRACE
+        tid = next(self._counter)
+        slot = tid % self.capacity
+        self._ts[slot] = [0] * NUM_STAGES
+        self._ids[slot] = tid
+        return tid
+
+    def mark(self, tid: int, stage: int, t_ns: Optional[int] = None) -> None:
+        """Stamp a stage (now, or at a perf_counter_ns value already taken)."""
+        if tid < 0:
+            return
+        slot = tid % self.capacity
+        if self._ids[slot] == tid:
+            self._ts[slot][stage] = time.perf_counter_ns() if t_ns is None else t_ns
+
+    def mark_once(self, tid: int, stage: int) -> None:
+        """Stamp a stage only if it has not been stamped yet."""
+        if tid < 0:
+            return
+        slot = tid % self.capacity
+        if self._ids[slot] == tid and not self._ts[slot][stage]:
+            self._ts[slot][stage] = time.perf_counter_ns()
+
+    def check_deadline(self, tid: int, start: int, end: int, deadline_ms: float) -> bool:
+        """Flag a deadline miss between two stamped stages; may trigger an auto-dump."""
+        if tid < 0:
+            return False
+        slot = tid % self.capacity
+        if self._ids[slot] != tid:
+            return False
+        row = self._ts[slot]
+        if not row[start] or not row[end]:
+            return False
+        if (row[end] - row[start]) / 1e6 <= deadline_ms:
+            return False
+        self._deadline_misses += 1
+        self._maybe_auto_dump(f"frame {tid} missed {deadline_ms:.0f}ms deadline")
+        return True
+
+    # ── Export ────────────────────────────────────────────────
+
+    def snapshot(self, seconds: Optional[float] = None) -> list[tuple[int, list[int]]]:
+        """Copy of (trace_id, timestamps) rows, oldest first."""
+        rows = [(tid, list(ts)) for tid, ts in zip(list(self._ids), list(self._ts)) if tid >= 0]
+        rows.sort(key=lambda r: r[0])
+        if seconds is not None:
+            cutoff = time.perf_counter_ns() - int(seconds * 1e9)
+            rows = [r for r in rows if max(r[1]) >= cutoff]
+        return rows
+
+    def to_chrome_trace(self, seconds: Optional[float] = None) -> dict:
+        """Chrome trace event format (complete "X" events, one per stage segment)."""
+        rows = self.snapshot(seconds)
+        stamped = [t for _, ts in rows for t in ts if t]
+        origin = min(stamped) if stamped else 0
+
+        events = []
+        for process, pid in _PIDS.items():
+            events.append({"ph": "M", "name": "process_name", "pid": pid,
+                           "args": {"name": f"conscious {process}"}})
+            for lane, label in _LANES[process].items():
+                events.append({"ph": "M", "name": "thread_name", "pid": pid, "tid": lane,
+                               "args": {"name": label}})
+
+        for tid, ts in rows:
+            for name, start, end, process, lane in SEGMENTS:
+                if ts[start] and ts[end] and ts[end] >= ts[start]:
+                    events.append({
+                        "ph": "X",
+                        "name": name,
+                        "cat": process,
+                        "pid": _PIDS[process],
+                        "tid": lane,
+                        "ts": (ts[start] - origin) / 1000,
+                        "dur": (ts[end] - ts[start]) / 1000,
+                        "args": {"trace_id": tid},
+                    })
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"frames": len(rows), "deadline_misses": self._deadline_misses},
+        }
+
+    def dump(self, path: Optional[Path] = None, seconds: Optional[float] = None) -> Path:
+        """Write the ring as a Chrome trace JSON file and return its path."""
+        if path is None:
+            self.trace_dir.mkdir(parents=True, exist_ok=True)
+            path = self.trace_dir / f"trace-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(seconds), f)
+        self.last_dump_path = path
+        return path
+
+    def _maybe_auto_dump(self, reason: str) -> None:
+        now = time.monotonic()
+        if self._dumping or now - self._last_auto_dump < self.auto_dump_interval:
+            return
+        self._last_auto_dump = now
+        self._dumping = True
+        # Serialising the ring takes milliseconds: never on the caller's thread
+        threading.Thread(target=self._auto_dump, args=(reason,), daemon=True,
+                         name="trace-dump").start()
+
+    def _auto_dump(self, reason: str) -> None:
+        try:
+            path = self.dump()
+            logger.warning(f"Frame trace dumped to {path} ({reason})")
+            self._prune()
+        except Exception as e:
+            logger.error(f"Trace dump failed: {e}")
+        finally:
+            self._dumping = False
+
+    def _prune(self) -> None:
+        """Delete the oldest trace-*.json in trace_dir beyond max_dump_files."""
+        if self.max_dump_files <= 0:
+            return
+        # Names embed the timestamp, so name order is age order
+        dumps = sorted(self.trace_dir.glob("trace-*.json"))
+        for old in dumps[:-self.max_dump_files]:
+            try:
+                old.unlink()
+            except OSError as e:
+                logger.warning(f"Could not remove old trace {old}: {e}")
+
+
+TRACER = FrameTracer()
@@ -4,16 +4,48 @@ Components:
     MoshiEngine         — Direct model wrapper (in-process inference)
     MoshiAgent          — Autonomous WebSocket client to Moshi server
     MoshiServerManager  — Server lifecycle management (start/stop/health/restart)
+    MoshiFleet          — Several MoshiServerManagers with staggered loads and a capacity view
     MoshiAgentAPI       — HTTP/WS API for Super-Goose integration
     AudioStream         — System audio I/O via sounddevice (legacy)
+
+The exported classes are resolved on first access (module __getattr__), so
+importing a single submodule such as conscious.voice.framing does not pull
+in aiohttp, sphn and the rest of the agent stack.
 """
 
-from .moshi_agent import MoshiAgent, AgentConfig, AgentState
-from .server_manager import MoshiServerManager, ServerManagerConfig, ServerStatus
-from .agent_api import MoshiAgentAPI
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .agent_api import MoshiAgentAPI
+    from .fleet import FleetConfig, InstanceSpec, MoshiFleet
+    from .moshi_agent import AgentConfig, AgentState, MoshiAgent
+    from .server_manager import MoshiServerManager, ServerManagerConfig, ServerStatus
+
+_EXPORTS = {
+    "MoshiAgent": "moshi_agent", "AgentConfig": "moshi_agent", "AgentState": "moshi_agent",
+    "MoshiServerManager": "server_manager", "ServerManagerConfig": "server_manager",
+    "ServerStatus": "server_manager",
+    "MoshiFleet": "fleet", "FleetConfig": "fleet", "InstanceSpec": "fleet",
+    "MoshiAgentAPI": "agent_api",
+}
 
 __all__ = [
     "MoshiAgent", "AgentConfig", "AgentState",
     "MoshiServerManager", "ServerManagerConfig", "ServerStatus",
+    "MoshiFleet", "FleetConfig", "InstanceSpec",
     "MoshiAgentAPI",
 ]
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -6,14 +6,24 @@ top-level orchestrator that ties together MoshiServerManager and MoshiAgent.
 
 Endpoints:
     GET  /api/voice/status     — Agent and server status
-    GET  /api/voice/stats      — Runtime statistics
+    GET  /api/voice/stats      — Time-series metrics (?resolution=1s|1m|1h&since=&limit=&fields=)
+    GET  /metrics              — Prometheus text-format metrics (engine, audio, agent, server)
+    GET  /api/voice/trace      — Chrome/Perfetto trace of recent frames (?seconds=&save=1)
+    GET  /api/admin/profile    — Sampling profile, collapsed stacks (?seconds=&hz=; opt-in)
+    GET  /api/admin/server-log — Recent Moshi server output and log stats (?lines=)
     POST /api/voice/connect    — Connect agent to Moshi server
     POST /api/voice/disconnect — Disconnect agent
     POST /api/voice/reconnect  — Force reconnect (reset KV cache)
-    POST /api/voice/audio      — Send PCM audio (base64 encoded)
-    WS   /api/voice/stream     — Bidirectional audio streaming
+    POST /api/voice/audio      — Send audio (base64 JSON, or streamed raw f32/s16/Opus body)
+    WS   /api/voice/stream     — Bidirectional audio streaming (JSON or binary framing)
     POST /api/voice/start      — Start server + connect agent
     POST /api/voice/stop       — Stop everything
+    POST /api/jobs             — Queue a recorded clip (?priority=high|normal|low; see jobs.py)
+    GET  /api/jobs             — Jobs and queue stats
+    GET  /api/jobs/{id}        — Job status
+    GET  /api/jobs/{id}/audio  — Response audio (WAV) of a finished job
+    GET  /api/jobs/{id}/tokens — Timestamped text tokens (JSONL) of a finished job
+    DELETE /api/jobs/{id}      — Cancel a job and delete its files
 
 Architecture:
     Super-Goose -> AgentAPI -> MoshiAgent -> [WebSocket] -> MoshiServer
@@ -24,7 +34,9 @@ import asyncio
 import base64
 import json
 import logging
+import math
 import time
+from contextlib import ExitStack
 from dataclasses import asdict
 from typing import Optional
 
@@ -35,8 +47,30 @@ try:
 except ImportError:
     web = None
 
-from .moshi_agent import MoshiAgent, AgentConfig, AgentState
+from conscious.config import load_config
+from conscious.gcquiet import GcQuiet, GcQuietConfig
+from conscious.governor import ResourceGovernor, ResourceLimits
+from conscious.logqueue import setup_logging
+from conscious.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from conscious.metrics import REGISTRY
+from conscious.profiler import SamplingProfiler
+from conscious.scheduling import SchedulingConfig, applied_policies, apply_thread_policy
+from conscious.tracing import TRACER
+
+from .fanout import FanoutConfig, StreamFanout
+from .framing import FramePacer, PcmFramer, StreamDecoder, encoding_from_request
+from .jobs import CANCELLED, DONE, AgentJobRunner, JobQueue, JobQueueConfig, input_suffix
+from .moshi_agent import AgentConfig, AgentState, MoshiAgent
 from .server_manager import MoshiServerManager, ServerManagerConfig, ServerStatus
+from .stream_protocol import (
+    DEFAULT_FORMAT,
+    FRAME_AUDIO,
+    StreamEncoder,
+    StreamFormat,
+    is_passthrough,
+    pack_frame,
+)
+from .timeseries import LatencyWindow, MetricsTimeSeries
 
 logger = logging.getLogger(__name__)
 
@@ -62,25 +96,69 @@ class MoshiAgentAPI:
         server_config: Optional[ServerManagerConfig] = None,
         agent_config: Optional[AgentConfig] = None,
         api_port: int = 8999,
+        fanout_config: Optional[FanoutConfig] = None,
+        enable_profiler: bool = False,
+        job_config: Optional[JobQueueConfig] = None,
+        job_runner=None,
+        resource_limits: Optional[ResourceLimits] = None,
+        scheduling: Optional[SchedulingConfig] = None,
+        gc_quiet: Optional[GcQuietConfig] = None,
     ):
         if web is None:
             raise ImportError("aiohttp is required: pip install aiohttp")
 
         self.api_port = api_port
+        # resources.* budget applied to the managed server (and its standby)
+        self.governor = ResourceGovernor(resource_limits) if resource_limits else None
+        # Opt-in pinning / priority for the event loop thread, applied at app startup
+        self.scheduling = scheduling
+        # GC-quiet mode: heap frozen at startup, collections deferred while streaming
+        # and run from the once-a-second metrics tick instead
+        self.gc_quiet = GcQuiet(gc_quiet)
+        self._gc_streaming: Optional[ExitStack] = None
         self.server_manager = MoshiServerManager(
             config=server_config,
             on_status_change=self._on_server_status_change,
+            is_busy=self._live_server_busy,
+            governor=self.governor,
         )
+        # Audio callbacks are attached per subscription (see _update_subscriptions)
+        # so the agent only decodes Opus when a PCM client is listening.
         self.agent = MoshiAgent(config=agent_config)
-        self.agent.on_audio_received = self._on_audio_received
         self.agent.on_text_received = self._on_text_received
         self.agent.on_state_change = self._on_agent_state_change
+        self.agent.on_latency_sample = self._on_latency_sample
+        self._failover_pending_at = 0.0
 
-        # WebSocket clients subscribed to audio/text streams
-        self._stream_clients: list[web.WebSocketResponse] = []
+        # WebSocket clients subscribed to audio/text streams, each with its
+        # negotiated output format and bounded outbound queue
+        self._stream_clients = StreamFanout(fanout_config)
+        self._stream_encoder = StreamEncoder()
         self._text_buffer: list[str] = []
         self._text_buffer_max = 200
 
+        # Per-second metrics history served by /api/voice/stats
+        self.metrics = MetricsTimeSeries()
+        self._latency_window = LatencyWindow()
+        self._metrics_task: Optional[asyncio.Task] = None
+        self._register_metrics()
+
+        # Opt-in: /api/admin/profile is only routed when enabled
+        self.enable_profiler = enable_profiler
+        self._profiler: Optional[SamplingProfiler] = None
+
+        # Recorded-clip jobs. Without a dedicated runner or job server they
+        # share the live Moshi server, so they only run while it is ready and
+        # the live agent is disconnected, and a live connect preempts them.
+        job_config = job_config or JobQueueConfig()
+        self._jobs_share_server = job_runner is None and job_config.server_ws_url is None
+        if job_runner is None:
+            job_runner = AgentJobRunner(job_config.server_ws_url or self.agent.config.server_ws_url)
+        self.jobs = JobQueue(
+            job_runner, job_config,
+            can_run=self._live_server_idle if self._jobs_share_server else None,
+        )
+
     async def start_all(self, wait_ready: bool = True) -> bool:
         """Start the Moshi server and connect the agent.
 
@@ -104,7 +182,7 @@ class MoshiAgentAPI:
 
         # Connect agent
         await asyncio.sleep(1)  # brief pause after server ready
-        success = await self.agent.connect()
+        success = await self._connect_agent()
         if not success:
             logger.error("Agent failed to connect to server")
             return False
@@ -112,6 +190,23 @@ class MoshiAgentAPI:
         logger.info("Full agentic stack is running")
         return True
 
+    async def _connect_agent(self) -> bool:
+        """Connect the live agent, first taking the server back from any running jobs."""
+        if not self._jobs_share_server:
+            return await self.agent.connect()
+        async with self.jobs.held():
+            return await self.agent.connect()
+
+    def _live_server_idle(self) -> bool:
+        """Job gate when jobs share the live server: ready, and no live session on it."""
+        return (self.server_manager.is_ready
+                and self.agent.state in (AgentState.DISCONNECTED, AgentState.ERROR))
+
+    def _live_server_busy(self) -> bool:
+        """Whether the live server is serving a session, so deep health probes must wait."""
+        return (self.agent.is_connected
+                or (self._jobs_share_server and self.jobs.get_stats()["running"] > 0))
+
     async def stop_all(self) -> None:
         """Stop the agent and server."""
         logger.info("Stopping full Moshi agentic stack...")
@@ -126,10 +221,18 @@ class MoshiAgentAPI:
                 "status": self.server_manager.status.value,
                 "url": self.server_manager.url,
                 "ws_url": self.server_manager.ws_url,
+                "startup_phases_ms": self.server_manager.startup_phases,
+                "health": self.server_manager.last_health,
+                "standby": self.server_manager.standby_status,
+                "last_failover": self.server_manager.last_failover,
+                "logs": self.server_manager.log_stats,
+                "resources": self.governor.snapshot() if self.governor else None,
             },
             "agent": {
                 "state": self.agent.state.value,
                 "is_connected": self.agent.is_connected,
+                "scheduling": applied_policies(),
+                "gc": self.gc_quiet.get_stats(recent=0),
                 "stats": {
                     "total_audio_sent": self.agent.stats.total_audio_sent,
                     "total_audio_received": self.agent.stats.total_audio_received,
@@ -138,17 +241,151 @@ class MoshiAgentAPI:
                     "current_latency_ms": round(self.agent.stats.current_latency_ms, 1),
                     "avg_latency_ms": round(self.agent.stats.avg_latency_ms, 1),
                 },
+                "input_framing": self.agent.get_coalescer_stats(),
             },
+            "stream": self._stream_clients.get_stats(),
+            "jobs": self.jobs.get_stats(),
             "recent_text": self._text_buffer[-20:],
         }
 
+    def _register_metrics(self) -> None:
+        """Export stream fan-out and input framing state at scrape time."""
+        def stream(key):
+            return lambda api: api._stream_clients.get_stats()[key]
+
+        def framing(key):
+            return lambda api: (api.agent.get_coalescer_stats() or {}).get(key, 0)
+
+        for name, help, kind, fn in (
+            ("conscious_api_stream_clients", "Connected /api/voice/stream clients",
+             "gauge", stream("clients")),
+            ("conscious_api_stream_queued", "Messages queued for stream clients",
+             "gauge", stream("queued")),
+            ("conscious_api_stream_sent_total", "Messages delivered to stream clients",
+             "counter", stream("sent")),
+            ("conscious_api_stream_dropped_total", "Messages dropped for slow stream clients",
+             "counter", stream("dropped")),
+            ("conscious_api_stream_laggards_total", "Slow stream clients disconnected",
+             "counter", stream("laggards_disconnected")),
+            ("conscious_api_stream_write_failures_total", "Stream clients cut off by a failed send",
+             "counter", stream("write_failures")),
+            ("conscious_agent_input_pending_frames", "Coalesced input frames awaiting send",
+             "gauge", framing("pending_frames")),
+        ):
+            REGISTRY.register_callback(name, help, fn, kind=kind, owner=self)
+        REGISTRY.register_callback(
+            "conscious_trace_deadline_misses_total", "Traced frames that missed their deadline",
+            lambda: TRACER.deadline_misses, kind="counter",
+        )
+
     # ── HTTP Route Handlers ──────────────────────────────────────
 
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Prometheus scrape endpoint."""
+        return web.Response(
+            body=REGISTRY.render().encode("utf-8"),
+            headers={"Content-Type": METRICS_CONTENT_TYPE},
+        )
+
     async def handle_status(self, request: web.Request) -> web.Response:
         return web.json_response(self.get_status())
 
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        """Serve a range of the metrics time series.
+
+        Query params: resolution (1s|1m|1h), since/until (unix seconds),
+        limit (rows), fields (comma-separated).
+        """
+        query = request.query
+        try:
+            since = float(query["since"]) if "since" in query else None
+            until = float(query["until"]) if "until" in query else None
+            limit = int(query["limit"]) if "limit" in query else None
+            fields = query["fields"].split(",") if query.get("fields") else None
+            data = self.metrics.query(
+                query.get("resolution", "1s"), since=since, until=until, limit=limit, fields=fields
+            )
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        return web.json_response(data)
+
+    async def handle_trace(self, request: web.Request) -> web.Response:
+        """Dump the frame trace ring as Chrome trace JSON.
+
+        Query params: seconds (only frames active in the last N seconds),
+        save=1 (also write it to the trace directory and return the path).
+        """
+        try:
+            seconds = float(request.query["seconds"]) if "seconds" in request.query else None
+        except ValueError:
+            return web.json_response({"error": "seconds must be a number"}, status=400)
+
+        loop = asyncio.get_running_loop()
+        if request.query.get("save") in ("1", "true"):
+            path = await loop.run_in_executor(None, lambda: TRACER.dump(seconds=seconds))
+            return web.json_response({"path": str(path), "deadline_misses": TRACER.deadline_misses})
+
+        # Serialising thousands of frames off the event loop keeps streaming smooth
+        body = await loop.run_in_executor(
+            None, lambda: json.dumps(TRACER.to_chrome_trace(seconds)).encode("utf-8")
+        )
+        return web.Response(
+            body=body,
+            content_type="application/json",
+            headers={"Content-Disposition": 'attachment; filename="conscious-trace.json"'},
+        )
+
+    async def handle_profile(self, request: web.Request) -> web.Response:
+        """Sample every thread's stack for N seconds; returns collapsed stacks.
+
+        Query params: seconds (default 10), hz (default 100). Pipe the body
+        into flamegraph.pl or load it in speedscope.
+        """
+        try:
+            seconds = float(request.query.get("seconds", 10))
+            hz = float(request.query.get("hz", 100))
+        except ValueError:
+            return web.json_response({"error": "seconds and hz must be numbers"}, status=400)
+
+        loop = asyncio.get_running_loop()
+        if self._profiler is None:
+            self._profiler = SamplingProfiler(loop=loop)
+        profiler = self._profiler
+        if profiler.busy:
+            return web.json_response({"error": "A profile is already running"}, status=409)
+
+        try:
+            stacks = await loop.run_in_executor(None, profiler.run, seconds, hz)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=409)
+
+        logger.info(
+            f"Profiled {seconds:.0f}s at {hz:.0f}Hz: {profiler.samples} samples, "
+            f"{profiler.sample_cost_ms:.3f}ms/sample"
+        )
+        return web.Response(
+            text=SamplingProfiler.collapse(stacks),
+            headers={
+                "X-Profile-Samples": str(profiler.samples),
+                "X-Profile-Sample-Cost-Ms": f"{profiler.sample_cost_ms:.3f}",
+            },
+        )
+
+    async def handle_server_log(self, request: web.Request) -> web.Response:
+        """Most recent server output lines, including ones the rate limit didn't forward."""
+        try:
+            lines = int(request.query.get("lines", 100))
+        except ValueError:
+            return web.json_response({"error": "lines must be an integer"}, status=400)
+        return web.json_response({
+            "lines": self.server_manager.recent_output(lines),
+            "stats": self.server_manager.log_stats,
+        })
+
     async def handle_connect(self, request: web.Request) -> web.Response:
-        success = await self.agent.connect()
+        success = await self._connect_agent()
         return web.json_response({"success": success, "state": self.agent.state.value})
 
     async def handle_disconnect(self, request: web.Request) -> web.Response:
@@ -159,11 +396,20 @@ class MoshiAgentAPI:
         """Force reconnect to reset KV cache and restore low latency."""
         await self.agent.disconnect()
         await asyncio.sleep(0.5)
-        success = await self.agent.connect()
+        success = await self._connect_agent()
         return web.json_response({"success": success, "state": self.agent.state.value})
 
     async def handle_send_audio(self, request: web.Request) -> web.Response:
-        """Receive base64-encoded PCM audio and send to Moshi."""
+        """Receive audio and send to Moshi.
+
+        JSON body: {"audio": "<base64 float32 PCM>"} — decoded in one go.
+        Any other body is streamed: raw f32 (default), s16 or Ogg Opus
+        (?encoding=f32|s16|opus, or Content-Type audio/ogg), read
+        incrementally and paced into the agent as 80ms frames.
+        """
+        if request.content_type != "application/json":
+            return await self._stream_send_audio(request)
+
         try:
             data = await request.json()
             pcm_b64 = data.get("audio")
@@ -172,7 +418,13 @@ class MoshiAgentAPI:
 
             pcm_bytes = base64.b64decode(pcm_b64)
             pcm = np.frombuffer(pcm_bytes, dtype=np.float32)
-            await self.agent.send_audio(pcm)
+            samples_sent = await self.agent.send_audio(pcm)
+            if samples_sent < len(pcm):
+                return web.json_response({
+                    "error": "Agent is not streaming; audio was not fully sent",
+                    "samples_sent": samples_sent,
+                    "samples_dropped": len(pcm) - samples_sent,
+                }, status=503)
 
             return web.json_response({
                 "success": True,
@@ -182,6 +434,143 @@ class MoshiAgentAPI:
         except Exception as e:
             return web.json_response({"error": str(e)}, status=500)
 
+    async def _stream_send_audio(self, request: web.Request) -> web.Response:
+        """Stream a raw audio body into the agent with constant memory.
+
+        Each 80ms frame is forwarded as soon as it is complete and no faster
+        than real time, so reading the body is throttled by the pacing and
+        long clips never sit in memory.
+        """
+        try:
+            encoding = encoding_from_request(request.content_type, request.query.get("encoding"))
+            decoder = StreamDecoder(encoding, SAMPLE_RATE)
+        except (ValueError, ImportError) as e:
+            return web.json_response({"error": str(e)}, status=400)
+
+        framer = PcmFramer()
+        pacer = FramePacer()
+        samples_sent = 0
+        frames_sent = 0
+        try:
+            async for chunk in request.content.iter_chunked(decoder.bytes_per_frame):
+                for frame in framer.push(decoder.decode(chunk)):
+                    await pacer.wait()
+                    accepted = await self.agent.send_audio(frame)
+                    samples_sent += accepted
+                    if accepted < len(frame):
+                        return self._audio_not_sent(samples_sent)
+                    frames_sent += 1
+
+            tail = framer.flush()
+            if tail is not None:
+                await pacer.wait()
+                accepted = await self.agent.send_audio(tail)
+                samples_sent += accepted
+                if accepted < len(tail):
+                    return self._audio_not_sent(samples_sent)
+                frames_sent += 1
+        except Exception as e:
+            return web.json_response({"error": str(e), "samples_sent": samples_sent}, status=500)
+
+        return web.json_response({
+            "success": True,
+            "encoding": encoding.value,
+            "samples_sent": samples_sent,
+            "frames_sent": frames_sent,
+            "duration_ms": samples_sent / SAMPLE_RATE * 1000,
+        })
+
+    @staticmethod
+    def _audio_not_sent(samples_sent: int) -> web.Response:
+        return web.json_response({
+            "error": "Agent is not streaming; audio was not fully sent",
+            "samples_sent": samples_sent,
+        }, status=503)
+
+    async def handle_job_submit(self, request: web.Request) -> web.Response:
+        """Queue a recorded clip for processing; returns 202 with the job.
+
+        Body: the clip, streamed to disk. WAV (Content-Type audio/wav), Ogg
+        Opus (audio/ogg) or raw 24kHz mono f32/s16 PCM (?format=f32|s16).
+        Query: priority=high|normal|low (default normal).
+        """
+        try:
+            suffix = input_suffix(request.content_type, request.query.get("format"))
+            job = self.jobs.create_job(request.query.get("priority", "normal"), suffix)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=429)
+
+        limit = int(self.jobs.config.max_input_mb * 1024 * 1024)
+        size = 0
+        try:
+            with open(job.input_path, "wb") as f:
+                async for chunk in request.content.iter_chunked(64 * 1024):
+                    size += len(chunk)
+                    if size > limit:
+                        self.jobs.discard(job)
+                        return web.json_response(
+                            {"error": f"Clip exceeds {self.jobs.config.max_input_mb:.0f} MB"},
+                            status=413,
+                        )
+                    f.write(chunk)
+        except Exception as e:
+            # A DELETE mid-upload may remove the directory under the writer
+            if job.status == CANCELLED:
+                return web.json_response({"error": "Job was cancelled during upload"}, status=409)
+            self.jobs.discard(job)
+            return web.json_response({"error": str(e)}, status=500)
+        if job.status == CANCELLED:
+            return web.json_response({"error": "Job was cancelled during upload"}, status=409)
+        if size == 0:
+            self.jobs.discard(job)
+            return web.json_response({"error": "Empty body"}, status=400)
+
+        try:
+            position = self.jobs.enqueue(job)
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=409)
+        return web.json_response({**job.to_dict(), "position": position}, status=202)
+
+    async def handle_job_list(self, request: web.Request) -> web.Response:
+        jobs = sorted(self.jobs.jobs(), key=lambda job: job.submitted, reverse=True)
+        return web.json_response({
+            "jobs": [job.to_dict() for job in jobs],
+            "stats": self.jobs.get_stats(),
+        })
+
+    async def handle_job_status(self, request: web.Request) -> web.Response:
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "Unknown job"}, status=404)
+        return web.json_response({**job.to_dict(), "position": self.jobs.position(job)})
+
+    async def handle_job_result(self, request: web.Request) -> web.StreamResponse:
+        """Serve a finished job's response audio or token file."""
+        job = self.jobs.get(request.match_info["job_id"])
+        if job is None:
+            return web.json_response({"error": "Unknown job"}, status=404)
+        if job.status != DONE:
+            return web.json_response({"error": f"Job is {job.status}"}, status=409)
+        kind = request.match_info["kind"]
+        return web.FileResponse(job.result["audio" if kind == "audio" else "tokens"])
+
+    async def handle_job_cancel(self, request: web.Request) -> web.Response:
+        if not await self.jobs.cancel(request.match_info["job_id"]):
+            return web.json_response({"error": "Unknown job"}, status=404)
+        return web.json_response({"success": True})
+
+    async def _start_jobs(self, app: web.Application) -> None:
+        self.jobs.start()
+
+    async def _stop_jobs(self, app: web.Application) -> None:
+        await self.jobs.stop()
+
+    async def _close_recording(self, app: web.Application) -> None:
+        await self.agent.disconnect()
+        self.agent.close_recording()
+
     async def handle_start(self, request: web.Request) -> web.Response:
         """Start server + connect agent (full stack startup)."""
         success = await self.start_all()
@@ -197,17 +586,38 @@ class MoshiAgentAPI:
 
         Client sends: binary frames of float32 PCM audio (24kHz mono)
         Server sends: JSON messages with type "audio" (base64 PCM) or "text"
+            by default, or binary frames when negotiated via
+            ?protocol=binary&encoding=f32|s16|opus (see stream_protocol.py).
+            Opus clients receive the Moshi server's packets untouched.
         """
+        try:
+            fmt = StreamFormat.from_params(request.query)
+        except ValueError as e:
+            return web.json_response({"error": str(e)}, status=400)
+        negotiated = "protocol" in request.query or "encoding" in request.query
+
         ws = web.WebSocketResponse()
         await ws.prepare(request)
-        self._stream_clients.append(ws)
-        logger.info(f"Stream client connected ({len(self._stream_clients)} total)")
+        self._stream_clients.add(ws, fmt)
+        self._update_subscriptions()
+        logger.info(
+            f"Stream client connected ({len(self._stream_clients)} total, "
+            f"{fmt.protocol.value}/{fmt.encoding.value})"
+        )
+        if negotiated:
+            self._send_stream_config(ws, fmt)
 
         try:
             async for msg in ws:
                 if msg.type == web.WSMsgType.BINARY:
                     pcm = np.frombuffer(msg.data, dtype=np.float32)
-                    await self.agent.send_audio(pcm)
+                    accepted = await self.agent.send_audio(pcm)
+                    if accepted < len(pcm):
+                        self._send_stream_control(ws, {
+                            "type": "error",
+                            "error": "Agent is not streaming; audio was not fully sent",
+                            "samples_dropped": len(pcm) - accepted,
+                        })
                 elif msg.type == web.WSMsgType.TEXT:
                     try:
                         data = json.loads(msg.data)
@@ -215,22 +625,56 @@ class MoshiAgentAPI:
                         if cmd == "reconnect":
                             await self.agent.disconnect()
                             await asyncio.sleep(0.5)
-                            await self.agent.connect()
+                            await self._connect_agent()
                         elif cmd == "status":
-                            await ws.send_json(self.get_status())
+                            self._send_stream_control(ws, self.get_status())
                         elif cmd == "silence":
                             duration = data.get("duration_ms", 80)
                             await self.agent.send_silence(duration)
+                        elif cmd == "configure":
+                            try:
+                                fmt = StreamFormat.from_params(data, default=fmt)
+                            except ValueError as e:
+                                self._send_stream_control(ws, {"type": "error", "error": str(e)})
+                                continue
+                            self._stream_clients.set_format(ws, fmt)
+                            self._update_subscriptions()
+                            self._send_stream_config(ws, fmt)
                     except json.JSONDecodeError:
                         pass
                 elif msg.type in (web.WSMsgType.ERROR, web.WSMsgType.CLOSED):
                     break
         finally:
-            self._stream_clients.remove(ws)
+            await self._stream_clients.remove(ws)
+            self._update_subscriptions()
             logger.info(f"Stream client disconnected ({len(self._stream_clients)} total)")
 
         return ws
 
+    def _send_stream_config(self, ws: web.WebSocketResponse, fmt: StreamFormat) -> None:
+        """Acknowledge a negotiated format, priming Opus decoders if joining mid-stream."""
+        self._send_stream_control(ws, fmt.describe(SAMPLE_RATE))
+        if is_passthrough(fmt) and self.agent.opus_headers:
+            seq = self.agent.stats.total_audio_received
+            self._stream_clients.send(ws, pack_frame(FRAME_AUDIO, seq, self.agent.opus_headers))
+
+    def _send_stream_control(self, ws: web.WebSocketResponse, data: dict) -> None:
+        """Queue a control message in the client's negotiated protocol."""
+        fmt = self._stream_clients.get_format(ws) or DEFAULT_FORMAT
+        self._stream_clients.send(ws, self._stream_encoder.encode_control(data, fmt))
+
+    def _update_subscriptions(self) -> None:
+        """Attach the agent audio callbacks that current stream clients need.
+
+        PCM clients need decoded audio; Opus clients get the server's packets
+        as-is. With only Opus clients connected the agent skips decoding.
+        """
+        formats = self._stream_clients.formats()
+        needs_pcm = any(not is_passthrough(fmt) for fmt in formats)
+        needs_opus = any(is_passthrough(fmt) for fmt in formats)
+        self.agent.on_audio_received = self._on_audio_received if needs_pcm else None
+        self.agent.on_opus_received = self._on_opus_received if needs_opus else None
+
     # ── Callbacks ────────────────────────────────────────────────
 
     async def _on_audio_received(self, pcm: np.ndarray) -> None:
@@ -238,12 +682,24 @@ class MoshiAgentAPI:
         if not self._stream_clients:
             return
 
-        audio_b64 = base64.b64encode(pcm.astype(np.float32).tobytes()).decode()
-        msg = json.dumps({"type": "audio", "data": audio_b64, "samples": len(pcm)})
-        asyncio.create_task(self._broadcast(msg))
+        messages = self._stream_encoder.encode_audio(
+            pcm, self._stream_clients.formats(), self.agent.stats.total_audio_received
+        )
+        self._stream_clients.publish(messages)
+
+    async def _on_opus_received(self, opus_bytes: bytes) -> None:
+        """Forward the server's Opus packet untouched to passthrough clients."""
+        if not self._stream_clients:
+            return
+
+        messages = self._stream_encoder.encode_opus(
+            opus_bytes, self._stream_clients.formats(), self.agent.stats.total_audio_received
+        )
+        self._stream_clients.publish(messages)
 
     async def _on_text_received(self, text: str) -> None:
         """Forward received text to all stream clients and buffer."""
+        self.gc_quiet.note_text()  # the reply is still going (see conscious.gcquiet)
         self._text_buffer.append(text)
         if len(self._text_buffer) > self._text_buffer_max:
             self._text_buffer = self._text_buffer[-self._text_buffer_max:]
@@ -251,32 +707,117 @@ class MoshiAgentAPI:
         if not self._stream_clients:
             return
 
-        msg = json.dumps({"type": "text", "data": text})
-        asyncio.create_task(self._broadcast(msg))
-
-    async def _broadcast(self, msg: str) -> None:
-        """Send a message to all connected stream clients without blocking the caller."""
-        for ws in list(self._stream_clients):
+        messages = self._stream_encoder.encode_text(text, self._stream_clients.formats())
+        self._stream_clients.publish(messages)
+
+    def _on_latency_sample(self, latency_ms: float) -> None:
+        self._latency_window.observe(latency_ms)
+
+    # ── Metrics Sampling ─────────────────────────────────────────
+
+    async def _metrics_loop(self) -> None:
+        """Background task: record one metrics sample per second."""
+        frame_s = self.agent.config.audio_send_interval_ms / 1000
+        last_packets = self.agent.stats.total_audio_received
+        last_reconnects = self.agent.stats.reconnect_count
+        last_drops = 0
+        next_tick = time.monotonic()
+        while True:
+            next_tick += 1.0
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            self.gc_quiet.tick()
+            self.gc_quiet.idle()
+
+            stats = self.agent.stats
+            framing = self.agent.get_coalescer_stats() or {}
+            stream = self._stream_clients.get_stats()
+
+            # Each server packet carries one 80ms frame: rtf > 1 means slower than real time
+            packets = stats.total_audio_received - last_packets
+            rtf = 1.0 / (packets * frame_s) if packets > 0 else math.nan
+            drops = stream["dropped"] + framing.get("frames_dropped", 0)
+            p50, p95, p99 = self._latency_window.drain()
+
+            self.metrics.record({
+                "realtime_factor": rtf,
+                "latency_p50_ms": p50,
+                "latency_p95_ms": p95,
+                "latency_p99_ms": p99,
+                "stream_queue_depth": stream["queued"],
+                "input_queue_depth": framing.get("pending_frames", 0),
+                "drops": max(0, drops - last_drops),
+                "reconnects": stats.reconnect_count - last_reconnects,
+                "clients": stream["clients"],
+            })
+            last_packets = stats.total_audio_received
+            last_reconnects = stats.reconnect_count
+            last_drops = drops
+
+    async def _apply_scheduling(self, app: web.Application) -> None:
+        if self.scheduling is not None:
+            apply_thread_policy("loop", self.scheduling)
+        self.gc_quiet.after_load()
+
+    async def _start_metrics(self, app: web.Application) -> None:
+        self._metrics_task = asyncio.create_task(self._metrics_loop(), name="api-metrics")
+        if self.governor is not None:
+            await self.governor.start()
+
+    async def _stop_metrics(self, app: web.Application) -> None:
+        if self.governor is not None:
+            await self.governor.stop()
+        if self._metrics_task and not self._metrics_task.done():
+            self._metrics_task.cancel()
             try:
-                if not ws.closed:
-                    await ws.send_str(msg)
-            except Exception:
+                await self._metrics_task
+            except asyncio.CancelledError:
                 pass
 
     def _on_server_status_change(self, status: ServerStatus) -> None:
-        """Log server status changes."""
-        logger.info(f"Server status changed: {status.value}")
+        """Log server status changes and follow the active server across failovers."""
+        logger.info("Server status changed: %s", status.value)
+        ws_url = self.server_manager.ws_url
+        if status == ServerStatus.READY and self.agent.config.server_ws_url != ws_url:
+            # Promoted standby: the agent's next reconnect attempt goes to the new port
+            logger.info(f"Live server moved to {ws_url}")
+            self.agent.config.server_ws_url = ws_url
+            if self._jobs_share_server:
+                self.jobs.runner.server_ws_url = ws_url
+            self._failover_pending_at = time.perf_counter()
 
     def _on_agent_state_change(self, state: AgentState) -> None:
         """Log agent state changes."""
-        logger.info(f"Agent state changed: {state.value}")
+        logger.info("Agent state changed: %s", state.value)
+        if state == AgentState.STREAMING and self._gc_streaming is None:
+            self._gc_streaming = ExitStack()
+            self._gc_streaming.enter_context(self.gc_quiet.streaming())
+        elif state != AgentState.STREAMING and self._gc_streaming is not None:
+            self._gc_streaming.close()
+            self._gc_streaming = None
+        if state == AgentState.STREAMING and self._failover_pending_at:
+            # Standby promoted -> agent streaming again; adds the agent's reconnect backoff
+            reconnect_ms = (time.perf_counter() - self._failover_pending_at) * 1000
+            failover_ms = self.server_manager.last_failover.get("failover_ms", 0.0)
+            logger.info(f"Agent back on the promoted server: failover {failover_ms:.0f}ms "
+                        f"+ reconnect {reconnect_ms:.0f}ms")
+            self._failover_pending_at = 0.0
 
     # ── App Builder & Runner ────────────────────────────────────
 
     def build_app(self) -> web.Application:
         """Build the aiohttp web application with all routes."""
         app = web.Application()
+        app.on_startup.append(self._apply_scheduling)
+        app.on_startup.append(self._start_metrics)
+        app.on_startup.append(self._start_jobs)
+        app.on_cleanup.append(self._stop_metrics)
+        app.on_cleanup.append(self._stop_jobs)
+        app.on_cleanup.append(self._close_recording)
         app.router.add_get("/api/voice/status", self.handle_status)
+        app.router.add_get("/api/voice/stats", self.handle_stats)
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/api/voice/trace", self.handle_trace)
+        app.router.add_get("/api/admin/server-log", self.handle_server_log)
         app.router.add_post("/api/voice/connect", self.handle_connect)
         app.router.add_post("/api/voice/disconnect", self.handle_disconnect)
         app.router.add_post("/api/voice/reconnect", self.handle_reconnect)
@@ -284,6 +825,13 @@ class MoshiAgentAPI:
         app.router.add_post("/api/voice/start", self.handle_start)
         app.router.add_post("/api/voice/stop", self.handle_stop)
         app.router.add_get("/api/voice/stream", self.handle_stream)
+        app.router.add_post("/api/jobs", self.handle_job_submit)
+        app.router.add_get("/api/jobs", self.handle_job_list)
+        app.router.add_get("/api/jobs/{job_id}", self.handle_job_status)
+        app.router.add_get("/api/jobs/{job_id}/{kind:audio|tokens}", self.handle_job_result)
+        app.router.add_delete("/api/jobs/{job_id}", self.handle_job_cancel)
+        if self.enable_profiler:
+            app.router.add_get("/api/admin/profile", self.handle_profile)
         return app
 
     def run(self, host: str = "0.0.0.0", port: Optional[int] = None) -> None:
@@ -297,20 +845,65 @@ class MoshiAgentAPI:
 if __name__ == "__main__":
     import argparse
 
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
-    )
+    setup_logging("INFO")
 
     parser = argparse.ArgumentParser(description="Moshi Agent API Server")
     parser.add_argument("--api-port", type=int, default=8999, help="API server port")
     parser.add_argument("--moshi-port", type=int, default=8998, help="Moshi server port")
     parser.add_argument("--auto-start", action="store_true", help="Auto-start Moshi server")
+    parser.add_argument("--enable-profiler", action="store_true",
+                        help="Expose the sampling profiler at /api/admin/profile")
+    parser.add_argument("--stub-server", action="store_true",
+                        help="Launch the CPU-only stub Moshi server instead of moshi.server")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Record all Moshi WebSocket traffic to PATH (see session_log)")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Serve a recorded session instead of launching moshi.server")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay rate (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--standby-port", type=int, default=0,
+                        help="Keep a warm standby Moshi server on this port for instant failover")
+    parser.add_argument("--job-dir", default="~/.conscious/jobs", help="Clip job storage")
+    parser.add_argument("--job-workers", type=int, default=1, help="Concurrent clip jobs")
+    parser.add_argument("--job-server-url",
+                        help="Dedicated Moshi server for jobs (default: share the live one)")
+    parser.add_argument("--no-resource-limits", action="store_true",
+                        help="Don't apply the config's resources.* limits to the Moshi server")
+    parser.add_argument("--rt-scheduling", action="store_true",
+                        help="Pin and prioritise the event loop thread (config scheduling.*)")
+    parser.add_argument("--gc-quiet", action="store_true",
+                        help="Freeze the heap at startup and defer GC while streaming")
     args = parser.parse_args()
 
-    server_cfg = ServerManagerConfig(port=args.moshi_port)
-    agent_cfg = AgentConfig(server_ws_url=f"ws://localhost:{args.moshi_port}/api/chat")
-    api = MoshiAgentAPI(server_config=server_cfg, agent_config=agent_cfg, api_port=args.api_port)
+    if args.replay:
+        from . import session_log
+        server_cfg = session_log.manager_config(args.replay, args.replay_speed,
+                                                port=args.moshi_port)
+    elif args.stub_server:
+        from .stub_server import manager_config
+        server_cfg = manager_config(port=args.moshi_port)
+    else:
+        server_cfg = ServerManagerConfig(port=args.moshi_port)
+    server_cfg.standby_port = args.standby_port
+    agent_cfg = AgentConfig(server_ws_url=f"ws://localhost:{args.moshi_port}/api/chat",
+                            record_path=args.record)
+    job_cfg = JobQueueConfig(job_dir=args.job_dir, max_workers=args.job_workers,
+                             server_ws_url=args.job_server_url)
+    try:
+        file_config = load_config()
+    except FileNotFoundError as e:
+        logger.warning(f"No config, resource limits and scheduling not applied: {e}")
+        file_config = {}
+    limits = None if args.no_resource_limits else ResourceLimits.from_config(file_config)
+    gc_quiet = GcQuietConfig.from_config(file_config)
+    gc_quiet.enabled = gc_quiet.enabled or args.gc_quiet
+    scheduling = None
+    if args.rt_scheduling:
+        scheduling = SchedulingConfig.from_config(file_config)
+        scheduling.enabled = True
+    api = MoshiAgentAPI(server_config=server_cfg, agent_config=agent_cfg, api_port=args.api_port,
+                        enable_profiler=args.enable_profiler, job_config=job_cfg,
+                        resource_limits=limits, scheduling=scheduling, gc_quiet=gc_quiet)
 
     if args.auto_start:
         async def _auto_start():
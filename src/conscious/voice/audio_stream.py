@@ -19,8 +19,23 @@ import numpy as np
 import sounddevice as sd
 import torch
 
+from conscious.logqueue import HotPathWarning
+from conscious.metrics import REGISTRY
+from conscious.scheduling import SchedulingConfig, apply_thread_policy
+from conscious.tracing import CAPTURE, DEQUEUE, NO_TRACE, OUTPUT_QUEUED, PLAYOUT, TRACER
+
 logger = logging.getLogger(__name__)
 
+# Incremented on the PortAudio threads: one writer per direction
+_XRUNS = {
+    direction: REGISTRY.counter(
+        "conscious_audio_status_events_total",
+        "PortAudio callback status flags (overflow/underflow)",
+        labels={"direction": direction},
+    )
+    for direction in ("input", "output")
+}
+
 SAMPLE_RATE = 24000
 CHANNELS = 1
 FRAME_SIZE = 1920  # 80ms at 24kHz
@@ -37,6 +52,8 @@ class AudioStreamConfig:
     input_device: Optional[int] = None
     output_device: Optional[int] = None
     max_queue_size: int = 50  # Max buffered frames before dropping
+    # Opt-in pinning / real-time priority for the PortAudio callback threads
+    scheduling: Optional[SchedulingConfig] = None
 
 
 class AudioStream:
@@ -52,9 +69,10 @@ class AudioStream:
         while running:
             frame = stream.get_input_frame()  # blocks until frame ready
             if frame is not None:
-                output = engine.process_frame(frame)
+                trace_id = stream.last_trace_id
+                output = engine.process_frame(frame, trace_id)
                 if output is not None:
-                    stream.put_output_frame(output)
+                    stream.put_output_frame(output, trace_id)
 
         stream.stop()
     """
@@ -62,30 +80,64 @@ class AudioStream:
     def __init__(self, config: Optional[AudioStreamConfig] = None):
         self.config = config or AudioStreamConfig()
 
-        self._input_queue: queue.Queue[torch.Tensor] = queue.Queue(
+        # Queues carry (trace_id, frame) so frames can be followed end to end
+        self._input_queue: queue.Queue[tuple[int, torch.Tensor]] = queue.Queue(
             maxsize=self.config.max_queue_size
         )
-        self._output_queue: queue.Queue[np.ndarray] = queue.Queue(
+        self._output_queue: queue.Queue[tuple[int, np.ndarray]] = queue.Queue(
             maxsize=self.config.max_queue_size
         )
+        # Trace ID of the frame last returned by get_input_frame()
+        self.last_trace_id = NO_TRACE
 
         self._input_stream: Optional[sd.InputStream] = None
         self._output_stream: Optional[sd.OutputStream] = None
         self._running = False
+        # Callback threads belong to PortAudio, so each applies its policy on its first call
+        sched = self.config.scheduling
+        self._sched_pending = {"input": bool(sched and sched.enabled),
+                               "output": bool(sched and sched.enabled)}
 
         # Buffer for accumulating partial input frames
         self._input_buffer = np.zeros(0, dtype=np.float32)
         self._buffer_lock = threading.Lock()
 
+        # PortAudio status flags, aggregated: at most one log line per 5s per direction
+        self._status_warnings = {
+            "input": HotPathWarning(logger, "Input status"),
+            "output": HotPathWarning(logger, "Output status"),
+        }
+
         # Stats
         self._frames_captured = 0
         self._frames_played = 0
         self._frames_dropped = 0
+        self._register_metrics()
 
     @property
     def is_running(self) -> bool:
         return self._running
 
+    def _register_metrics(self) -> None:
+        """Export existing counters at scrape time (no work on the audio thread)."""
+        for name, help, fn in (
+            ("conscious_audio_frames_captured_total", "Microphone frames captured",
+             lambda s: s._frames_captured),
+            ("conscious_audio_frames_played_total", "Frames played to the speaker",
+             lambda s: s._frames_played),
+            ("conscious_audio_frames_dropped_total", "Frames dropped on full queues",
+             lambda s: s._frames_dropped),
+        ):
+            REGISTRY.register_callback(name, help, fn, kind="counter", owner=self)
+        REGISTRY.register_callback(
+            "conscious_audio_queue_depth", "Frames waiting in the audio queues",
+            lambda s: s._input_queue.qsize(), labels={"queue": "input"}, owner=self,
+        )
+        REGISTRY.register_callback(
+            "conscious_audio_queue_depth", "Frames waiting in the audio queues",
+            lambda s: s._output_queue.qsize(), labels={"queue": "output"}, owner=self,
+        )
+
     def start(self) -> None:
         """Start audio capture and playback streams."""
         if self._running:
@@ -138,6 +190,9 @@ class AudioStream:
             self._output_stream.close()
             self._output_stream = None
 
+        for warning in self._status_warnings.values():
+            warning.flush()
+
         # Drain queues
         while not self._input_queue.empty():
             try:
@@ -165,15 +220,19 @@ class AudioStream:
             Tensor of shape [1, 1, frame_size] (float32) or None on timeout.
         """
         try:
-            return self._input_queue.get(timeout=timeout)
+            trace_id, frame = self._input_queue.get(timeout=timeout)
         except queue.Empty:
             return None
+        TRACER.mark(trace_id, DEQUEUE)
+        self.last_trace_id = trace_id
+        return frame
 
-    def put_output_frame(self, audio: torch.Tensor) -> None:
+    def put_output_frame(self, audio: torch.Tensor, trace_id: int = NO_TRACE) -> None:
         """Queue an audio frame for playback.
 
         Args:
             audio: Tensor of shape [B, C, T] — will be converted to numpy.
+            trace_id: Trace ID of the input frame that produced it.
         """
         # Convert torch tensor to numpy for sounddevice
         np_audio = audio.squeeze().cpu().numpy()
@@ -184,8 +243,10 @@ class AudioStream:
         elif len(np_audio) > self.config.frame_size:
             np_audio = np_audio[: self.config.frame_size]
 
+        TRACER.mark(trace_id, OUTPUT_QUEUED)
+        item = (trace_id, np_audio)
         try:
-            self._output_queue.put_nowait(np_audio)
+            self._output_queue.put_nowait(item)
         except queue.Full:
             self._frames_dropped += 1
             # Drop oldest frame to prevent growing lag
@@ -193,7 +254,7 @@ class AudioStream:
                 self._output_queue.get_nowait()
             except queue.Empty:
                 pass
-            self._output_queue.put_nowait(np_audio)
+            self._output_queue.put_nowait(item)
 
     def get_stats(self) -> dict:
         """Return audio stream statistics."""
@@ -207,8 +268,12 @@ class AudioStream:
 
     def _input_callback(self, indata: np.ndarray, frames: int, time_info, status) -> None:
         """Sounddevice input callback — accumulates audio into frame-aligned chunks."""
+        if self._sched_pending["input"]:
+            self._sched_pending["input"] = False
+            apply_thread_policy("audio", self.config.scheduling)
         if status:
-            logger.warning(f"Input status: {status}")
+            _XRUNS["input"].inc()
+            self._status_warnings["input"].record(str(status))
 
         if not self._running:
             return
@@ -226,9 +291,12 @@ class AudioStream:
 
                 # Convert to torch tensor [1, 1, frame_size]
                 frame_tensor = torch.from_numpy(frame_np).unsqueeze(0).unsqueeze(0)
+                trace_id = TRACER.begin()
+                TRACER.mark(trace_id, CAPTURE)
+                item = (trace_id, frame_tensor)
 
                 try:
-                    self._input_queue.put_nowait(frame_tensor)
+                    self._input_queue.put_nowait(item)
                     self._frames_captured += 1
                 except queue.Full:
                     self._frames_dropped += 1
@@ -237,16 +305,21 @@ class AudioStream:
                         self._input_queue.get_nowait()
                     except queue.Empty:
                         pass
-                    self._input_queue.put_nowait(frame_tensor)
+                    self._input_queue.put_nowait(item)
 
     def _output_callback(self, outdata: np.ndarray, frames: int, time_info, status) -> None:
         """Sounddevice output callback — feeds queued audio to speakers."""
+        if self._sched_pending["output"]:
+            self._sched_pending["output"] = False
+            apply_thread_policy("audio", self.config.scheduling)
         if status:
-            logger.warning(f"Output status: {status}")
+            _XRUNS["output"].inc()
+            self._status_warnings["output"].record(str(status))
 
         try:
-            audio = self._output_queue.get_nowait()
+            trace_id, audio = self._output_queue.get_nowait()
             outdata[:, 0] = audio[: len(outdata)]
+            TRACER.mark(trace_id, PLAYOUT)
             self._frames_played += 1
         except queue.Empty:
             # No audio to play — output silence
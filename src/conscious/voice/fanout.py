@@ -0,0 +1,241 @@
+"""Stream Fanout — Backpressured broadcast to /api/voice/stream clients.
+
+Each client gets a bounded outbound queue drained by its own writer task, so
+a slow client only delays itself. Publishing is synchronous and never awaits
+a socket: the agent's receive loop hands over one pre-serialized message per
+format and returns immediately.
+
+Slow-client policy:
+    - queue full      -> drop the oldest queued message (counted per client)
+    - too many drops  -> disconnect the laggard
+    - send too slow   -> a single send exceeding send_timeout disconnects it
+    - send fails      -> the client is unregistered and its socket closed
+
+Memory is bounded by clients x queue_size, independent of how long a client
+has been lagging.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from .stream_protocol import StreamFormat
+
+try:
+    from aiohttp import WSCloseCode
+except ImportError:
+    WSCloseCode = None
+
+logger = logging.getLogger(__name__)
+
+Message = Union[str, bytes]
+
+
+@dataclass
+class FanoutConfig:
+    """Configuration for stream client fan-out."""
+    queue_size: int = 32  # ~2.5s of 80ms audio chunks
+    max_dropped: int = 64  # drops within drop_window before disconnecting
+    drop_window: float = 10.0
+    send_timeout: float = 2.0
+    close_timeout: float = 1.0
+
+
+class _ClientChannel:
+    """Bounded outbound queue + writer task for one stream client."""
+
+    def __init__(self, ws, fmt: StreamFormat, config: FanoutConfig):
+        self.ws = ws
+        self.fmt = fmt
+        self.sent = 0
+        self.dropped = 0
+        self.max_send_ms = 0.0
+        self._config = config
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_size)
+        self._window_start = time.monotonic()
+        self._window_drops = 0
+        self._task: Optional[asyncio.Task] = None
+        self.lagging = False
+
+    def start(self, on_laggard, on_failed) -> None:
+        self._task = asyncio.create_task(
+            self._writer(on_laggard, on_failed), name="stream-writer"
+        )
+
+    def offer(self, msg: Message) -> bool:
+        """Queue a message, dropping the oldest when full.
+
+        Returns:
+            False if the client exceeded its drop budget and should be cut.
+        """
+        if self._queue.full():
+            try:
+                self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+            now = time.monotonic()
+            if now - self._window_start > self._config.drop_window:
+                self._window_start = now
+                self._window_drops = 0
+            self._window_drops += 1
+            if self._window_drops > self._config.max_dropped:
+                return False
+        self._queue.put_nowait(msg)
+        return True
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    async def _writer(self, on_laggard, on_failed) -> None:
+        while True:
+            msg = await self._queue.get()
+            if self.ws.closed:
+                return
+            start = time.perf_counter()
+            try:
+                if isinstance(msg, bytes):
+                    send = self.ws.send_bytes(msg)
+                else:
+                    send = self.ws.send_str(msg)
+                await asyncio.wait_for(send, timeout=self._config.send_timeout)
+            except asyncio.TimeoutError:
+                on_laggard(self, "send timeout")
+                return
+            except Exception as e:
+                on_failed(self, e)
+                return
+            send_ms = (time.perf_counter() - start) * 1000
+            if send_ms > self.max_send_ms:
+                self.max_send_ms = send_ms
+            self.sent += 1
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+class StreamFanout:
+    """Fan-out of pre-serialized stream messages to WebSocket clients.
+
+    Usage:
+        fanout = StreamFanout()
+        fanout.add(ws, fmt)
+        fanout.publish({fmt: msg, ...})   # non-blocking
+        fanout.send(ws, msg)              # one client, in order with publishes
+        await fanout.remove(ws)
+    """
+
+    def __init__(self, config: Optional[FanoutConfig] = None):
+        self.config = config or FanoutConfig()
+        self._channels: dict = {}
+        self._laggards_disconnected = 0
+        self._write_failures = 0
+        # Totals of clients that have left, so counters never go backwards
+        self._retired_sent = 0
+        self._retired_dropped = 0
+        self._close_tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def __bool__(self) -> bool:
+        return bool(self._channels)
+
+    def add(self, ws, fmt: StreamFormat) -> None:
+        channel = _ClientChannel(ws, fmt, self.config)
+        self._channels[ws] = channel
+        channel.start(self._disconnect_laggard, self._drop_failed)
+
+    async def remove(self, ws) -> None:
+        channel = self._channels.pop(ws, None)
+        if channel is not None:
+            await channel.stop()
+            self._retired_sent += channel.sent
+            self._retired_dropped += channel.dropped
+
+    def get_format(self, ws) -> Optional[StreamFormat]:
+        channel = self._channels.get(ws)
+        return channel.fmt if channel else None
+
+    def set_format(self, ws, fmt: StreamFormat) -> None:
+        channel = self._channels.get(ws)
+        if channel is not None:
+            channel.fmt = fmt
+
+    def formats(self) -> set[StreamFormat]:
+        """Distinct formats currently in use (one serialization each)."""
+        return {channel.fmt for channel in self._channels.values()}
+
+    def publish(self, messages: dict) -> None:
+        """Queue each client's format-specific message. Never blocks."""
+        for channel in list(self._channels.values()):
+            msg = messages.get(channel.fmt)
+            if msg is None or channel.lagging:
+                continue
+            if not channel.offer(msg):
+                self._disconnect_laggard(channel, f"dropped > {self.config.max_dropped} messages")
+
+    def send(self, ws, msg: Message) -> None:
+        """Queue a message for a single client (e.g. control replies)."""
+        channel = self._channels.get(ws)
+        if channel is not None and not channel.lagging:
+            channel.offer(msg)
+
+    def get_stats(self) -> dict:
+        channels = list(self._channels.values())
+        return {
+            "clients": len(channels),
+            "queued": sum(c.depth for c in channels),
+            "sent": self._retired_sent + sum(c.sent for c in channels),
+            "dropped": self._retired_dropped + sum(c.dropped for c in channels),
+            "max_send_ms": round(max((c.max_send_ms for c in channels), default=0.0), 1),
+            "laggards_disconnected": self._laggards_disconnected,
+            "write_failures": self._write_failures,
+        }
+
+    def _disconnect_laggard(self, channel: _ClientChannel, reason: str) -> None:
+        if channel.lagging:
+            return
+        channel.lagging = True
+        self._laggards_disconnected += 1
+        logger.warning(
+            f"Disconnecting slow stream client ({reason}, "
+            f"sent={channel.sent}, dropped={channel.dropped})"
+        )
+        code = WSCloseCode.TRY_AGAIN_LATER if WSCloseCode is not None else 1013
+        self._schedule_close(channel, code, b"slow consumer")
+
+    def _drop_failed(self, channel: _ClientChannel, error: Exception) -> None:
+        """Called by a channel's writer when a send raised; the writer has exited."""
+        if self._channels.get(channel.ws) is not channel:
+            return
+        del self._channels[channel.ws]
+        self._retired_sent += channel.sent
+        self._retired_dropped += channel.dropped
+        self._write_failures += 1
+        channel.lagging = True
+        logger.debug("Stream client write failed, dropping it: %r", error)
+        code = WSCloseCode.INTERNAL_ERROR if WSCloseCode is not None else 1011
+        self._schedule_close(channel, code, b"write failed")
+
+    def _schedule_close(self, channel: _ClientChannel, code: int, message: bytes) -> None:
+        task = asyncio.create_task(self._close(channel, code, message), name="stream-close")
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    async def _close(self, channel: _ClientChannel, code: int, message: bytes) -> None:
+        try:
+            await asyncio.wait_for(
+                channel.ws.close(code=code, message=message, drain=False),
+                timeout=self.config.close_timeout,
+            )
+        except Exception:
+            pass
@@ -0,0 +1,340 @@
+"""Moshi Fleet — Several Moshi servers on one host behind one status view.
+
+Each instance is a MoshiServerManager with its own port, GPU (via
+CUDA_VISIBLE_DEVICES), CPU pinning, thread count and niceness, so all the
+single-server machinery (preflight, probes, deep health, restarts, warm
+standby) applies per instance. On top of that the fleet:
+
+    - staggers model loads: at most load_concurrency instances load at
+      once, with stagger_s between load starts, so they don't fight over
+      disk and memory bandwidth
+    - serves a fleet-wide status and capacity view (snapshot()) that a
+      router can poll, and a simple acquire()/release() lease for routers
+      running in-process or over HTTP
+
+Usage:
+    fleet = MoshiFleet(FleetConfig(instances=[
+        InstanceSpec("gpu0", port=8998, device="0", cpus=[0, 1, 2, 3], threads=4),
+        InstanceSpec("gpu1", port=9008, device="1", cpus=[4, 5, 6, 7], threads=4),
+    ]))
+    await fleet.start()
+    lease = fleet.acquire()        # {"name": "gpu0", "ws_url": ...} or None
+    ...
+    fleet.release(lease["name"])
+    await fleet.stop()
+
+    python -m conscious.voice.fleet --ports 8998,9008 --devices 0,1 --status-port 8990
+    curl localhost:8990/api/fleet
+"""
+
+import asyncio
+import dataclasses
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from conscious.logqueue import setup_logging
+from conscious.metrics import REGISTRY
+
+from .server_manager import MoshiServerManager, ServerManagerConfig, ServerStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InstanceSpec:
+    """One server in the fleet."""
+    name: str
+    port: int
+    device: Optional[str] = None  # CUDA_VISIBLE_DEVICES for this instance
+    cpus: list = field(default_factory=list)  # CPU affinity; empty = unpinned
+    threads: int = 0  # OMP/MKL/torch CPU threads; 0 keeps the library default
+    nice: int = 0
+    sessions: int = 1  # concurrent sessions it can serve (moshi.server: one)
+    standby_port: int = 0  # per-instance warm standby, see ServerManagerConfig
+    env: dict = field(default_factory=dict)
+
+
+@dataclass
+class FleetConfig:
+    """Instances plus the ServerManagerConfig they are stamped from."""
+    instances: list = field(default_factory=list)
+    base: ServerManagerConfig = field(default_factory=ServerManagerConfig)
+    load_concurrency: int = 1  # instances loading a model at the same time
+    stagger_s: float = 0.0  # minimum gap between load starts
+    ready_timeout: float = 300.0
+
+
+class MoshiFleet:
+    """Launches, monitors and reports on N MoshiServerManagers."""
+
+    def __init__(self, config: FleetConfig):
+        names = [spec.name for spec in config.instances]
+        ports = [p for spec in config.instances for p in (spec.port, spec.standby_port) if p]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate instance names: {names}")
+        if len(set(ports)) != len(ports):
+            raise ValueError(f"Instance ports overlap: {ports}")
+
+        self.config = config
+        self.specs = {spec.name: spec for spec in config.instances}
+        self.managers = {spec.name: MoshiServerManager(self._manager_config(spec))
+                         for spec in config.instances}
+        self._active: dict[str, int] = {name: 0 for name in self.specs}
+        self._load_times: dict[str, float] = {}
+        self._start_task: Optional[asyncio.Task] = None
+
+        REGISTRY.register_callback(
+            "conscious_fleet_instances_ready", "Fleet instances currently READY",
+            lambda f: sum(m.is_ready for m in f.managers.values()), owner=self,
+        )
+        REGISTRY.register_callback(
+            "conscious_fleet_capacity_free", "Free session slots on READY fleet instances",
+            lambda f: f.capacity()["free"], owner=self,
+        )
+
+    def _manager_config(self, spec: InstanceSpec) -> ServerManagerConfig:
+        env = dict(self.config.base.env_vars)
+        if spec.threads:
+            for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+                env[var] = str(spec.threads)
+        env.update(spec.env)
+        return dataclasses.replace(
+            self.config.base,
+            instance=spec.name,
+            port=spec.port,
+            standby_port=spec.standby_port,
+            cuda_device=spec.device,
+            cpu_affinity=list(spec.cpus),
+            nice=spec.nice,
+            server_args=list(self.config.base.server_args),
+            env_vars=env,
+        )
+
+    # ── Lifecycle ────────────────────────────────────────────────
+
+    async def start(self, wait: bool = True) -> bool:
+        """Launch every instance, staggering their model loads.
+
+        Args:
+            wait: If True, returns once every instance is ready or has timed out.
+
+        Returns:
+            True if all instances became ready (always True when wait is False).
+        """
+        self._start_task = asyncio.create_task(self._staggered_start(), name="fleet-start")
+        if not wait:
+            return True
+        return await self._start_task
+
+    async def _staggered_start(self) -> bool:
+        gate = asyncio.Semaphore(max(1, self.config.load_concurrency))
+        next_start = [time.monotonic()]
+
+        async def load(name: str) -> bool:
+            async with gate:
+                delay = next_start[0] - time.monotonic()
+                next_start[0] = max(next_start[0], time.monotonic()) + self.config.stagger_s
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                began = time.perf_counter()
+                manager = self.managers[name]
+                logger.info(f"Fleet: loading {name} on port {manager.config.port}")
+                await manager.start()
+                ready = await manager.wait_ready(self.config.ready_timeout)
+                self._load_times[name] = round(time.perf_counter() - began, 1)
+                logger.info(f"Fleet: {name} {'ready' if ready else 'NOT ready'} "
+                            f"after {self._load_times[name]:.1f}s")
+                return ready
+
+        results = await asyncio.gather(*(load(name) for name in self.managers))
+        return all(results)
+
+    async def stop(self) -> None:
+        """Stop every instance."""
+        if self._start_task and not self._start_task.done():
+            self._start_task.cancel()
+            try:
+                await self._start_task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(m.stop() for m in self.managers.values()))
+
+    # ── Status and routing ───────────────────────────────────────
+
+    def _instance_view(self, name: str) -> dict:
+        spec, manager = self.specs[name], self.managers[name]
+        health = manager.last_health
+        return {
+            "name": name,
+            "status": manager.status.value,
+            "ready": manager.is_ready,
+            "ws_url": manager.ws_url,
+            "port": manager.port,
+            "pid": manager.pid,
+            "device": spec.device,
+            "cpus": spec.cpus,
+            "sessions": self._active[name],
+            "max_sessions": spec.sessions,
+            "inference_ms": health.get("inference_ms"),
+            "degraded": health.get("degraded", False),
+            "load_seconds": self._load_times.get(name),
+            "standby": manager.standby_status,
+        }
+
+    def capacity(self) -> dict:
+        """Session slots across READY instances."""
+        total = free = 0
+        for name, manager in self.managers.items():
+            if manager.is_ready:
+                total += self.specs[name].sessions
+                free += max(0, self.specs[name].sessions - self._active[name])
+        return {"total": total, "used": total - free, "free": free}
+
+    def snapshot(self) -> dict:
+        """Fleet-wide status: every instance plus totals, for routers and dashboards."""
+        statuses = [m.status for m in self.managers.values()]
+        return {
+            "instances": [self._instance_view(name) for name in self.managers],
+            "ready": statuses.count(ServerStatus.READY),
+            "loading": sum(s in (ServerStatus.STARTING, ServerStatus.LOADING_MODEL)
+                           for s in statuses),
+            "failed": statuses.count(ServerStatus.ERROR),
+            "capacity": self.capacity(),
+        }
+
+    def acquire(self) -> Optional[dict]:
+        """Lease a session slot on the best READY instance.
+
+        Picks the instance with the most free slots, breaking ties on the last
+        deep-probe inference latency and skipping degraded ones.
+
+        Returns:
+            The instance view (with ws_url) or None if the fleet is full.
+        """
+        candidates = [
+            name for name, manager in self.managers.items()
+            if manager.is_ready and self._active[name] < self.specs[name].sessions
+            and not manager.last_health.get("degraded", False)
+        ]
+        if not candidates:
+            return None
+        name = min(candidates, key=lambda n: (
+            self._active[n] - self.specs[n].sessions,
+            self.managers[n].last_health.get("inference_ms") or 0.0,
+        ))
+        self._active[name] += 1
+        return self._instance_view(name)
+
+    def release(self, name: str) -> None:
+        """Return a slot leased with acquire().
+
+        Raises:
+            KeyError: If name is not a fleet instance.
+        """
+        self._active[name] = max(0, self._active[name] - 1)
+
+    # ── HTTP ─────────────────────────────────────────────────────
+
+    def build_app(self) -> "web.Application":
+        """GET /api/fleet, POST /api/fleet/acquire, POST /api/fleet/release/{name}."""
+        if web is None:
+            raise ImportError("aiohttp is required: pip install aiohttp")
+        app = web.Application()
+        app.router.add_get("/api/fleet", self.handle_status)
+        app.router.add_post("/api/fleet/acquire", self.handle_acquire)
+        app.router.add_post("/api/fleet/release/{name}", self.handle_release)
+        return app
+
+    async def handle_status(self, request: "web.Request") -> "web.Response":
+        return web.json_response(self.snapshot())
+
+    async def handle_acquire(self, request: "web.Request") -> "web.Response":
+        lease = self.acquire()
+        if lease is None:
+            return web.json_response({"error": "no free capacity", **self.capacity()}, status=503)
+        return web.json_response(lease)
+
+    async def handle_release(self, request: "web.Request") -> "web.Response":
+        name = request.match_info["name"]
+        if name not in self.specs:
+            return web.json_response({"error": f"unknown instance {name!r}"}, status=404)
+        self.release(name)
+        return web.json_response(self._instance_view(name))
+
+
+def specs_from_args(ports: str, devices: Optional[str] = None, cpus_per_instance: int = 0,
+                    threads: int = 0) -> list[InstanceSpec]:
+    """Build instance specs from comma-separated ports and devices.
+
+    With cpus_per_instance, instance i is pinned to CPUs [i*n, (i+1)*n).
+
+    Raises:
+        ValueError: On malformed lists or a device count that doesn't match.
+    """
+    port_list = [int(p) for p in ports.split(",")]
+    device_list = devices.split(",") if devices else [None] * len(port_list)
+    if len(device_list) != len(port_list):
+        raise ValueError(f"{len(port_list)} ports but {len(device_list)} devices")
+    return [
+        InstanceSpec(
+            name=f"moshi-{i}", port=port, device=device,
+            cpus=list(range(i * cpus_per_instance, (i + 1) * cpus_per_instance)),
+            threads=threads or cpus_per_instance,
+        )
+        for i, (port, device) in enumerate(zip(port_list, device_list))
+    ]
+
+
+def main() -> None:
+    import argparse
+
+    setup_logging("INFO")
+    parser = argparse.ArgumentParser(description="Run several Moshi servers with a status API")
+    parser.add_argument("--ports", required=True, help="Comma-separated server ports")
+    parser.add_argument("--devices", help="Comma-separated CUDA_VISIBLE_DEVICES, one per port")
+    parser.add_argument("--cpus-per-instance", type=int, default=0,
+                        help="Pin instance i to CPUs [i*n, (i+1)*n)")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="CPU threads per instance (default: --cpus-per-instance)")
+    parser.add_argument("--load-concurrency", type=int, default=1)
+    parser.add_argument("--stagger-seconds", type=float, default=0.0)
+    parser.add_argument("--status-port", type=int, default=8990)
+    parser.add_argument("--stub-server", action="store_true",
+                        help="Launch the CPU-only stub server instead of moshi.server")
+    args = parser.parse_args()
+
+    if args.stub_server:
+        from .stub_server import manager_config
+        base = manager_config()
+    else:
+        base = ServerManagerConfig()
+    try:
+        specs = specs_from_args(args.ports, args.devices, args.cpus_per_instance, args.threads)
+    except ValueError as e:
+        parser.error(str(e))
+    fleet = MoshiFleet(FleetConfig(instances=specs, base=base,
+                                   load_concurrency=args.load_concurrency,
+                                   stagger_s=args.stagger_seconds))
+
+    app = fleet.build_app()
+
+    async def _start(app):
+        await fleet.start(wait=False)
+
+    async def _stop(app):
+        await fleet.stop()
+
+    app.on_startup.append(_start)
+    app.on_cleanup.append(_stop)
+    web.run_app(app, port=args.status_port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""Audio Framing — Re-framing and pacing of client-supplied audio.
+
+Clients send audio in arbitrary chunk sizes and encodings. These helpers turn
+an incremental byte stream into Moshi's 80ms / 1920-sample float32 frames
+with constant memory, and pace the frames into the agent at real-time rate.
+
+Pipeline (POST /api/voice/audio streaming mode):
+    request body chunks -> StreamDecoder -> PcmFramer -> FramePacer -> MoshiAgent
+
+Inside MoshiAgent, a per-session FrameCoalescer re-frames whatever send_audio
+receives into exact 1920-sample frames released on a steady 80ms cadence.
+"""
+
+import asyncio
+import bisect
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from conscious.tracing import NO_TRACE, SUBMIT, TRACER
+
+from .stream_protocol import AudioEncoding, decode_pcm
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+SAMPLE_RATE = 24000
+FRAME_SIZE = 1920  # 80ms at 24kHz
+
+_SAMPLE_DTYPES = {
+    AudioEncoding.F32: np.dtype("<f4"),
+    AudioEncoding.S16: np.dtype("<i2"),
+}
+
+
+class StreamDecoder:
+    """Incrementally decodes f32 / s16 / Ogg Opus bytes into float32 PCM.
+
+    Chunk boundaries may fall anywhere, including inside a sample; the
+    leftover bytes are carried over to the next chunk.
+    """
+
+    def __init__(self, encoding: AudioEncoding, sample_rate: int = SAMPLE_RATE):
+        self.encoding = encoding
+        self._remainder = b""
+        self._opus_reader = None
+        if encoding == AudioEncoding.OPUS:
+            if sphn is None:
+                raise ImportError(
+                    "sphn is required for Opus input: pip install moshi (includes sphn)")
+            self._opus_reader = sphn.OpusStreamReader(sample_rate)
+
+    def decode(self, chunk: bytes) -> np.ndarray:
+        if self._opus_reader is not None:
+            return np.asarray(self._opus_reader.append_bytes(chunk), dtype=np.float32).reshape(-1)
+
+        dtype = _SAMPLE_DTYPES[self.encoding]
+        if self._remainder:
+            chunk = self._remainder + chunk
+        usable = len(chunk) - len(chunk) % dtype.itemsize
+        self._remainder = chunk[usable:]
+        return decode_pcm(memoryview(chunk)[:usable], self.encoding)
+
+    @property
+    def bytes_per_frame(self) -> int:
+        """Read size that yields roughly one frame of audio."""
+        if self.encoding == AudioEncoding.OPUS:
+            return 1024
+        return FRAME_SIZE * _SAMPLE_DTYPES[self.encoding].itemsize
+
+
+class PcmFramer:
+    """Accumulates float32 PCM into fixed-size frames using one reusable buffer."""
+
+    def __init__(self, frame_size: int = FRAME_SIZE):
+        self.frame_size = frame_size
+        self._buf = np.zeros(frame_size, dtype=np.float32)
+        self._fill = 0
+
+    @property
+    def pending(self) -> int:
+        """Samples held in the partial frame."""
+        return self._fill
+
+    def push(self, pcm: np.ndarray) -> list[np.ndarray]:
+        """Append samples and return every frame completed by them."""
+        frames = []
+        pos = 0
+        n = len(pcm)
+        while pos < n:
+            take = min(self.frame_size - self._fill, n - pos)
+            self._buf[self._fill:self._fill + take] = pcm[pos:pos + take]
+            self._fill += take
+            pos += take
+            if self._fill == self.frame_size:
+                frames.append(self._buf.copy())
+                self._fill = 0
+        return frames
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Return the partial frame (unpadded), if any, and reset."""
+        if self._fill == 0:
+            return None
+        frame = self._buf[:self._fill].copy()
+        self._fill = 0
+        return frame
+
+
+class FramePacer:
+    """Releases frames no faster than real time.
+
+    The first frame goes out immediately; frame n is held until
+    start + n * frame_duration, so a burst of input becomes a steady stream.
+    """
+
+    def __init__(self, frame_duration: float = FRAME_SIZE / SAMPLE_RATE):
+        self.frame_duration = frame_duration
+        self._start: Optional[float] = None
+        self._count = 0
+
+    async def wait(self) -> None:
+        now = time.monotonic()
+        if self._start is None:
+            self._start = now
+        deadline = self._start + self._count * self.frame_duration
+        self._count += 1
+        if deadline > now:
+            await asyncio.sleep(deadline - now)
+
+
+# Upper bounds (in samples) of the input-size histogram buckets
+INPUT_SIZE_BUCKETS = (240, 480, 960, 1919, 1920, 3840, 9600)
+
+
+class FrameCoalescer:
+    """Re-frames arbitrary-size PCM chunks into exact frames on a steady cadence.
+
+    push() is called with whatever the client sent; pop() is called once per
+    cadence tick and returns at most one frame. A partial frame is held until
+    it completes or until hold_deadline_ms passes, after which it is padded
+    with silence (or, with pad_partial=False, held until more audio arrives).
+
+    At most max_frames complete frames are held. push() drops the oldest frame
+    when that backlog is full; callers that must not lose audio push no more
+    than room samples and wait for pop() to free space.
+
+    Also records the input chunk-size distribution and how long samples wait
+    in the coalescer before being released.
+    """
+
+    def __init__(self, frame_size: int = FRAME_SIZE, hold_deadline_ms: float = 40.0,
+                 pad_partial: bool = True, max_frames: int = 25, delay_window: int = 500):
+        self.frame_size = frame_size
+        self.hold_deadline = hold_deadline_ms / 1000
+        self.pad_partial = pad_partial
+        self._framer = PcmFramer(frame_size)
+        self._partial_since: Optional[float] = None
+        self._partial_trace = NO_TRACE
+        # (frame, time its first sample arrived, trace ID)
+        self._ready: deque = deque(maxlen=max_frames)
+        # Trace ID of the frame last returned by pop()
+        self.last_trace_id = NO_TRACE
+
+        self._input_sizes = [0] * (len(INPUT_SIZE_BUCKETS) + 1)
+        self._delays_ms: deque = deque(maxlen=delay_window)
+        self._max_delay_ms = 0.0
+        self._chunks_in = 0
+        self._samples_in = 0
+        self._frames_out = 0
+        self._frames_padded = 0
+        self._frames_dropped = 0
+
+    @property
+    def pending_frames(self) -> int:
+        return len(self._ready)
+
+    @property
+    def frames_dropped(self) -> int:
+        return self._frames_dropped
+
+    @property
+    def room(self) -> int:
+        """Samples push() can take before the backlog is full and frames drop."""
+        free = (self._ready.maxlen - len(self._ready)) * self.frame_size - self._framer.pending
+        return max(free, 0)
+
+    def push(self, pcm: np.ndarray, now: Optional[float] = None) -> None:
+        """Accept a chunk of any size."""
+        now = time.monotonic() if now is None else now
+        n = len(pcm)
+        self._chunks_in += 1
+        self._samples_in += n
+        self._input_sizes[bisect.bisect_left(INPUT_SIZE_BUCKETS, n)] += 1
+
+        pos = 0
+        while pos < n:
+            if self._framer.pending == 0:
+                self._partial_since = now
+                self._partial_trace = TRACER.begin()
+                TRACER.mark(self._partial_trace, SUBMIT)
+            take = min(self.frame_size - self._framer.pending, n - pos)
+            for frame in self._framer.push(pcm[pos:pos + take]):
+                if len(self._ready) == self._ready.maxlen:
+                    self._frames_dropped += 1
+                self._ready.append((frame, self._partial_since, self._partial_trace))
+                self._partial_since = None
+                self._partial_trace = NO_TRACE
+            pos += take
+
+    def pop(self, now: Optional[float] = None) -> Optional[np.ndarray]:
+        """Release the next frame for this tick, if one is due."""
+        now = time.monotonic() if now is None else now
+        if self._ready:
+            frame, since, trace_id = self._ready.popleft()
+        elif (self.pad_partial and self._framer.pending
+              and now - self._partial_since >= self.hold_deadline):
+            since = self._partial_since
+            trace_id = self._partial_trace
+            frame = np.zeros(self.frame_size, dtype=np.float32)
+            partial = self._framer.flush()
+            frame[:len(partial)] = partial
+            self._partial_since = None
+            self._partial_trace = NO_TRACE
+            self._frames_padded += 1
+        else:
+            return None
+
+        delay_ms = (now - since) * 1000
+        self._delays_ms.append(delay_ms)
+        if delay_ms > self._max_delay_ms:
+            self._max_delay_ms = delay_ms
+        self._frames_out += 1
+        self.last_trace_id = trace_id
+        return frame
+
+    def get_stats(self) -> dict:
+        """Input-size distribution and holding-delay statistics."""
+        labels = [f"<={b}" for b in INPUT_SIZE_BUCKETS] + [f">{INPUT_SIZE_BUCKETS[-1]}"]
+        delays = np.fromiter(self._delays_ms, dtype=np.float64)
+        return {
+            "chunks_in": self._chunks_in,
+            "samples_in": self._samples_in,
+            "avg_chunk_samples": (round(self._samples_in / self._chunks_in, 1)
+                                  if self._chunks_in else 0),
+            "input_sizes": dict(zip(labels, self._input_sizes)),
+            "frames_out": self._frames_out,
+            "frames_padded": self._frames_padded,
+            "frames_dropped": self._frames_dropped,
+            "pending_frames": len(self._ready),
+            "pending_samples": self._framer.pending,
+            "hold_ms": {
+                "p50": round(float(np.percentile(delays, 50)), 1) if len(delays) else 0.0,
+                "p95": round(float(np.percentile(delays, 95)), 1) if len(delays) else 0.0,
+                "max": round(self._max_delay_ms, 1),
+            },
+        }
+
+
+def encoding_from_request(content_type: str, query_encoding: Optional[str]) -> AudioEncoding:
+    """Pick the body encoding from ?encoding= or the Content-Type.
+
+    Raises:
+        ValueError: If the encoding is not f32, s16 or opus.
+    """
+    if query_encoding:
+        try:
+            return AudioEncoding(query_encoding)
+        except ValueError:
+            raise ValueError(f"Unsupported audio encoding: {query_encoding!r}") from None
+    if content_type in ("audio/ogg", "audio/opus"):
+        return AudioEncoding.OPUS
+    return AudioEncoding.F32
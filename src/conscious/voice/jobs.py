@@ -0,0 +1,507 @@
+"""Voice jobs — Bounded, prioritised queue for processing recorded clips.
+
+A job is one uploaded clip (WAV, Ogg Opus or raw f32/s16 PCM). It is stored
+under <job_dir>/<id>/ and processed by a pool of max_workers workers. The
+response audio and text tokens are streamed to <id>/out/clip.wav and
+<id>/out/clip.tokens.jsonl as they arrive.
+
+Scheduling:
+    - Jobs run highest priority first (high > normal > low), FIFO within a
+      priority.
+    - A can_run() gate keeps jobs off capacity that live traffic needs.
+      MoshiAgentAPI gates jobs that share the live Moshi server on the live
+      agent being disconnected. When a live session starts, running jobs are
+      preempted and requeued in their original place (held()).
+    - Submissions beyond max_queued are refused rather than buffered.
+
+Runners:
+    AgentJobRunner   — a dedicated MoshiAgent connection per job, audio sent
+                       unpaced (or paced with realtime=True)
+    EngineJobRunner  — a dedicated in-process engine via OfflineProcessor
+
+Usage:
+    queue = JobQueue(AgentJobRunner("ws://localhost:8998/api/chat"))
+    queue.start()
+    job = queue.create_job(priority="high", suffix=".wav")
+    job.input_path.write_bytes(data)
+    queue.enqueue(job)
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import shutil
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from conscious.metrics import REGISTRY
+
+from .framing import FRAME_SIZE, SAMPLE_RATE, FramePacer, PcmFramer
+from .offline import OfflineConfig, OfflineProcessor, ResultWriter, read_audio
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+INPUT_STEM = "clip"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+RECEIVING = "receiving"
+
+JOB_SECONDS_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+_JOBS = {
+    status: REGISTRY.counter("conscious_jobs_total", "Finished voice jobs by outcome",
+                             labels={"status": status})
+    for status in (DONE, FAILED, CANCELLED, "rejected", "preempted")
+}
+_JOB_WAIT_S = REGISTRY.histogram("conscious_job_wait_seconds", "Time voice jobs spent queued",
+                                 buckets=JOB_SECONDS_BUCKETS)
+_JOB_RUN_S = REGISTRY.histogram("conscious_job_run_seconds", "Voice job processing time",
+                                buckets=JOB_SECONDS_BUCKETS)
+_JOB_AUDIO_S = REGISTRY.counter("conscious_job_audio_seconds_total",
+                                "Input audio processed by voice jobs (seconds)")
+
+
+@dataclass
+class JobQueueConfig:
+    """Storage, concurrency and admission limits for the job queue."""
+    job_dir: str = "~/.conscious/jobs"
+    max_workers: int = 1
+    max_queued: int = 64
+    max_input_mb: float = 200.0
+    keep_finished: int = 200  # older finished jobs are forgotten and their files deleted
+    gate_poll_s: float = 0.5  # how often a blocked or running job re-checks can_run()
+    # Dedicated Moshi server for jobs; None shares the live server, and jobs
+    # then only run while the live agent is disconnected
+    server_ws_url: Optional[str] = None
+
+
+@dataclass
+class Job:
+    id: str
+    priority: str
+    dir: Path
+    input_path: Path
+    status: str = RECEIVING
+    submitted: float = 0.0
+    started: float = 0.0
+    finished: float = 0.0
+    attempts: int = 0
+    input_bytes: int = 0
+    result: dict = field(default_factory=dict)
+    error: Optional[str] = None
+    seq: int = 0  # submission order, kept across preemption
+
+    @property
+    def out_dir(self) -> Path:
+        return self.dir / "out"
+
+    @property
+    def active(self) -> bool:
+        return self.status in (RECEIVING, QUEUED, RUNNING)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "priority": self.priority,
+            "status": self.status,
+            "submitted": self.submitted,
+            "started": self.started or None,
+            "finished": self.finished or None,
+            "attempts": self.attempts,
+            "input_bytes": self.input_bytes,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Priority queue plus worker pool for voice jobs.
+
+    The runner is any object with `async run(job) -> dict` that reads
+    job.input_path and writes into job.out_dir.
+    """
+
+    def __init__(self, runner, config: Optional[JobQueueConfig] = None,
+                 can_run: Optional[Callable[[], bool]] = None):
+        self.runner = runner
+        self.config = config or JobQueueConfig()
+        self.can_run = can_run or (lambda: True)
+        self.root = Path(self.config.job_dir).expanduser()
+        self._jobs: dict[str, Job] = {}
+        self._heap: list[tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self._running: dict[str, asyncio.Task] = {}
+        self._workers: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._held = 0
+        self.completed = 0
+        self.audio_seconds = 0.0
+
+        for name in PRIORITIES:
+            REGISTRY.register_callback(
+                "conscious_jobs_queued", "Voice jobs waiting to run",
+                lambda q, name=name: q.queued(name), labels={"priority": name}, owner=self,
+            )
+        REGISTRY.register_callback("conscious_jobs_running", "Voice jobs being processed",
+                                   lambda q: len(q._running), owner=self)
+
+    # ── Lifecycle ────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Start the worker pool (needs a running event loop)."""
+        if self._workers:
+            return
+        self._wakeup = asyncio.Event()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.config.max_workers)
+        ]
+        logger.info(f"Job queue started ({self.config.max_workers} worker(s), {self.root})")
+
+    async def stop(self) -> None:
+        tasks = self._workers + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+
+    # ── Submission ───────────────────────────────────────────────
+
+    def create_job(self, priority: str = "normal", suffix: str = ".wav") -> Job:
+        """Reserve a job and its directory; the caller writes job.input_path.
+
+        Raises:
+            ValueError: If the priority is unknown.
+            RuntimeError: If the queue is full.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}")
+        waiting = sum(1 for job in self._jobs.values() if job.status in (RECEIVING, QUEUED))
+        if waiting >= self.config.max_queued:
+            _JOBS["rejected"].inc()
+            raise RuntimeError(f"Job queue is full ({self.config.max_queued} waiting)")
+
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = self.root / job_id
+        job_dir.mkdir(parents=True)
+        job = Job(id=job_id, priority=priority, dir=job_dir,
+                  input_path=job_dir / f"{INPUT_STEM}{suffix}", submitted=time.time())
+        self._jobs[job_id] = job
+        return job
+
+    def enqueue(self, job: Job) -> int:
+        """Queue a job whose input is on disk; returns its position in the queue.
+
+        Raises:
+            RuntimeError: If the job was cancelled while its input was uploading.
+        """
+        if job.status != RECEIVING or self._jobs.get(job.id) is not job:
+            raise RuntimeError(f"Job {job.id} was cancelled during upload")
+        job.status = QUEUED
+        job.input_bytes = job.input_path.stat().st_size
+        job.seq = next(self._seq)
+        heapq.heappush(self._heap, (PRIORITIES[job.priority], job.seq, job.id))
+        self._save(job)
+        self._wakeup.set()
+        return self.position(job)
+
+    def discard(self, job: Job) -> None:
+        """Forget a job that was never enqueued (e.g. its upload failed)."""
+        self._jobs.pop(job.id, None)
+        shutil.rmtree(job.dir, ignore_errors=True)
+
+    # ── Queries ──────────────────────────────────────────────────
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def queued(self, priority: Optional[str] = None) -> int:
+        return sum(1 for job in self._jobs.values()
+                   if job.status == QUEUED and priority in (None, job.priority))
+
+    def position(self, job: Job) -> int:
+        """0-based place among queued jobs (0 = next to run)."""
+        if job.status != QUEUED:
+            return 0
+        key = (PRIORITIES[job.priority], job.seq)
+        return sum(1 for other in self._jobs.values()
+                   if other.status == QUEUED and (PRIORITIES[other.priority], other.seq) < key)
+
+    def get_stats(self) -> dict:
+        return {
+            "queued": {name: self.queued(name) for name in PRIORITIES},
+            "running": len(self._running),
+            "workers": self.config.max_workers,
+            "completed": self.completed,
+            "audio_seconds": round(self.audio_seconds, 1),
+            "gate_open": self._held == 0 and self.can_run(),
+        }
+
+    # ── Cancellation / preemption ────────────────────────────────
+
+    async def cancel(self, job_id: str, delete: bool = True) -> bool:
+        """Cancel a job (queued or running); with delete, also forget it and its files."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        task = self._running.get(job_id)
+        if job.active:
+            job.status = CANCELLED
+            job.finished = time.time()
+            _JOBS[CANCELLED].inc()
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if delete:
+            self._jobs.pop(job_id, None)
+            shutil.rmtree(job.dir, ignore_errors=True)
+        else:
+            self._save(job)
+        return True
+
+    async def preempt(self) -> int:
+        """Requeue every running job, e.g. because a live session needs the server.
+
+        held() and a worker's gate check can call this concurrently: a job is
+        claimed by the call that still finds it RUNNING, so it is requeued once.
+        """
+        preempted = []
+        for job_id, task in self._running.items():
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == RUNNING and not task.done():
+                job.status = QUEUED
+                task.cancel()
+                preempted.append((job, task))
+        await asyncio.gather(*(task for _, task in preempted), return_exceptions=True)
+        requeued = 0
+        for job, _ in preempted:
+            if job.status != QUEUED:
+                continue  # cancelled while it was stopping
+            heapq.heappush(self._heap, (PRIORITIES[job.priority], job.seq, job.id))
+            self._save(job)
+            _JOBS["preempted"].inc()
+            requeued += 1
+        if requeued:
+            logger.info(f"Preempted {requeued} job(s) for live traffic")
+            self._wakeup.set()
+        return requeued
+
+    @asynccontextmanager
+    async def held(self):
+        """Preempt running jobs and start no new ones until the block exits.
+
+        Usage:
+            async with queue.held():
+                await live_agent.connect()   # can_run() turns False from here on
+        """
+        self._held += 1
+        try:
+            await self.preempt()
+            yield
+        finally:
+            self._held -= 1
+            if self._wakeup is not None:
+                self._wakeup.set()
+
+    # ── Workers ──────────────────────────────────────────────────
+
+    async def _next_job(self) -> Job:
+        while True:
+            while self._heap and self._jobs.get(self._heap[0][2], None) is None:
+                heapq.heappop(self._heap)
+            if self._heap and self._jobs[self._heap[0][2]].status != QUEUED:
+                heapq.heappop(self._heap)  # cancelled while waiting
+                continue
+            if self._heap and not self._held and self.can_run():
+                return self._jobs[heapq.heappop(self._heap)[2]]
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.config.gate_poll_s)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._next_job()
+            job.status = RUNNING
+            job.attempts += 1
+            job.started = time.time()
+            if job.attempts == 1:
+                _JOB_WAIT_S.observe(job.started - job.submitted)
+            self._save(job)
+            logger.info(f"Job {job.id} started ({job.priority}, attempt {job.attempts})")
+
+            task = asyncio.create_task(self._execute(job), name=f"job-{job.id}")
+            self._running[job.id] = task
+            try:
+                # Watch the gate while the job runs; live traffic takes the capacity back
+                while not task.done():
+                    await asyncio.wait({task}, timeout=self.config.gate_poll_s)
+                    if not task.done() and (self._held or not self.can_run()):
+                        await self.preempt()
+            finally:
+                self._running.pop(job.id, None)
+            self._evict_finished()
+
+    async def _execute(self, job: Job) -> None:
+        job.out_dir.mkdir(exist_ok=True)
+        start = time.perf_counter()
+        try:
+            result = await self.runner.run(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            _JOBS[FAILED].inc()
+            logger.error(f"Job {job.id} failed: {e}")
+        else:
+            job.status = DONE
+            job.result = result
+            self.completed += 1
+            seconds = result.get("input_seconds", 0.0)
+            self.audio_seconds += seconds
+            _JOBS[DONE].inc()
+            _JOB_AUDIO_S.inc(seconds)
+            logger.info(f"Job {job.id} done in {time.perf_counter() - start:.1f}s "
+                        f"({seconds:.1f}s of audio)")
+        finally:
+            if job.status in (DONE, FAILED):
+                job.finished = time.time()
+                _JOB_RUN_S.observe(time.perf_counter() - start)
+                self._save(job)
+
+    def _save(self, job: Job) -> None:
+        try:
+            (job.dir / "job.json").write_text(json.dumps(job.to_dict()), encoding="utf-8")
+        except OSError as e:
+            logger.warning(f"Could not save job {job.id}: {e}")
+
+    def _evict_finished(self) -> None:
+        finished = [job for job in self._jobs.values() if not job.active]
+        for job in finished[:max(0, len(finished) - self.config.keep_finished)]:
+            self._jobs.pop(job.id, None)
+            shutil.rmtree(job.dir, ignore_errors=True)
+
+
+def input_suffix(content_type: str, fmt: Optional[str] = None) -> str:
+    """File suffix for an uploaded clip, from ?format= / ?encoding= or the Content-Type.
+
+    Raises:
+        ValueError: If the format is not wav, opus, f32 or s16.
+    """
+    if fmt:
+        if fmt not in ("wav", "opus", "f32", "s16"):
+            raise ValueError(f"Unsupported clip format: {fmt!r} (wav, opus, f32 or s16)")
+        return f".{fmt}"
+    if content_type in ("audio/wav", "audio/x-wav", "audio/wave"):
+        return ".wav"
+    if content_type in ("audio/ogg", "audio/opus"):
+        return ".opus"
+    return ".f32"
+
+
+# ── Runners ──────────────────────────────────────────────────────
+
+class AgentJobRunner:
+    """Processes a job over its own MoshiAgent connection to a Moshi server."""
+
+    def __init__(self, server_ws_url: str, realtime: bool = False,
+                 tail_seconds: float = 1.0, idle_timeout: float = 3.0):
+        self.server_ws_url = server_ws_url
+        self.realtime = realtime
+        self.tail_seconds = tail_seconds
+        self.idle_timeout = idle_timeout
+
+    async def run(self, job: Job) -> dict:
+        from .moshi_agent import AgentConfig, MoshiAgent
+
+        agent = MoshiAgent(AgentConfig(
+            server_ws_url=self.server_ws_url, coalesce_frames=False, auto_reconnect=False,
+            metrics_role=None,
+        ))
+        writer = ResultWriter(job.out_dir, INPUT_STEM)
+        agent.on_audio_received = writer.write_audio
+        agent.on_text_received = lambda text: writer.write_text(
+            agent.stats.total_audio_received, text
+        )
+        if not await agent.connect():
+            writer.close()
+            raise RuntimeError(f"Could not connect to {self.server_ws_url}")
+
+        frames = 0
+        try:
+            pacer = FramePacer() if self.realtime else None
+            framer = PcmFramer()
+            tail = [np.zeros(int(self.tail_seconds * SAMPLE_RATE), dtype=np.float32)]
+            for chunk in itertools.chain(read_audio(job.input_path, chunk_seconds=1.0), tail):
+                for frame in framer.push(chunk):
+                    if pacer:
+                        await pacer.wait()
+                    await agent.send_audio(frame)
+                    frames += 1
+                await asyncio.sleep(0)  # let replies in between chunks
+            partial = framer.flush()
+            if partial is not None:
+                await agent.send_audio(np.pad(partial, (0, FRAME_SIZE - len(partial))))
+                frames += 1
+
+            # One reply packet per frame; stop early if the server goes quiet
+            last_count, last_change = -1, time.monotonic()
+            while agent.stats.total_audio_received < frames:
+                count = agent.stats.total_audio_received
+                if count != last_count:
+                    last_count, last_change = count, time.monotonic()
+                elif time.monotonic() - last_change > self.idle_timeout:
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await agent.disconnect()
+            result = writer.close()
+
+        tail_frames = int(self.tail_seconds * SAMPLE_RATE) // FRAME_SIZE
+        return {
+            "input_seconds": round(max(0, frames - tail_frames) * FRAME_SIZE / SAMPLE_RATE, 3),
+            "frames_sent": frames,
+            "packets_received": agent.stats.total_audio_received,
+            **result,
+        }
+
+
+class EngineJobRunner:
+    """Processes jobs on a dedicated in-process engine, one at a time, in a thread.
+
+    A cancelled job's engine work still runs to the end of its file in the
+    worker thread; the lock keeps the next job off the engine until then.
+    """
+
+    def __init__(self, engine, config: Optional[OfflineConfig] = None):
+        self.processor = OfflineProcessor(engine, config or OfflineConfig(batch_size=1))
+        self._lock = threading.Lock()
+
+    def _run(self, job: Job) -> dict:
+        with self._lock:
+            return self.processor.run([str(job.input_path)], str(job.out_dir))
+
+    async def run(self, job: Job) -> dict:
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(None, self._run, job)
+        return report["files"][0]
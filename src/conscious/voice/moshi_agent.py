@@ -16,6 +16,12 @@ Features:
     - Exponential backoff on connection failures
     - Audio I/O abstracted via callbacks (pluggable for Super-Goose)
     - Text token streaming for real-time transcription
+    - Opus passthrough: raw server packets via on_opus_received, with
+      decoding skipped entirely when no PCM consumer is attached
+    - Frame coalescing: arbitrary-size input re-framed into exact 80ms
+      frames sent on a steady cadence
+    - Session recording: every WebSocket message in both directions
+      appended to record_path for offline replay (see session_log)
 """
 
 import asyncio
@@ -39,8 +45,28 @@ try:
 except ImportError:
     aiohttp = None
 
+from conscious.metrics import REGISTRY
+from conscious.tracing import (
+    AGENT_DEQUEUE,
+    DELIVERED,
+    NO_TRACE,
+    OPUS_DECODED,
+    OPUS_ENCODED,
+    SUBMIT,
+    TRACER,
+    WS_RECEIVED,
+    WS_SENT,
+)
+
+from .framing import FrameCoalescer
+from .stream_protocol import opus_header_pages
+
 logger = logging.getLogger(__name__)
 
+_LATENCY_MS = REGISTRY.histogram(
+    "conscious_agent_latency_ms", "Time from last audio sent to audio received (ms)"
+)
+
 # Moshi WebSocket message types
 MSG_HANDSHAKE = 0x00
 MSG_AUDIO = 0x01
@@ -71,6 +97,17 @@ class AgentConfig:
     reconnect_backoff_max: float = 30.0
     audio_send_interval_ms: float = 80.0
     silence_frame_size: int = 1920
+    coalesce_frames: bool = True
+    coalesce_hold_ms: float = 40.0
+    coalesce_pad_partial: bool = True
+    coalesce_max_frames: int = 25
+    # True: a full coalescer backlog drops its oldest frames instead of making
+    # send_audio wait (lossy; only for live sources where stale audio is useless)
+    coalesce_drop_oldest: bool = False
+    record_path: Optional[str] = None  # append all WS traffic here (see session_log)
+    # role label on the conscious_agent_* series; None keeps a short-lived agent
+    # (clip job, replay) out of /metrics so it can't take over the live agent's series
+    metrics_role: Optional[str] = "live"
 
 
 @dataclass
@@ -97,6 +134,9 @@ class MoshiAgent:
         agent.on_audio_received = my_audio_handler    # async fn(pcm: np.ndarray)
         agent.on_text_received = my_text_handler      # async fn(text: str)
 
+        # Or receive the server's Opus packets untouched (no decode cost)
+        agent.on_opus_received = my_opus_handler      # async fn(opus_bytes: bytes)
+
         await agent.connect()
 
         # Send audio frames (from mic, file, or Super-Goose pipeline)
@@ -111,6 +151,11 @@ class MoshiAgent:
         When latency exceeds the threshold, the agent automatically
         disconnects and reconnects, resetting the server's KV cache.
         This restores instant response times.
+
+    Opus passthrough:
+        Packets are only decoded to PCM while on_audio_received is set.
+        A PCM consumer attached mid-session gets a decoder primed with the
+        session's Opus header pages (see opus_headers).
     """
 
     def __init__(self, config: Optional[AgentConfig] = None):
@@ -125,17 +170,30 @@ class MoshiAgent:
         self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
         self._opus_writer: Optional[sphn.OpusStreamWriter] = None
         self._opus_reader: Optional[sphn.OpusStreamReader] = None
+        self._opus_headers = b""
+        self._opus_reader_stale = False
         self._stats = AgentStats()
         self._latency_history: deque = deque(maxlen=self.config.latency_check_window)
+        self._latency_sum = 0.0
         self._reconnect_count = 0
         self._stop_event = asyncio.Event()
         self._recv_task: Optional[asyncio.Task] = None
         self._latency_task: Optional[asyncio.Task] = None
+        self._send_task: Optional[asyncio.Task] = None
+        self._coalescer: Optional[FrameCoalescer] = None
+        self._coalescer_room = asyncio.Event()  # set on every send-loop tick
+        self._last_sent_trace = NO_TRACE
+        self._frame_budget_ms = self.config.audio_send_interval_ms
+        self._recorder = None  # session_log.SessionRecorder while recording
 
         # Pluggable callbacks — set these for Super-Goose integration
         self.on_audio_received: Optional[Callable] = None
+        self.on_opus_received: Optional[Callable] = None
         self.on_text_received: Optional[Callable] = None
         self.on_state_change: Optional[Callable] = None
+        self.on_latency_sample: Optional[Callable[[float], None]] = None  # sync fn(ms)
+
+        self._register_metrics()
 
     @property
     def state(self) -> AgentState:
@@ -145,15 +203,52 @@ class MoshiAgent:
     def stats(self) -> AgentStats:
         return self._stats
 
+    @property
+    def opus_headers(self) -> bytes:
+        """OpusHead/OpusTags Ogg pages of the current server session."""
+        return self._opus_headers
+
     @property
     def is_connected(self) -> bool:
         return self._state == AgentState.STREAMING
 
+    def get_coalescer_stats(self) -> Optional[dict]:
+        """Input framing statistics for the current session (None if disabled)."""
+        return self._coalescer.get_stats() if self._coalescer else None
+
+    def _register_metrics(self) -> None:
+        """Export AgentStats and state at scrape time, labelled with config.metrics_role."""
+        role = self.config.metrics_role
+        if role is None:
+            return
+        for name, help, fn in (
+            ("conscious_agent_audio_samples_sent_total", "PCM samples sent to the server",
+             lambda a: a._stats.total_audio_sent),
+            ("conscious_agent_audio_packets_received_total", "Audio packets received",
+             lambda a: a._stats.total_audio_received),
+            ("conscious_agent_text_tokens_total", "Text tokens received",
+             lambda a: a._stats.total_text_tokens),
+            ("conscious_agent_reconnects_total", "Automatic reconnects",
+             lambda a: a._stats.reconnect_count),
+        ):
+            REGISTRY.register_callback(name, help, fn, kind="counter",
+                                       labels={"role": role}, owner=self)
+        REGISTRY.register_callback(
+            "conscious_agent_avg_latency_ms", "Rolling average agent latency (ms)",
+            lambda a: a._stats.avg_latency_ms, labels={"role": role}, owner=self,
+        )
+        for state in AgentState:
+            REGISTRY.register_callback(
+                "conscious_agent_state", "1 for the agent's current state",
+                lambda a, state=state: int(a._state == state),
+                labels={"role": role, "state": state.value}, owner=self,
+            )
+
     def _set_state(self, state: AgentState) -> None:
         old = self._state
         self._state = state
         if old != state:
-            logger.info(f"Agent state: {old.value} -> {state.value}")
+            logger.info("Agent state: %s -> %s", old.value, state.value)
             if self.on_state_change:
                 try:
                     self.on_state_change(state)
@@ -189,22 +284,50 @@ class MoshiAgent:
                 self._set_state(AgentState.ERROR)
                 return False
 
+            if self.config.record_path:
+                if self._recorder is None:
+                    # Imported here so `python -m conscious.voice.session_log` stays clean
+                    from .session_log import SessionRecorder
+                    self._recorder = SessionRecorder(self.config.record_path, {
+                        "url": self.config.server_ws_url,
+                        "sample_rate": self.config.sample_rate,
+                    })
+                self._recorder.connect()
+                self._recorder.received(msg.data)
+
             # Initialize opus codec
             self._opus_writer = sphn.OpusStreamWriter(self.config.sample_rate)
             self._opus_reader = sphn.OpusStreamReader(self.config.sample_rate)
+            self._opus_headers = b""
+            self._opus_reader_stale = False
 
             # Reset stats for new session
             self._stats.session_start = time.time()
             self._latency_history.clear()
+            self._latency_sum = 0.0
+
+            if self.config.coalesce_frames:
+                self._coalescer = FrameCoalescer(
+                    frame_size=self.config.silence_frame_size,
+                    hold_deadline_ms=self.config.coalesce_hold_ms,
+                    pad_partial=self.config.coalesce_pad_partial,
+                    max_frames=self.config.coalesce_max_frames,
+                )
 
             self._set_state(AgentState.STREAMING)
 
             # Start background receive loop
-            self._recv_task = asyncio.create_task(self._receive_loop())
+            self._recv_task = asyncio.create_task(self._receive_loop(), name="agent-receive")
+
+            # Start steady-cadence sender (survives reconnects)
+            if self._coalescer and (self._send_task is None or self._send_task.done()):
+                self._send_task = asyncio.create_task(self._send_loop(), name="agent-send")
 
             # Start latency monitor
             if self.config.auto_reconnect:
-                self._latency_task = asyncio.create_task(self._latency_monitor())
+                self._latency_task = asyncio.create_task(
+                    self._latency_monitor(), name="agent-latency"
+                )
 
             self._reconnect_count = 0
             logger.info(f"Connected to {self.config.server_ws_url}")
@@ -234,29 +357,92 @@ class MoshiAgent:
             except asyncio.CancelledError:
                 pass
 
+        if self._send_task and not self._send_task.done():
+            self._send_task.cancel()
+            try:
+                await self._send_task
+            except asyncio.CancelledError:
+                pass
+
         await self._cleanup()
+        if self._recorder is not None:
+            # Kept open: the next connect() appends a new segment to the same file
+            self._recorder.flush()
         self._set_state(AgentState.DISCONNECTED)
         logger.info("Disconnected from server")
 
-    async def send_audio(self, pcm: np.ndarray) -> None:
+    def close_recording(self) -> None:
+        """Close the session recording (if any); a later connect() starts a new file."""
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    async def send_audio(self, pcm: np.ndarray) -> int:
         """Send PCM audio to the server.
 
+        With coalesce_frames enabled the audio is queued and sent as exact
+        80ms frames on the send cadence; otherwise it is encoded immediately.
+        Once coalesce_max_frames are queued, this waits for the send loop to
+        make room, so bulk input is paced at real time rather than dropped
+        (unless coalesce_drop_oldest is set).
+
         Args:
             pcm: Float32 mono audio at 24kHz. Any length.
+
+        Returns:
+            Number of samples accepted. Less than len(pcm) if the agent stopped
+            streaming part-way, or if coalesce_drop_oldest discarded frames.
         """
         if self._state != AgentState.STREAMING or self._ws is None:
-            return
-
+            return 0
+
+        coalescer = self._coalescer
+        if coalescer is not None:
+            pcm = np.asarray(pcm, dtype=np.float32).reshape(-1)
+            if self.config.coalesce_drop_oldest:
+                dropped = coalescer.frames_dropped
+                coalescer.push(pcm)
+                lost = (coalescer.frames_dropped - dropped) * coalescer.frame_size
+                return max(len(pcm) - lost, 0)
+            pos = 0
+            while pos < len(pcm):
+                room = coalescer.room
+                if room == 0:
+                    self._coalescer_room.clear()
+                    await self._coalescer_room.wait()
+                    if self._coalescer is not coalescer or self._state != AgentState.STREAMING:
+                        break
+                    continue
+                coalescer.push(pcm[pos:pos + room])
+                pos += room
+            return pos
+
+        trace_id = TRACER.begin()
+        TRACER.mark(trace_id, SUBMIT)
+        TRACER.mark(trace_id, AGENT_DEQUEUE)
+        return len(pcm) if await self._send_pcm(pcm, trace_id) else 0
+
+    async def _send_pcm(self, pcm: np.ndarray, trace_id: int = NO_TRACE) -> bool:
+        """Opus-encode PCM and send whatever packets come out; False on error."""
         try:
             opus_bytes = self._opus_writer.append_pcm(pcm.astype(np.float32))
+            TRACER.mark(trace_id, OPUS_ENCODED)
             if len(opus_bytes) > 0:
-                await self._ws.send_bytes(bytes([MSG_AUDIO]) + opus_bytes)
+                data = bytes([MSG_AUDIO]) + opus_bytes
+                await self._ws.send_bytes(data)
+                if self._recorder is not None:
+                    self._recorder.sent(data)
                 self._stats.total_audio_sent += len(pcm)
                 self._stats.last_audio_sent = time.time()
+                TRACER.mark(trace_id, WS_SENT)
+                TRACER.check_deadline(trace_id, AGENT_DEQUEUE, WS_SENT, self._frame_budget_ms)
+                self._last_sent_trace = trace_id
+            return True
         except Exception as e:
             logger.error(f"Error sending audio: {e}")
             if self.config.auto_reconnect:
                 await self._auto_reconnect()
+            return False
 
     async def send_silence(self, duration_ms: float = 80.0) -> None:
         """Send a silence frame to keep the connection alive.
@@ -299,6 +485,29 @@ class MoshiAgent:
         finally:
             await self.disconnect()
 
+    async def _send_loop(self) -> None:
+        """Background task: release one coalesced frame per cadence tick."""
+        interval = self.config.audio_send_interval_ms / 1000
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif delay < -interval:
+                # Fell behind (e.g. event loop stall): resync instead of bursting
+                next_tick = time.monotonic()
+
+            if self._state != AgentState.STREAMING or self._coalescer is None:
+                self._coalescer_room.set()
+                continue
+            frame = self._coalescer.pop()
+            self._coalescer_room.set()
+            if frame is not None:
+                trace_id = self._coalescer.last_trace_id
+                TRACER.mark(trace_id, AGENT_DEQUEUE)
+                await self._send_pcm(frame, trace_id)
+
     async def _receive_loop(self) -> None:
         """Background task: receive audio and text from the server."""
         try:
@@ -307,6 +516,8 @@ class MoshiAgent:
                     break
 
                 if msg.type == aiohttp.WSMsgType.BINARY:
+                    if self._recorder is not None:
+                        self._recorder.received(msg.data)
                     if len(msg.data) == 0:
                         continue
 
@@ -316,17 +527,46 @@ class MoshiAgent:
                     if kind == MSG_AUDIO:
                         self._stats.last_audio_received = time.time()
                         self._stats.total_audio_received += 1
+                        trace_id = self._last_sent_trace
+                        TRACER.mark_once(trace_id, WS_RECEIVED)
 
                         # Track latency
                         if self._stats.last_audio_sent > 0:
                             latency = (self._stats.last_audio_received - self._stats.last_audio_sent) * 1000
+                            # Running sum: O(1) rolling average per packet
+                            if len(self._latency_history) == self._latency_history.maxlen:
+                                self._latency_sum -= self._latency_history[0]
                             self._latency_history.append(latency)
+                            self._latency_sum += latency
                             self._stats.current_latency_ms = latency
-                            if self._latency_history:
-                                self._stats.avg_latency_ms = sum(self._latency_history) / len(self._latency_history)
+                            self._stats.avg_latency_ms = (
+                                self._latency_sum / len(self._latency_history))
+                            _LATENCY_MS.observe(latency)
+                            if self.on_latency_sample:
+                                self.on_latency_sample(latency)
+
+                        if not self._opus_headers:
+                            self._opus_headers = opus_header_pages(payload)
+
+                        # Forward the server's Opus bytes untouched
+                        if self.on_opus_received:
+                            try:
+                                result = self.on_opus_received(payload)
+                                if asyncio.iscoroutine(result):
+                                    await result
+                            except Exception as e:
+                                logger.error(f"Opus callback error: {e}")
+
+                        # Decode opus to PCM only when someone consumes it
+                        if self.on_audio_received is None:
+                            self._opus_reader_stale = True
+                            TRACER.mark_once(trace_id, DELIVERED)
+                            continue
+                        if self._opus_reader_stale:
+                            self._prime_opus_reader()
 
-                        # Decode opus to PCM
                         pcm = self._opus_reader.append_bytes(payload)
+                        TRACER.mark_once(trace_id, OPUS_DECODED)
                         if pcm.shape[-1] > 0 and self.on_audio_received:
                             try:
                                 result = self.on_audio_received(pcm)
@@ -334,6 +574,7 @@ class MoshiAgent:
                                     await result
                             except Exception as e:
                                 logger.error(f"Audio callback error: {e}")
+                        TRACER.mark_once(trace_id, DELIVERED)
 
                     elif kind == MSG_TEXT:
                         text = payload.decode("utf-8")
@@ -359,6 +600,13 @@ class MoshiAgent:
         if not self._stop_event.is_set() and self.config.auto_reconnect:
             await self._auto_reconnect()
 
+    def _prime_opus_reader(self) -> None:
+        """Start a fresh decoder after skipped packets, fed the session headers."""
+        self._opus_reader = sphn.OpusStreamReader(self.config.sample_rate)
+        if self._opus_headers:
+            self._opus_reader.append_bytes(self._opus_headers)
+        self._opus_reader_stale = False
+
     async def _latency_monitor(self) -> None:
         """Background task: monitor latency and trigger reconnect if degraded."""
         while not self._stop_event.is_set():
@@ -408,6 +656,8 @@ class MoshiAgent:
 
     async def _cleanup(self) -> None:
         """Close WebSocket and session."""
+        if self._recorder is not None and self._ws is not None:
+            self._recorder.disconnect()
         try:
             if self._ws and not self._ws.closed:
                 await self._ws.close()
@@ -424,3 +674,5 @@ class MoshiAgent:
 
         self._opus_writer = None
         self._opus_reader = None
+        self._coalescer = None
+        self._coalescer_room.set()  # release send_audio callers waiting for room
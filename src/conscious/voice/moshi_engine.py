@@ -5,6 +5,10 @@ and LM generation via Moshi. Designed for full-duplex conversation.
 
 Architecture:
     Mic -> AudioStream -> Mimi.encode -> LMGen.step -> Mimi.decode -> Speaker
+
+process_batch() runs B independent streams per step (streaming(batch_size=B))
+with numpy in/out and the step's text tokens; conscious.voice.offline uses
+it to push files through the model with no real-time pacing.
 """
 
 import logging
@@ -14,6 +18,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
 # Official Moshi env vars (moshi/utils/compile.py) + generic torch dynamo disable
 # Required on Windows + Python 3.13 where triton is incompatible
 os.environ.setdefault("NO_TORCH_COMPILE", "1")
@@ -22,11 +28,23 @@ os.environ.setdefault("TORCHDYNAMO_DISABLE", "1")
 
 import torch
 
-from huggingface_hub import hf_hub_download
-from moshi.models import loaders, LMGen
+from conscious.metrics import REGISTRY
+from conscious.tracing import DECODE_END, DECODE_START, ENCODE_START, LM_START, NO_TRACE, TRACER
 
 logger = logging.getLogger(__name__)
 
+_STAGE_MS = {
+    stage: REGISTRY.histogram(
+        "conscious_engine_stage_ms", "MoshiEngine per-frame stage time (ms)",
+        labels={"stage": stage},
+    )
+    for stage in ("encode", "lm_step", "decode", "total")
+}
+_FRAMES = REGISTRY.counter("conscious_engine_frames_total", "Frames processed by MoshiEngine")
+_FRAMES_OVER_BUDGET = REGISTRY.counter(
+    "conscious_engine_frames_over_budget_total", "Frames whose processing exceeded the frame budget"
+)
+
 
 @dataclass
 class MoshiConfig:
@@ -61,14 +79,17 @@ class MoshiEngine:
         self._mimi = None
         self._moshi_lm = None
         self._lm_gen = None
+        self._text_tokenizer = None
         self._loaded = False
         self._streaming = False
+        self._last_tokens = None
 
         # Performance tracking
         self._frame_count = 0
         self._total_encode_ms = 0.0
         self._total_step_ms = 0.0
         self._total_decode_ms = 0.0
+        self._frame_budget_ms = self.config.frame_size / self.config.sample_rate * 1000
 
     @property
     def is_loaded(self) -> bool:
@@ -78,8 +99,20 @@ class MoshiEngine:
     def is_streaming(self) -> bool:
         return self._streaming
 
+    @property
+    def last_text_token(self) -> Optional[int]:
+        """Text token of the last processed frame (stream 0), None during warmup."""
+        if self._last_tokens is None:
+            return None
+        return self.get_text_token(self._last_tokens)
+
     def load_models(self) -> None:
         """Download (if needed) and load Mimi codec + Moshi LM."""
+        # Imported here: moshi and huggingface_hub add seconds to import time
+        # and are only needed once, for loading
+        from huggingface_hub import hf_hub_download
+        from moshi.models import LMGen, loaders
+
         device = self.config.device
         if device == "cuda" and not torch.cuda.is_available():
             logger.warning("CUDA not available, falling back to CPU")
@@ -104,28 +137,66 @@ class MoshiEngine:
         )
         logger.info(f"Moshi LM loaded in {time.time() - start:.1f}s")
 
+        import sentencepiece
+        tokenizer_path = hf_hub_download(loaders.DEFAULT_REPO, loaders.TEXT_TOKENIZER_NAME)
+        self._text_tokenizer = sentencepiece.SentencePieceProcessor(tokenizer_path)
+
         self._loaded = True
         logger.info("All models loaded successfully")
 
-    def streaming(self):
+    def streaming(self, batch_size: int = 1):
         """Context manager for streaming mode.
 
         Must be entered before calling process_frame().
         Sets up streaming state for both Mimi and Moshi LM.
+
+        Args:
+            batch_size: Independent streams processed per step (process_batch).
         """
-        return _StreamingContext(self)
+        return _StreamingContext(self, batch_size)
 
-    def process_frame(self, audio_in: torch.Tensor) -> Optional[torch.Tensor]:
+    def process_frame(self, audio_in: torch.Tensor,
+                      trace_id: int = NO_TRACE) -> Optional[torch.Tensor]:
         """Process one audio frame through the full pipeline.
 
         Args:
             audio_in: Input audio tensor [B=1, C=1, T=frame_size] at 24kHz.
                       Must be exactly frame_size (1920) samples.
+            trace_id: Frame trace ID (see conscious.tracing) to stamp stages on.
 
         Returns:
             Output audio tensor [B=1, C=1, T] or None if LM hasn't started
             producing output yet (initial warmup frames).
         """
+        audio_out, _ = self._step(audio_in, trace_id)
+        return audio_out
+
+    def process_batch(self, pcm: np.ndarray) -> tuple[Optional[np.ndarray], Optional[list]]:
+        """Process one frame for each of the B streams opened by streaming(batch_size=B).
+
+        Args:
+            pcm: Float32 array [B, frame_size] at 24kHz.
+
+        Returns:
+            (audio [B, T] float32, text token ids [B]), or (None, None) while
+            the LM is still warming up.
+        """
+        audio_in = torch.from_numpy(np.ascontiguousarray(pcm, dtype=np.float32))[:, None, :]
+        audio_out, tokens_out = self._step(audio_in)
+        if audio_out is None:
+            return None, None
+        audio = audio_out[:, 0].float().cpu().numpy()
+        return audio, tokens_out[:, 0, 0].tolist()
+
+    def decode_text_token(self, token: int) -> Optional[str]:
+        """Text piece for an LM text token, or None for padding / end-of-padding."""
+        if token in (0, 3) or self._text_tokenizer is None:
+            return None
+        return self._text_tokenizer.id_to_piece(token).replace("\u2581", " ")
+
+    def _step(self, audio_in: torch.Tensor,
+              trace_id: int = NO_TRACE) -> tuple[Optional[torch.Tensor], Optional[torch.Tensor]]:
+        """Encode, LM step and decode one frame; returns (audio_out, tokens_out)."""
         if not self._streaming:
             raise RuntimeError("Must be in streaming mode. Use `with engine.streaming():`")
 
@@ -154,17 +225,36 @@ class MoshiEngine:
                 # tokens_out[:, 1:] = audio tokens (8 codebooks)
                 audio_out = self._mimi.decode(tokens_out[:, 1:])  # [B, C=1, T]
         t3 = time.perf_counter()
+        self._last_tokens = tokens_out
 
         # Track performance
+        encode_ms = (t1 - t0) * 1000
+        step_ms = (t2 - t1) * 1000
+        decode_ms = (t3 - t2) * 1000
         self._frame_count += 1
-        self._total_encode_ms += (t1 - t0) * 1000
-        self._total_step_ms += (t2 - t1) * 1000
-        self._total_decode_ms += (t3 - t2) * 1000
+        self._total_encode_ms += encode_ms
+        self._total_step_ms += step_ms
+        self._total_decode_ms += decode_ms
+
+        total_ms = (t3 - t0) * 1000
+        _STAGE_MS["encode"].observe(encode_ms)
+        _STAGE_MS["lm_step"].observe(step_ms)
+        _STAGE_MS["decode"].observe(decode_ms)
+        _STAGE_MS["total"].observe(total_ms)
+        _FRAMES.inc()
+        if total_ms > self._frame_budget_ms:
+            _FRAMES_OVER_BUDGET.inc()
+
+        if trace_id >= 0:
+            TRACER.mark(trace_id, ENCODE_START, int(t0 * 1e9))
+            TRACER.mark(trace_id, LM_START, int(t1 * 1e9))
+            TRACER.mark(trace_id, DECODE_START, int(t2 * 1e9))
+            TRACER.mark(trace_id, DECODE_END, int(t3 * 1e9))
 
         if self._frame_count % 100 == 0:
             self._log_performance()
 
-        return audio_out
+        return audio_out, tokens_out
 
     def get_text_token(self, tokens_out: torch.Tensor) -> int:
         """Extract text token from LM output for personality/context use.
@@ -224,8 +314,9 @@ class MoshiEngine:
 class _StreamingContext:
     """Context manager that sets up Mimi + LMGen streaming state."""
 
-    def __init__(self, engine: MoshiEngine):
+    def __init__(self, engine: MoshiEngine, batch_size: int = 1):
         self._engine = engine
+        self._batch_size = batch_size
         self._mimi_ctx = None
         self._lm_ctx = None
 
@@ -235,15 +326,15 @@ class _StreamingContext:
         if self._engine._streaming:
             raise RuntimeError("Already in streaming mode.")
 
-        self._mimi_ctx = self._engine._mimi.streaming(batch_size=1)
-        self._lm_ctx = self._engine._lm_gen.streaming(batch_size=1)
+        self._mimi_ctx = self._engine._mimi.streaming(batch_size=self._batch_size)
+        self._lm_ctx = self._engine._lm_gen.streaming(batch_size=self._batch_size)
 
         self._mimi_ctx.__enter__()
         self._lm_ctx.__enter__()
 
         self._engine._streaming = True
         self._engine.reset_stats()
-        logger.info("Streaming mode started")
+        logger.info(f"Streaming mode started (batch_size={self._batch_size})")
         return self._engine
 
     def __exit__(self, exc_type, exc_val, exc_tb):
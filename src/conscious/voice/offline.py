@@ -0,0 +1,339 @@
+"""Offline processing — Push audio files through MoshiEngine as fast as it can step.
+
+The live paths are paced by wall-clock audio; this one is not. Each input
+file is read in chunks (WAV through a read-only memory map, Ogg Opus
+decoded incrementally), cut into 80ms frames and fed to the engine back to
+back. For every input the response audio is written to <stem>.wav and the
+text tokens, stamped with their position in the stream, to
+<stem>.tokens.jsonl.
+
+Batching: with batch_size=B the engine runs B streams per step
+(MoshiEngine.streaming(batch_size=B)), one file per slot. Files are taken in
+waves of B. A slot whose file ends early is fed silence until the longest
+file in its wave finishes, and its output is discarded. The next wave then
+starts with fresh streaming state, so files never share model context.
+
+Usage:
+    conscious offline a.wav b.opus c.wav -o out/ --batch-size 4
+
+    engine = MoshiEngine(); engine.load_models()
+    report = OfflineProcessor(engine, OfflineConfig(batch_size=4)).run(paths, "out/")
+"""
+
+import json
+import logging
+import mmap
+import struct
+import time
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+from .framing import FRAME_SIZE, SAMPLE_RATE, PcmFramer
+
+logger = logging.getLogger(__name__)
+
+FRAME_S = FRAME_SIZE / SAMPLE_RATE
+OPUS_SUFFIXES = (".opus", ".ogg")
+RAW_DTYPES = {".f32": "<f4", ".s16": "<i2"}  # headerless 24kHz mono PCM
+
+
+@dataclass
+class OfflineConfig:
+    """Batching and I/O settings for offline processing."""
+    batch_size: int = 1
+    chunk_seconds: float = 10.0  # input read granularity
+    tail_seconds: float = 1.0  # silence appended so the LM can finish its reply
+
+
+# ── Input ────────────────────────────────────────────────────────
+
+_WAV_DTYPES = {
+    (1, 16): "<i2",
+    (1, 32): "<i4",
+    (3, 32): "<f4",
+    (3, 64): "<f8",
+}
+_WAV_SCALE = {"<i2": 1 / 32768, "<i4": 1 / 2147483648, "<f4": 1.0, "<f8": 1.0}
+
+
+def _wav_layout(data: mmap.mmap, path: Path) -> tuple[str, int, int, int, int]:
+    """(dtype, channels, sample_rate, data offset, frame count) of a RIFF/WAVE file."""
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError(f"Not a WAV file: {path}")
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos:pos + 4]
+        (size,) = struct.unpack_from("<I", data, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            audio_format, channels, rate = struct.unpack_from("<HHI", data, body)
+            (bits,) = struct.unpack_from("<H", data, body + 14)
+            if audio_format == 0xFFFE:  # WAVE_FORMAT_EXTENSIBLE: subformat GUID follows
+                (audio_format,) = struct.unpack_from("<H", data, body + 24)
+            fmt = (audio_format, channels, rate, bits)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError(f"WAV data chunk before fmt chunk: {path}")
+            audio_format, channels, rate, bits = fmt
+            dtype = _WAV_DTYPES.get((audio_format, bits))
+            if dtype is None:
+                raise ValueError(f"Unsupported WAV encoding (format {audio_format}, "
+                                 f"{bits}-bit): {path}")
+            size = min(size, len(data) - body)
+            return dtype, channels, rate, body, size // (channels * bits // 8)
+        pos = body + size + (size & 1)
+    raise ValueError(f"WAV file has no data chunk: {path}")
+
+
+class _LinearResampler:
+    """Streaming linear-interpolation resampler (chunk boundaries are seamless)."""
+
+    def __init__(self, src_rate: int, dst_rate: int):
+        self._step = src_rate / dst_rate
+        self._pos = 0.0  # next output position, relative to _prev (or the chunk start)
+        self._prev: Optional[np.ndarray] = None
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        buf = x if self._prev is None else np.concatenate((self._prev, x))
+        last = len(buf) - 1
+        if last < self._pos:
+            n = 0
+        else:
+            n = int((last - self._pos) // self._step) + 1
+        positions = self._pos + np.arange(n) * self._step
+        out = np.interp(positions, np.arange(len(buf)), buf).astype(np.float32)
+        self._pos = self._pos + n * self._step - last
+        self._prev = buf[-1:]
+        return out
+
+
+def _read_wav(path: Path, chunk_samples: int) -> Iterator[np.ndarray]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        dtype, channels, rate, offset, frames = _wav_layout(data, path)
+        samples = np.frombuffer(data, dtype=dtype, count=frames * channels, offset=offset)
+        samples = samples.reshape(frames, channels)
+        scale = _WAV_SCALE[dtype]
+        resampler = _LinearResampler(rate, SAMPLE_RATE) if rate != SAMPLE_RATE else None
+        step = max(1, int(chunk_samples * rate / SAMPLE_RATE))
+        try:
+            for start in range(0, frames, step):
+                # Copy out of the map (and downmix) one chunk at a time
+                chunk = samples[start:start + step].mean(axis=1, dtype=np.float32) * scale
+                yield resampler.process(chunk) if resampler else chunk
+        finally:
+            del samples  # release the buffer before the map closes
+
+
+def _read_raw(path: Path, dtype: str, chunk_samples: int) -> Iterator[np.ndarray]:
+    samples = np.memmap(path, dtype=dtype, mode="r")
+    scale = _WAV_SCALE[dtype]
+    for start in range(0, len(samples), chunk_samples):
+        yield samples[start:start + chunk_samples].astype(np.float32) * scale
+
+
+def _read_opus(path: Path, chunk_bytes: int) -> Iterator[np.ndarray]:
+    if sphn is None:
+        raise ImportError("sphn is required for Opus input: pip install moshi (includes sphn)")
+    reader = sphn.OpusStreamReader(SAMPLE_RATE)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        for start in range(0, len(data), chunk_bytes):
+            pcm = np.asarray(reader.append_bytes(data[start:start + chunk_bytes]),
+                             dtype=np.float32).reshape(-1)
+            if pcm.size:
+                yield pcm
+
+
+def read_audio(path: str, chunk_seconds: float = 10.0) -> Iterator[np.ndarray]:
+    """Yield float32 mono 24kHz chunks of a WAV, Ogg Opus or raw .f32/.s16 file.
+
+    Raises:
+        ValueError: If the file is not a supported WAV encoding.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix in RAW_DTYPES:
+        return _read_raw(path, RAW_DTYPES[suffix], int(chunk_seconds * SAMPLE_RATE))
+    if suffix in OPUS_SUFFIXES:
+        # ~64 kbps upper bound for speech Opus
+        return _read_opus(path, max(4096, int(chunk_seconds * 8000)))
+    return _read_wav(path, int(chunk_seconds * SAMPLE_RATE))
+
+
+# ── Output ───────────────────────────────────────────────────────
+
+class ResultWriter:
+    """Streams response audio to <stem>.wav and text tokens to <stem>.tokens.jsonl."""
+
+    def __init__(self, out_dir: Path, stem: str):
+        self.audio_path = Path(out_dir) / f"{stem}.wav"
+        self.tokens_path = Path(out_dir) / f"{stem}.tokens.jsonl"
+        self._wav = wave.open(str(self.audio_path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(SAMPLE_RATE)
+        self._tokens = open(self.tokens_path, "w", encoding="utf-8")
+        self.samples_out = 0
+        self.text: list[str] = []
+
+    def write_audio(self, audio: np.ndarray) -> None:
+        pcm = np.clip(np.asarray(audio, dtype=np.float32).reshape(-1), -1.0, 1.0) * 32767
+        self._wav.writeframes(pcm.astype("<i2").tobytes())
+        self.samples_out += pcm.size
+
+    def write_text(self, frame: int, text: str) -> None:
+        """Record a token at its 80ms frame position in the stream."""
+        self.text.append(text)
+        self._tokens.write(json.dumps({"t": round(frame * FRAME_S, 3), "frame": frame,
+                                       "text": text}) + "\n")
+
+    def close(self) -> dict:
+        self._wav.close()
+        self._tokens.close()
+        return {
+            "audio": str(self.audio_path),
+            "tokens": str(self.tokens_path),
+            "output_seconds": round(self.samples_out / SAMPLE_RATE, 3),
+            "text": "".join(self.text).strip(),
+        }
+
+
+# ── Processing ───────────────────────────────────────────────────
+
+class _Slot:
+    """One batch slot: an input file's frames and its output writers."""
+
+    def __init__(self, path: str, out_dir: Path, config: OfflineConfig):
+        self.path = Path(path)
+        self._chunks = read_audio(path, config.chunk_seconds)
+        self._framer = PcmFramer(FRAME_SIZE)
+        self._pending: list[np.ndarray] = []
+        self._tail = int(round(config.tail_seconds / FRAME_S))
+        self.frames_in = 0
+        self.input_done = False
+        self.done = False
+        self.output = ResultWriter(out_dir, self.path.stem)
+
+    def next_frame(self) -> Optional[np.ndarray]:
+        """The next input frame, silence during the tail, or None once finished."""
+        while not self._pending and not self.input_done:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.input_done = True
+                partial = self._framer.flush()
+                if partial is not None:
+                    frame = np.zeros(FRAME_SIZE, dtype=np.float32)
+                    frame[:len(partial)] = partial
+                    self._pending.append(frame)
+            else:
+                self._pending.extend(self._framer.push(chunk))
+        if self._pending:
+            self.frames_in += 1
+            return self._pending.pop(0)
+        if self._tail > 0:
+            self._tail -= 1
+            return np.zeros(FRAME_SIZE, dtype=np.float32)
+        self.done = True
+        return None
+
+    def write(self, step: int, audio: Optional[np.ndarray], text: Optional[str]) -> None:
+        if audio is not None:
+            self.output.write_audio(audio)
+        if text is not None:
+            self.output.write_text(step, text)
+
+    def close(self) -> dict:
+        return {
+            "input": str(self.path),
+            "input_seconds": round(self.frames_in * FRAME_S, 3),
+            **self.output.close(),
+        }
+
+
+class OfflineProcessor:
+    """Runs files through an engine without real-time pacing.
+
+    The engine needs streaming(batch_size), process_batch() and
+    decode_text_token(): MoshiEngine, or bench.StubEngine for pipeline tests.
+    """
+
+    def __init__(self, engine, config: Optional[OfflineConfig] = None):
+        self.engine = engine
+        self.config = config or OfflineConfig()
+        if self.config.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+    def run(self, paths: list[str], out_dir: str) -> dict:
+        """Process every file and return a throughput report.
+
+        Raises:
+            ValueError: If an input is unreadable or two inputs share a stem.
+        """
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        stems = [Path(p).stem for p in paths]
+        if len(set(stems)) != len(stems):
+            raise ValueError("Input files must have distinct names (outputs are <stem>.wav)")
+
+        results = []
+        steps = 0
+        start = time.perf_counter()
+        size = self.config.batch_size
+        for i in range(0, len(paths), size):
+            wave_paths = paths[i:i + size]
+            logger.info(f"Offline wave {i // size + 1}: {len(wave_paths)} file(s)")
+            slots = [_Slot(p, out, self.config) for p in wave_paths]
+            try:
+                steps += self._run_wave(slots)
+            finally:
+                results.extend(slot.close() for slot in slots)
+        wall = time.perf_counter() - start
+
+        audio_s = sum(r["input_seconds"] for r in results)
+        return {
+            "files": results,
+            "batch_size": size,
+            "steps": steps,
+            "audio_seconds": round(audio_s, 3),
+            "wall_seconds": round(wall, 3),
+            "speedup": round(audio_s / wall, 2) if wall > 0 else None,
+            "steps_per_second": round(steps / wall, 1) if wall > 0 else None,
+        }
+
+    def _run_wave(self, slots: list[_Slot]) -> int:
+        batch = np.zeros((len(slots), FRAME_SIZE), dtype=np.float32)
+        active = [True] * len(slots)
+        step = 0
+        with self.engine.streaming(batch_size=len(slots)):
+            while True:
+                for j, slot in enumerate(slots):
+                    frame = slot.next_frame() if active[j] else None
+                    if frame is None:
+                        active[j] = False
+                        batch[j] = 0.0
+                    else:
+                        batch[j] = frame
+                if not any(active):
+                    return step
+
+                audio, tokens = self.engine.process_batch(batch)
+                if audio is not None:
+                    for j, slot in enumerate(slots):
+                        if active[j]:
+                            slot.write(step, audio[j], self.engine.decode_text_token(tokens[j]))
+                step += 1
+
+
+def process_files(engine, paths: list[str], out_dir: str,
+                  config: Optional[OfflineConfig] = None) -> dict:
+    """Convenience wrapper around OfflineProcessor.run()."""
+    return OfflineProcessor(engine, config).run(paths, out_dir)
@@ -0,0 +1,342 @@
+"""Server preflight — Port reclamation, GPU memory check, readiness and health probes.
+
+Cross-platform helpers for MoshiServerManager's startup path:
+
+    find_port_owners()   PIDs listening on a TCP port: psutil when installed,
+                         else /proc/net/tcp{,6} + /proc/<pid>/fd on Linux,
+                         else `netstat -ano` on Windows
+    reclaim_port()       terminate (then kill) those processes
+    free_vram_mb()       free GPU memory from an already-imported torch, or
+                         nvidia-smi; no interpreter is spawned to import torch
+    probe_tcp()          does the port accept connections?
+    probe_ws_handshake() does /api/chat complete the Moshi 0x00 handshake?
+    probe_inference()    handshake + a short audio round-trip, timing the model
+
+The blocking helpers are meant to run in an executor; run_preflight() does
+that and runs the checks concurrently.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 24000
+FRAME_SAMPLES = 1920  # 80ms at 24kHz
+MSG_AUDIO = 0x01
+
+_TCP_LISTEN = "0A"
+_SOCKET_LINK = re.compile(r"socket:\[(\d+)\]")
+
+
+# ── Port ownership ───────────────────────────────────────────────
+
+def _listening_inodes(port: int) -> set[str]:
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    local_port = int(fields[1].rsplit(":", 1)[1], 16)
+                    if local_port == port and fields[3] == _TCP_LISTEN:
+                        inodes.add(fields[9])
+        except OSError:
+            continue
+    return inodes
+
+
+def _pids_for_inodes(inodes: set[str]) -> list[int]:
+    pids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        fd_dir = f"/proc/{entry}/fd"
+        try:
+            for fd in os.listdir(fd_dir):
+                match = _SOCKET_LINK.match(os.readlink(f"{fd_dir}/{fd}"))
+                if match and match.group(1) in inodes:
+                    pids.append(int(entry))
+                    break
+        except OSError:
+            continue  # exited, or not ours to inspect
+    return pids
+
+
+def _netstat_owners(port: int) -> list[int]:
+    out = subprocess.run(["netstat", "-ano", "-p", "TCP"], capture_output=True, text=True,
+                         timeout=10).stdout
+    pids = set()
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) >= 5 and fields[3] == "LISTENING" and fields[1].endswith(f":{port}"):
+            pids.add(int(fields[4]))
+    return sorted(pids)
+
+
+def find_port_owners(port: int) -> list[int]:
+    """PIDs of processes listening on a local TCP port (blocking)."""
+    if psutil is not None:
+        try:
+            return sorted({
+                conn.pid for conn in psutil.net_connections(kind="tcp")
+                if conn.laddr and conn.laddr.port == port
+                and conn.status == psutil.CONN_LISTEN and conn.pid
+            })
+        except psutil.AccessDenied:
+            pass  # macOS without root; fall through
+    if os.path.exists("/proc/net/tcp"):
+        inodes = _listening_inodes(port)
+        return _pids_for_inodes(inodes) if inodes else []
+    if sys.platform == "win32":
+        return _netstat_owners(port)
+    return []
+
+
+def _alive(pid: int) -> bool:
+    """True while pid exists and isn't a zombie (a dead process has released its port)."""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+
+def _signal(pid: int, force: bool) -> None:
+    if psutil is not None:
+        proc = psutil.Process(pid)
+        proc.kill() if force else proc.terminate()
+    elif sys.platform == "win32":
+        subprocess.run(["taskkill", "/F", "/PID", str(pid)], capture_output=True, timeout=10)
+    else:
+        os.kill(pid, signal.SIGKILL if force else signal.SIGTERM)
+
+
+def reclaim_port(port: int, grace_s: float = 3.0) -> list[int]:
+    """Terminate every other process listening on port, killing stragglers (blocking).
+
+    Returns:
+        PIDs that were signalled.
+    """
+    pids = [pid for pid in find_port_owners(port) if pid != os.getpid()]
+    for pid in pids:
+        try:
+            logger.warning(f"Port {port} held by PID {pid} — terminating")
+            _signal(pid, force=False)
+        except Exception as e:
+            logger.warning(f"Could not terminate PID {pid}: {e}")
+
+    deadline = time.monotonic() + grace_s
+    while any(_alive(pid) for pid in pids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    for pid in pids:
+        if _alive(pid):
+            try:
+                _signal(pid, force=True)
+            except Exception as e:
+                logger.warning(f"Could not kill PID {pid}: {e}")
+    return pids
+
+
+# ── GPU memory ───────────────────────────────────────────────────
+
+def free_vram_mb(device: int = 0) -> Optional[int]:
+    """Free memory on a CUDA device in MB, or None if it can't be determined (blocking)."""
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        try:
+            return torch.cuda.mem_get_info(device)[0] // (1024 * 1024)
+        except Exception:
+            pass
+    if shutil.which("nvidia-smi"):
+        try:
+            out = subprocess.run(
+                ["nvidia-smi", f"--id={device}", "--query-gpu=memory.free",
+                 "--format=csv,noheader,nounits"],
+                capture_output=True, text=True, timeout=10,
+            ).stdout
+            return int(out.strip().splitlines()[0])
+        except (OSError, ValueError, IndexError, subprocess.SubprocessError):
+            pass
+    return None
+
+
+# ── Concurrent preflight ─────────────────────────────────────────
+
+@dataclass
+class PreflightReport:
+    """Outcome and duration (ms) of each preflight check."""
+    reclaimed_pids: list = field(default_factory=list)
+    free_vram_mb: Optional[int] = None
+    vram_ok: Optional[bool] = None
+    phases_ms: dict = field(default_factory=dict)
+
+
+async def run_preflight(port: int, min_vram_mb: int = 0, gpu_index: int = 0) -> PreflightReport:
+    """Reclaim the port and check VRAM concurrently; never raises."""
+    loop = asyncio.get_running_loop()
+    report = PreflightReport()
+
+    async def timed(name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return await loop.run_in_executor(None, fn, *args)
+        except Exception as e:
+            logger.warning(f"Preflight {name} failed: {e}")
+            return None
+        finally:
+            report.phases_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    checks = [timed("port_reclaim", reclaim_port, port)]
+    if min_vram_mb > 0:
+        checks.append(timed("vram_check", free_vram_mb, gpu_index))
+    start = time.perf_counter()
+    results = await asyncio.gather(*checks)
+    report.phases_ms["preflight"] = round((time.perf_counter() - start) * 1000, 1)
+
+    report.reclaimed_pids = results[0] or []
+    if min_vram_mb > 0:
+        report.free_vram_mb = results[1]
+        if report.free_vram_mb is None:
+            logger.warning("Could not check GPU VRAM (no torch loaded, no nvidia-smi)")
+        elif report.free_vram_mb < min_vram_mb:
+            report.vram_ok = False
+            logger.warning(
+                f"Low GPU VRAM: {report.free_vram_mb}MB free, need {min_vram_mb}MB. "
+                "Close GPU-heavy apps (LM Studio, games, etc.)"
+            )
+        else:
+            report.vram_ok = True
+            logger.info(f"GPU VRAM: {report.free_vram_mb}MB free (need {min_vram_mb}MB) — OK")
+    return report
+
+
+# ── Readiness and health probes ──────────────────────────────────
+
+async def probe_tcp(host: str, port: int, timeout: float = 1.0) -> bool:
+    """True if something accepts TCP connections on host:port."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def probe_ws_handshake(session, ws_url: str, timeout: float = 5.0) -> bool:
+    """True if the Moshi /api/chat endpoint sends its 0x00 handshake within timeout."""
+    try:
+        async with session.ws_connect(ws_url, timeout=aiohttp.ClientWSTimeout(ws_close=1.0),
+                                      autoclose=False) as ws:
+            msg = await asyncio.wait_for(ws.receive(), timeout)
+            return msg.type == aiohttp.WSMsgType.BINARY and msg.data == b"\x00"
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+        return False
+
+
+@dataclass
+class InferenceProbe:
+    """Result of one probe_inference() round-trip; latencies in ms."""
+    ok: bool
+    handshake_ms: Optional[float] = None
+    inference_ms: Optional[float] = None
+    error: str = ""
+
+
+async def probe_inference(session, ws_url: str, timeout: float = 10.0,
+                          probe_frames: int = 3) -> InferenceProbe:
+    """Open a side session, send a few frames of quiet noise and time the first reply.
+
+    inference_ms runs from the first Opus page sent to the first audio frame back,
+    so it covers decode, one model step and encode — a server that is up but
+    degraded shows here long before its HTTP index stops answering.
+
+    Raises:
+        ImportError: If sphn (Opus) is not installed.
+    """
+    if sphn is None:
+        raise ImportError("sphn is required for Opus: pip install moshi (includes sphn)")
+
+    result = InferenceProbe(ok=False)
+    try:
+        await asyncio.wait_for(_round_trip(session, ws_url, probe_frames, result), timeout)
+    except asyncio.TimeoutError:
+        result.error = f"timed out after {timeout:.0f}s"
+    except (aiohttp.ClientError, OSError) as e:
+        result.error = str(e) or type(e).__name__
+    return result
+
+
+async def _round_trip(session, ws_url: str, probe_frames: int, result: InferenceProbe) -> None:
+    start = time.perf_counter()
+    async with session.ws_connect(ws_url, autoclose=False,
+                                  timeout=aiohttp.ClientWSTimeout(ws_close=1.0)) as ws:
+        msg = await ws.receive()
+        if msg.type != aiohttp.WSMsgType.BINARY or msg.data != b"\x00":
+            result.error = "no handshake"
+            return
+        result.handshake_ms = round((time.perf_counter() - start) * 1000, 1)
+
+        writer = sphn.OpusStreamWriter(SAMPLE_RATE)
+        noise = np.random.default_rng(0).normal(0, 0.01, FRAME_SAMPLES * probe_frames)
+        first_sent = None
+        for i in range(probe_frames):
+            frame = noise[i * FRAME_SAMPLES:(i + 1) * FRAME_SAMPLES].astype(np.float32)
+            page = writer.append_pcm(frame)
+            if page:
+                await ws.send_bytes(bytes([MSG_AUDIO]) + page)
+                first_sent = first_sent or time.perf_counter()
+        if first_sent is None:
+            result.error = "encoder produced no pages"
+            return
+
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.BINARY:
+                break
+            if msg.data[:1] == bytes([MSG_AUDIO]):
+                result.inference_ms = round((time.perf_counter() - first_sent) * 1000, 1)
+                result.ok = True
+                return
+        result.error = "closed before audio"
@@ -0,0 +1,187 @@
+"""Server log pipeline — Ring buffer, parsers and rate-limited forwarding for server output.
+
+MoshiServerManager reads each server process's merged stdout/stderr from an
+asyncio subprocess stream and feeds every line through a ServerLogPipeline:
+
+    ring        the last ring_lines lines, with timestamps, for /api/admin/server-log
+                and post-mortems, whether or not they were forwarded
+    parsers     regexes that turn lines into metrics: error/OOM/traceback/warning
+                counts, model load stage durations ("loading mimi" ... "mimi
+                loaded"), and accepted sessions
+    forwarding  lines are re-logged through a token bucket (max_lines_per_s,
+                burst); anything over it is counted and summarised, so a
+                chatty or crash-looping server can't flood the logs or the loop
+
+Usage:
+    pipeline = ServerLogPipeline("moshi-server")
+    await pipeline.run(process.stdout)    # until EOF
+    pipeline.recent(50)
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from conscious.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+_LINES = REGISTRY.counter("conscious_server_log_lines_total", "Lines read from server output")
+_SUPPRESSED = REGISTRY.counter(
+    "conscious_server_log_suppressed_total", "Server output lines not forwarded (rate limit)"
+)
+_SESSIONS = REGISTRY.counter(
+    "conscious_server_log_sessions_total", "Sessions the server logged as accepted"
+)
+ERROR_KINDS = ("oom", "traceback", "error", "warning")
+_ERRORS = {
+    kind: REGISTRY.counter("conscious_server_log_errors_total",
+                           "Server output lines classified as errors or warnings",
+                           labels={"kind": kind})
+    for kind in ERROR_KINDS
+}
+
+# First match wins, so the most specific kinds come first
+_ERROR_PATTERNS = (
+    ("oom", re.compile(r"CUDA out of memory|OutOfMemoryError")),
+    ("traceback", re.compile(r"^Traceback \(most recent call last\)")),
+    ("error", re.compile(r"\b(?:ERROR|Error|Exception)\b")),
+    ("warning", re.compile(r"\b(?:WARNING|Warning)\b")),
+)
+_LOADING = re.compile(r"\bloading (\w+)", re.IGNORECASE)
+_LOADED = re.compile(r"\b(\w+) loaded\b", re.IGNORECASE)
+_ACCEPTED = re.compile(r"accepted connection", re.IGNORECASE)
+
+
+@dataclass
+class LogParser:
+    """A regex and what to do with its match; handle gets (match, timestamp)."""
+    name: str
+    pattern: re.Pattern
+    handle: Callable[[re.Match, float], None]
+
+
+class _LoadStages:
+    """Times "loading X" ... "X loaded" pairs into conscious_server_load_stage_seconds."""
+
+    def __init__(self):
+        self.started: dict[str, float] = {}
+        self.seconds: dict[str, float] = {}
+
+    def loading(self, match: re.Match, t: float) -> None:
+        self.started[match.group(1).lower()] = t
+
+    def loaded(self, match: re.Match, t: float) -> None:
+        stage = match.group(1).lower()
+        began = self.started.pop(stage, None)
+        if began is not None:
+            self.seconds[stage] = round(t - began, 2)
+            REGISTRY.gauge("conscious_server_load_stage_seconds",
+                           "Model load stage duration parsed from server output",
+                           labels={"stage": stage}).set(t - began)
+
+
+class ServerLogPipeline:
+    """Consumes one server process's output; see the module docstring."""
+
+    def __init__(self, tag: str, ring_lines: int = 500, max_lines_per_s: float = 20.0,
+                 burst: int = 200, parsers: Optional[list[LogParser]] = None):
+        self.tag = tag
+        self.ring: deque = deque(maxlen=ring_lines)
+        self.max_lines_per_s = max_lines_per_s
+        self.burst = burst
+        self.load_stages = _LoadStages()
+        self.parsers = parsers if parsers is not None else [
+            LogParser("loading", _LOADING, self.load_stages.loading),
+            LogParser("loaded", _LOADED, self.load_stages.loaded),
+            LogParser("accepted", _ACCEPTED, lambda m, t: _SESSIONS.inc()),
+        ]
+        self.lines = 0
+        self.suppressed = 0
+        self.errors = {kind: 0 for kind in ERROR_KINDS}
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._pending_suppressed = 0
+
+    async def run(self, stream: asyncio.StreamReader) -> None:
+        """Read lines until EOF. Overlong lines (progress bars) are read in chunks."""
+        while True:
+            try:
+                raw = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                raw = e.partial
+                if not raw:
+                    break
+            except asyncio.LimitOverrunError as e:
+                raw = await stream.read(e.consumed)
+            # \r-redrawn progress bars: keep only the final state
+            text = raw.decode("utf-8", errors="replace").rstrip("\r\n").rsplit("\r", 1)[-1]
+            self.feed(text)
+        self._flush_suppressed()
+
+    def feed(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        now = time.time()
+        self.lines += 1
+        _LINES.inc()
+        self.ring.append((now, line))
+
+        kind = None
+        for name, pattern in _ERROR_PATTERNS:
+            if pattern.search(line):
+                kind = name
+                self.errors[kind] += 1
+                _ERRORS[kind].inc()
+                break
+        for parser in self.parsers:
+            match = parser.pattern.search(line)
+            if match:
+                try:
+                    parser.handle(match, now)
+                except Exception as e:
+                    logger.debug(f"Log parser {parser.name} failed: {e}")
+
+        if not self._take_token():
+            self.suppressed += 1
+            self._pending_suppressed += 1
+            _SUPPRESSED.inc()
+            return
+        self._flush_suppressed()
+        level = logging.WARNING if kind is not None and kind != "warning" else logging.INFO
+        # %-style: formatted on the log writer thread, not per line here
+        logger.log(level, "[%s] %s", self.tag, line)
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._refilled) * self.max_lines_per_s)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _flush_suppressed(self) -> None:
+        if self._pending_suppressed:
+            logger.warning("[%s] %d lines not forwarded (rate limit; see recent output)",
+                           self.tag, self._pending_suppressed)
+            self._pending_suppressed = 0
+
+    def recent(self, n: int = 100) -> list[dict]:
+        """The last n lines with their timestamps, oldest first."""
+        lines = list(self.ring)[-n:] if n > 0 else []
+        return [{"t": round(t, 3), "line": line} for t, line in lines]
+
+    def get_stats(self) -> dict:
+        return {
+            "lines": self.lines,
+            "suppressed": self.suppressed,
+            "errors": dict(self.errors),
+            "load_stages_s": dict(self.load_stages.seconds),
+        }
@@ -6,9 +6,12 @@ within the Super-Goose agentic framework.
 
 Features:
     - Auto-kill stale processes on target port before starting
-    - Health monitoring via HTTP polling
+    - GPU VRAM pre-flight check, run concurrently with port reclamation
+    - Readiness via TCP + WebSocket handshake probes, with per-phase startup timing
+    - Health monitoring on a pooled aiohttp session: HTTP polling plus a periodic
+      WebSocket handshake and audio round-trip that restarts a degraded server
     - Automatic restart on crash with exponential backoff
-    - GPU VRAM pre-flight check
+    - Optional N+1 mode: a warm standby server on a second port, promoted on failure
     - Structured logging for all lifecycle events
 """
 
@@ -16,15 +19,58 @@ import asyncio
 import logging
 import os
 import signal
-import subprocess
 import sys
 import time
 from dataclasses import dataclass, field
 from enum import Enum
 from typing import Callable, Optional
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+from conscious.governor import ResourceGovernor
+from conscious.metrics import REGISTRY
+
+from .preflight import probe_inference, probe_tcp, probe_ws_handshake, run_preflight, sphn
+from .server_logs import ServerLogPipeline
+
 logger = logging.getLogger(__name__)
 
+_RESTARTS = REGISTRY.counter("conscious_server_restarts_total", "Moshi server restart attempts")
+_HEALTH_FAILURES = REGISTRY.counter(
+    "conscious_server_health_check_failures_total", "Failed Moshi server health checks"
+)
+_HEALTH_CHECK_MS = REGISTRY.histogram(
+    "conscious_server_health_check_ms", "Moshi server health check duration (ms)"
+)
+_INFERENCE_PROBE_MS = REGISTRY.histogram(
+    "conscious_server_inference_probe_ms",
+    "Deep health probe: first Opus page sent to first audio frame back (ms)",
+)
+_DEGRADED = REGISTRY.counter(
+    "conscious_server_degraded_total", "Deep health probes that failed or exceeded max_inference_ms"
+)
+_FAILOVERS = REGISTRY.counter("conscious_server_failovers_total", "Promotions of the warm standby")
+_FAILOVER_MS = REGISTRY.histogram(
+    "conscious_server_failover_ms", "Failure detected until the promoted standby is READY (ms)"
+)
+_STARTUP_PHASES = ("preflight", "spawn", "port_open", "handshake", "total")
+_STARTUP_PHASE_MS = {
+    phase: REGISTRY.histogram(
+        "conscious_server_startup_phase_ms", "Moshi server time-to-ready by startup phase (ms)",
+        labels={"phase": phase}, buckets=(10, 50, 100, 500, 1000, 5000, 15000, 30000, 60000,
+                                          120000, 300000),
+    )
+    for phase in _STARTUP_PHASES
+}
+
 PYTHON_EXE = r"C:\Python313\python.exe"
 
 
@@ -43,12 +89,33 @@ class ServerManagerConfig:
     host: str = "localhost"
     port: int = 8998
     python_exe: str = PYTHON_EXE
+    # Module run with -m; conscious.voice.stub_server stands in without a GPU
+    server_module: str = "moshi.server"
+    server_args: list = field(default_factory=list)
     health_check_interval: float = 5.0
     health_check_timeout: float = 3.0
+    # Deep probe: handshake + short audio round-trip on a side connection.
+    # Skipped while the server is busy (Moshi serves one session at a time).
+    deep_health_interval: float = 30.0  # 0 disables
+    deep_health_timeout: float = 10.0
+    max_inference_ms: float = 1500.0  # slower round-trips count as degraded
+    max_degraded_probes: int = 2  # consecutive degraded probes before a restart
     max_restart_attempts: int = 5
     restart_backoff_base: float = 2.0
     restart_backoff_max: float = 60.0
-    min_vram_mb: int = 14000
+    min_vram_mb: int = 14000  # 0 skips the VRAM pre-flight check
+    # Placement and limits for the server process (set per instance by MoshiFleet)
+    instance: str = "main"  # instance label on conscious_server_status
+    cuda_device: Optional[str] = None  # CUDA_VISIBLE_DEVICES, e.g. "1"; None inherits
+    cpu_affinity: list = field(default_factory=list)  # CPU ids; empty leaves it unpinned
+    nice: int = 0
+    ready_probe_interval: float = 0.25  # seconds between readiness probes while loading
+    ready_probe_timeout: float = 5.0    # max wait for the 0x00 handshake per probe
+    log_ring_lines: int = 500  # recent server output kept in memory
+    log_max_lines_per_s: float = 20.0  # forwarded to our log; the rest is counted
+    # N+1 mode: >0 keeps a pre-loaded standby server on this port, promoted on failure.
+    # The standby loads its own copy of the model, so it needs the VRAM for it.
+    standby_port: int = 0
     env_vars: dict = field(default_factory=lambda: {
         "NO_TORCH_COMPILE": "1",
         "TORCHDYNAMO_DISABLE": "1",
@@ -71,16 +138,45 @@ class MoshiServerManager:
     """
 
     def __init__(self, config: Optional[ServerManagerConfig] = None,
-                 on_status_change: Optional[Callable[[ServerStatus], None]] = None):
+                 on_status_change: Optional[Callable[[ServerStatus], None]] = None,
+                 is_busy: Optional[Callable[[], bool]] = None,
+                 governor: Optional[ResourceGovernor] = None):
+        if aiohttp is None:
+            raise ImportError("aiohttp is required: pip install aiohttp")
         self.config = config or ServerManagerConfig()
-        self._process: Optional[subprocess.Popen] = None
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._port = self.config.port
         self._status = ServerStatus.STOPPED
         self._health_task: Optional[asyncio.Task] = None
+        self._probe_task: Optional[asyncio.Task] = None
+        self._startup_began = 0.0
+        self._startup_phases: dict = {}
         self._restart_count = 0
         self._on_status_change = on_status_change
+        self._is_busy = is_busy
+        # Shared voice-pipeline budget (resources.* in the config); None = ungoverned
+        self.governor = governor
+        self._http: Optional["aiohttp.ClientSession"] = None
+        self._last_health: dict = {}
+        self._recover_lock = asyncio.Lock()
+        # Warm standby (N+1 mode)
+        self._standby: Optional[asyncio.subprocess.Process] = None
+        self._standby_port = 0
+        self._standby_ready = False
+        self._standby_task: Optional[asyncio.Task] = None
+        self._logs: Optional[ServerLogPipeline] = None
+        self._standby_logs: Optional[ServerLogPipeline] = None
+        self._last_failover: dict = {}
         self._ready_event = asyncio.Event()
         self._stop_requested = False
 
+        for status in ServerStatus:
+            REGISTRY.register_callback(
+                "conscious_server_status", "1 for the Moshi server's current status",
+                lambda m, status=status: int(m._status == status),
+                labels={"instance": self.config.instance, "status": status.value}, owner=self,
+            )
+
     @property
     def status(self) -> ServerStatus:
         return self._status
@@ -89,19 +185,85 @@ class MoshiServerManager:
     def is_ready(self) -> bool:
         return self._status == ServerStatus.READY
 
+    @property
+    def port(self) -> int:
+        """Port of the active server; moves to standby_port and back across failovers."""
+        return self._port
+
+    @property
+    def pid(self) -> Optional[int]:
+        """PID of the active server process."""
+        return self._process.pid if self._process else None
+
     @property
     def url(self) -> str:
-        return f"http://{self.config.host}:{self.config.port}"
+        return f"http://{self.config.host}:{self._port}"
 
     @property
     def ws_url(self) -> str:
-        return f"ws://{self.config.host}:{self.config.port}/api/chat"
+        return f"ws://{self.config.host}:{self._port}/api/chat"
+
+    @property
+    def standby_status(self) -> dict:
+        """Warm standby state; empty when N+1 mode is off."""
+        if not self.config.standby_port:
+            return {}
+        return {
+            "port": self._standby_port or None,
+            "ready": self._standby_ready,
+            "pid": self._standby.pid if self._standby else None,
+        }
+
+    def recent_output(self, lines: int = 100) -> list[dict]:
+        """The active server's most recent output lines (kept even when not forwarded)."""
+        return self._logs.recent(lines) if self._logs else []
+
+    @property
+    def log_stats(self) -> dict:
+        """Line, suppression, error and load-stage counts parsed from the active server."""
+        return self._logs.get_stats() if self._logs else {}
+
+    @property
+    def last_failover(self) -> dict:
+        """Most recent standby promotion: reason, ports and failover_ms."""
+        return dict(self._last_failover)
+
+    @property
+    def startup_phases(self) -> dict:
+        """Milliseconds spent in each phase of the most recent (re)start.
+
+        preflight: port reclamation and VRAM check (run concurrently)
+        spawn:     launching the server process
+        port_open: process launched until the port accepts TCP (model load)
+        handshake: port open until /api/chat completes the 0x00 handshake
+        total:     start() / restart() until READY
+        """
+        return dict(self._startup_phases)
+
+    @property
+    def last_health(self) -> dict:
+        """Latest health signals: HTTP check, and the last deep probe's latencies."""
+        return dict(self._last_health)
+
+    def _session(self) -> "aiohttp.ClientSession":
+        """Pooled session shared by readiness probes and health checks."""
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+        return self._http
+
+    def _record_phase(self, phase: str, since: float) -> float:
+        now = time.perf_counter()
+        elapsed_ms = round((now - since) * 1000, 1)
+        self._startup_phases[phase] = elapsed_ms
+        if phase in _STARTUP_PHASE_MS:
+            _STARTUP_PHASE_MS[phase].observe(elapsed_ms)
+        return now
 
     def _set_status(self, status: ServerStatus) -> None:
         old = self._status
         self._status = status
         if old != status:
-            logger.info(f"Server status: {old.value} -> {status.value}")
+            logger.info("Server status: %s -> %s", old.value, status.value)
             if self._on_status_change:
                 try:
                     self._on_status_change(status)
@@ -121,11 +283,11 @@ class MoshiServerManager:
         self._stop_requested = False
         self._restart_count = 0
 
-        await self._kill_stale_port()
-        await self._check_gpu_vram()
+        await self._preflight(check_vram=True)
         await self._launch_process()
 
-        self._health_task = asyncio.create_task(self._health_loop())
+        self._health_task = asyncio.create_task(self._health_loop(), name="server-health")
+        self._ensure_standby()
         logger.info("Server manager started with health monitoring")
 
     async def stop(self) -> None:
@@ -139,7 +301,11 @@ class MoshiServerManager:
             except asyncio.CancelledError:
                 pass
 
+        await self._kill_standby()
         await self._kill_process()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
         self._set_status(ServerStatus.STOPPED)
         logger.info("Server manager stopped")
 
@@ -147,8 +313,7 @@ class MoshiServerManager:
         """Restart the server (kills existing, launches new)."""
         self._set_status(ServerStatus.RESTARTING)
         await self._kill_process()
-        await asyncio.sleep(1)
-        await self._kill_stale_port()
+        await self._preflight(check_vram=False)
         await self._launch_process()
 
     async def wait_ready(self, timeout: float = 300.0) -> bool:
@@ -167,132 +332,340 @@ class MoshiServerManager:
             logger.error(f"Server did not become ready within {timeout}s")
             return False
 
-    async def _launch_process(self) -> None:
-        """Launch the Moshi server subprocess."""
-        self._set_status(ServerStatus.STARTING)
-
+    async def _preflight(self, check_vram: bool) -> None:
+        """Reclaim the port (and check VRAM) concurrently, starting the startup clock."""
+        self._startup_phases = {}
+        self._startup_began = time.perf_counter()
+        report = await run_preflight(
+            self._port, self.config.min_vram_mb if check_vram else 0, self._gpu_index()
+        )
+        self._startup_phases.update(report.phases_ms)
+        _STARTUP_PHASE_MS["preflight"].observe(report.phases_ms["preflight"])
+        if report.reclaimed_pids:
+            logger.info(f"Port {self._port} reclaimed from PID(s) {report.reclaimed_pids}")
+
+    def _gpu_index(self) -> int:
+        device = (self.config.cuda_device or "0").split(",")[0].strip()
+        return int(device) if device.isdigit() else 0
+
+    def _apply_limits(self, process: asyncio.subprocess.Process) -> None:
+        """Govern, pin and renice a freshly launched server; failures only warn."""
+        cfg = self.config
+        if self.governor is not None:
+            # An explicit cpu_affinity (fleet placement) takes precedence over the budget's
+            self.governor.govern(process.pid, pin=not cfg.cpu_affinity)
+        if cfg.cpu_affinity:
+            try:
+                if psutil is not None:
+                    psutil.Process(process.pid).cpu_affinity(list(cfg.cpu_affinity))
+                elif hasattr(os, "sched_setaffinity"):
+                    os.sched_setaffinity(process.pid, cfg.cpu_affinity)
+            except Exception as e:
+                logger.warning(f"Could not pin PID {process.pid} to CPUs {cfg.cpu_affinity}: {e}")
+        if cfg.nice:
+            try:
+                if psutil is not None:
+                    psutil.Process(process.pid).nice(cfg.nice)
+                elif hasattr(os, "setpriority"):
+                    os.setpriority(os.PRIO_PROCESS, process.pid, cfg.nice)
+            except Exception as e:
+                logger.warning(f"Could not set nice {cfg.nice} on PID {process.pid}: {e}")
+
+    async def _spawn(self, port: int, tag: str
+                     ) -> tuple[asyncio.subprocess.Process, ServerLogPipeline]:
+        """Start a server process on port, piping its output through a log pipeline."""
         env = os.environ.copy()
+        if self.governor is not None:
+            env.update(self.governor.child_env())
         env.update(self.config.env_vars)
+        if self.config.cuda_device is not None:
+            env["CUDA_VISIBLE_DEVICES"] = self.config.cuda_device
 
         cmd = [
-            self.config.python_exe, "-u", "-m", "moshi.server",
+            self.config.python_exe, "-u", "-m", self.config.server_module,
             "--host", self.config.host,
-            "--port", str(self.config.port),
+            "--port", str(port),
+            *self.config.server_args,
         ]
 
         logger.info(f"Launching: {' '.join(cmd)}")
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            limit=1024 * 1024,
+        )
+        self._apply_limits(process)
+        logs = ServerLogPipeline(tag, ring_lines=self.config.log_ring_lines,
+                                 max_lines_per_s=self.config.log_max_lines_per_s)
+        asyncio.create_task(self._read_process_output(process, logs), name=f"{tag}-output")
+        return process, logs
+
+    async def _launch_process(self) -> None:
+        """Launch the Moshi server subprocess."""
+        self._set_status(ServerStatus.STARTING)
+        spawn_began = time.perf_counter()
+
         try:
-            self._process = subprocess.Popen(
-                cmd,
-                env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-            )
+            self._process, self._logs = await self._spawn(self._port, "moshi-server")
+            self._record_phase("spawn", spawn_began)
             self._set_status(ServerStatus.LOADING_MODEL)
 
-            # Start log reader task
-            asyncio.create_task(self._read_process_output())
+            # Readiness is probed, not scraped from the output
+            self._probe_task = asyncio.create_task(
+                self._probe_ready(self._process), name="server-ready-probe"
+            )
 
         except Exception as e:
             logger.error(f"Failed to launch server: {e}")
             self._set_status(ServerStatus.ERROR)
             raise
 
-    async def _read_process_output(self) -> None:
-        """Read and log server stdout/stderr in background."""
-        if not self._process or not self._process.stdout:
-            return
+    async def _read_process_output(self, process: asyncio.subprocess.Process,
+                                   logs: ServerLogPipeline) -> None:
+        """Feed server stdout/stderr through its log pipeline until EOF.
 
-        loop = asyncio.get_event_loop()
+        In N+1 mode, EOF from the active server starts recovery straight away
+        instead of waiting for the next health tick, so the standby is promoted
+        as soon as the primary dies.
+        """
         try:
-            while self._process.poll() is None:
-                line = await loop.run_in_executor(None, self._process.stdout.readline)
-                if not line:
-                    break
-                line = line.strip()
-                if line:
-                    logger.info(f"[moshi-server] {line}")
-                    if "Access the Web UI directly at" in line:
-                        self._set_status(ServerStatus.READY)
-                        self._restart_count = 0
+            await logs.run(process.stdout)
         except Exception as e:
             logger.error(f"Error reading server output: {e}")
 
+        if (self.config.standby_port and process is self._process
+                and not self._stop_requested and self._status == ServerStatus.READY):
+            await process.wait()
+            logger.error(f"Server process exited with code {process.returncode}")
+            await self._recover(process, f"exited with code {process.returncode}")
+
+    async def _probe_ready(self, process: asyncio.subprocess.Process) -> None:
+        """Mark the server READY once it accepts TCP and completes a WebSocket handshake.
+
+        Replaces scraping stdout for the web UI banner: the port opening tells us the
+        model has loaded and the app is serving, and the 0x00 handshake tells us
+        /api/chat can actually take a session. Both probes target self._port, where
+        the process was spawned; after a failover that is the old standby port.
+        """
+        cfg = self.config
+        port, ws_url = self._port, self.ws_url
+        mark = time.perf_counter()
+        port_open = False
+        session = self._session()
+        while not self._stop_requested and process.returncode is None:
+            if not port_open:
+                if await probe_tcp(cfg.host, port):
+                    port_open = True
+                    mark = self._record_phase("port_open", mark)
+                    continue
+            elif await probe_ws_handshake(session, ws_url, cfg.ready_probe_timeout):
+                if process.returncode is not None:
+                    break
+                self._record_phase("handshake", mark)
+                self._record_phase("total", self._startup_began)
+                phases = ", ".join(f"{k}={v:.0f}ms" for k, v in self._startup_phases.items())
+                logger.info(f"Server ready ({phases})")
+                self._restart_count = 0
+                self._last_health = {}
+                self._set_status(ServerStatus.READY)
+                return
+            await asyncio.sleep(cfg.ready_probe_interval)
+
+    @staticmethod
+    async def _terminate(process: asyncio.subprocess.Process, grace_s: float = 5.0) -> None:
+        """Terminate a server process, killing it if it won't exit within grace_s."""
+        try:
+            if process.returncode is None:
+                process.terminate()
+                try:
+                    await asyncio.wait_for(process.wait(), grace_s)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await asyncio.wait_for(process.wait(), 3)
+            logger.info(f"Server process (PID {process.pid}) terminated")
+        except ProcessLookupError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error killing server process: {e}")
+
     async def _kill_process(self) -> None:
         """Kill the current server process."""
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
         if self._process is None:
             return
 
-        try:
-            self._process.terminate()
+        process, self._process = self._process, None
+        await self._terminate(process)
+
+    # ── Warm standby (N+1) ───────────────────────────────────────
+
+    def _ensure_standby(self) -> None:
+        """Start building a standby in the background if N+1 mode wants one."""
+        if not self.config.standby_port or self._stop_requested:
+            return
+        if self._standby_task and not self._standby_task.done():
+            return
+        self._standby_task = asyncio.create_task(self._build_standby(), name="server-standby")
+
+    async def _build_standby(self) -> None:
+        """Load a standby server on the spare port, retrying with backoff until it is warm.
+
+        Waits for the active server first so two model loads never compete for
+        the GPU and disk.
+        """
+        cfg = self.config
+        attempts = 0
+        while not self._stop_requested:
+            await self._ready_event.wait()
+            port = cfg.standby_port if self._port == cfg.port else cfg.port
+            began = time.perf_counter()
+            await run_preflight(port)
+            self._standby_port = port
+            process, self._standby_logs = await self._spawn(port, "moshi-standby")
+            self._standby = process
+            url = f"ws://{cfg.host}:{port}/api/chat"
+            session = self._session()
+            while process.returncode is None and not self._stop_requested:
+                if (await probe_tcp(cfg.host, port)
+                        and await probe_ws_handshake(session, url, cfg.ready_probe_timeout)):
+                    if process.returncode is not None:
+                        break
+                    self._standby_ready = True
+                    logger.info(f"Warm standby ready on port {port} "
+                                f"({(time.perf_counter() - began) * 1000:.0f}ms)")
+                    return
+                await asyncio.sleep(cfg.ready_probe_interval)
+            if self._stop_requested:
+                return
+            attempts += 1
+            backoff = min(cfg.restart_backoff_base ** attempts, cfg.restart_backoff_max)
+            logger.error(f"Standby on port {port} exited during load — retrying in {backoff:.0f}s")
+            self._standby = None
+            await asyncio.sleep(backoff)
+
+    async def _kill_standby(self) -> None:
+        if self._standby_task and not self._standby_task.done():
+            self._standby_task.cancel()
             try:
-                self._process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self._process.kill()
-                self._process.wait(timeout=3)
-            logger.info(f"Server process (PID {self._process.pid}) terminated")
-        except Exception as e:
-            logger.warning(f"Error killing server process: {e}")
-        finally:
-            self._process = None
+                await self._standby_task
+            except asyncio.CancelledError:
+                pass
+        process, self._standby = self._standby, None
+        self._standby_ready = False
+        if process is not None:
+            await self._terminate(process)
 
-    async def _kill_stale_port(self) -> None:
-        """Kill any process holding the target port."""
-        try:
-            result = await asyncio.create_subprocess_exec(
-                "powershell", "-Command",
-                f"Get-NetTCPConnection -LocalPort {self.config.port} -ErrorAction SilentlyContinue | "
-                f"ForEach-Object {{ Stop-Process -Id $_.OwningProcess -Force -ErrorAction SilentlyContinue }}",
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            await result.wait()
-            logger.info(f"Port {self.config.port} cleared")
-        except Exception as e:
-            logger.warning(f"Could not clear port {self.config.port}: {e}")
+    async def _promote_standby(self, reason: str, detected_at: float) -> bool:
+        """Swap the warm standby in for the failed active server.
 
-    async def _check_gpu_vram(self) -> None:
-        """Check available GPU VRAM before starting."""
-        try:
-            result = await asyncio.create_subprocess_exec(
-                self.config.python_exe, "-c",
-                "import torch; f=torch.cuda.mem_get_info(0)[0]//1024//1024; "
-                f"print(f'{{f}}'); exit(0 if f>{self.config.min_vram_mb} else 1)",
-                stdout=subprocess.PIPE, stderr=subprocess.PIPE
-            )
-            stdout, _ = await result.communicate()
-            free_mb = int(stdout.decode().strip())
-            if result.returncode != 0:
-                logger.warning(
-                    f"Low GPU VRAM: {free_mb}MB free, need {self.config.min_vram_mb}MB. "
-                    "Close GPU-heavy apps (LM Studio, games, etc.)"
-                )
-            else:
-                logger.info(f"GPU VRAM: {free_mb}MB free (need {self.config.min_vram_mb}MB) — OK")
-        except Exception as e:
-            logger.warning(f"Could not check GPU VRAM: {e}")
+        Returns:
+            True if the standby answered a handshake and is now the active server.
+        """
+        standby = self._standby
+        if not self._standby_ready or standby is None or standby.returncode is not None:
+            return False
+        standby_url = f"ws://{self.config.host}:{self._standby_port}/api/chat"
+        if not await probe_ws_handshake(self._session(), standby_url,
+                                        self.config.ready_probe_timeout):
+            logger.warning("Standby failed its handshake — falling back to a cold restart")
+            return False
 
-    async def _health_check(self) -> bool:
-        """Perform a single health check via HTTP."""
-        import urllib.request
-        import urllib.error
+        if self._probe_task and not self._probe_task.done():
+            self._probe_task.cancel()
+        # RESTARTING -> READY so status listeners see the move to the new ws_url
+        self._set_status(ServerStatus.RESTARTING)
+        failed, from_port = self._process, self._port
+        self._process, self._port = standby, self._standby_port
+        self._logs = self._standby_logs
+        self._standby, self._standby_port, self._standby_ready = None, 0, False
+
+        failover_ms = round((time.perf_counter() - detected_at) * 1000, 1)
+        self._last_failover = {
+            "reason": reason, "from_port": from_port, "to_port": self._port,
+            "failover_ms": failover_ms, "at": time.time(),
+        }
+        _FAILOVERS.inc()
+        _FAILOVER_MS.observe(failover_ms)
+        self._last_health = {}
+        logger.warning(f"Failed over to standby on port {self._port} in {failover_ms:.0f}ms "
+                       f"({reason})")
+        self._set_status(ServerStatus.READY)
+
+        if failed is not None:
+            # Already judged failed (maybe hung), so no graceful shutdown: free its port now
+            await self._terminate(failed, grace_s=0)
+        self._ensure_standby()
+        return True
+
+    async def _recover(self, process: Optional[asyncio.subprocess.Process], reason: str) -> None:
+        """Replace a failed active server: promote the standby, else restart with backoff.
+
+        Serialised, and a no-op if process is no longer the active one (the
+        output reader and the health loop can both notice the same crash).
+        """
+        detected_at = time.perf_counter()
+        async with self._recover_lock:
+            if process is not self._process or self._stop_requested:
+                return
+            if await self._promote_standby(reason, detected_at):
+                return
+            self._set_status(ServerStatus.ERROR)
+            await self._try_restart()
 
+    async def _health_check(self) -> bool:
+        """Perform a single health check via HTTP on the pooled session."""
+        start = time.perf_counter()
+        healthy = False
         try:
-            loop = asyncio.get_event_loop()
-            req = urllib.request.Request(self.url)
-            resp = await asyncio.wait_for(
-                loop.run_in_executor(None, urllib.request.urlopen, req),
-                timeout=self.config.health_check_timeout
-            )
-            return resp.status == 200
+            timeout = aiohttp.ClientTimeout(total=self.config.health_check_timeout)
+            async with self._session().get(self.url, timeout=timeout) as resp:
+                healthy = resp.status == 200
+            return healthy
         except Exception:
             return False
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            _HEALTH_CHECK_MS.observe(elapsed_ms)
+            self._last_health.update(http_ok=healthy, http_ms=round(elapsed_ms, 1),
+                                     checked_at=time.time())
+
+    async def _deep_health_check(self) -> Optional[bool]:
+        """Handshake + audio round-trip on a side connection.
+
+        Returns:
+            True if inference answered within max_inference_ms, False if the probe
+            failed or was too slow, None if it was skipped (server busy).
+        """
+        if self._is_busy is not None and self._is_busy():
+            return None
+        probe = await probe_inference(self._session(), self.ws_url,
+                                      timeout=self.config.deep_health_timeout)
+        if probe.inference_ms is not None:
+            _INFERENCE_PROBE_MS.observe(probe.inference_ms)
+        degraded = not probe.ok or probe.inference_ms > self.config.max_inference_ms
+        self._last_health.update(
+            handshake_ms=probe.handshake_ms, inference_ms=probe.inference_ms,
+            deep_error=probe.error or None, degraded=degraded, deep_checked_at=time.time(),
+        )
+        if degraded:
+            _DEGRADED.inc()
+            reason = probe.error or f"inference {probe.inference_ms:.0f}ms"
+            logger.warning(f"Deep health probe degraded: {reason}")
+        return not degraded
 
     async def _health_loop(self) -> None:
-        """Continuous health monitoring with auto-restart on failure."""
+        """Continuous health monitoring with auto-restart on failure or degradation."""
         consecutive_failures = 0
         max_consecutive = 3
+        consecutive_degraded = 0
+        deep_interval = self.config.deep_health_interval
+        if deep_interval > 0 and sphn is None:
+            logger.warning("sphn not installed — deep health probes disabled")
+            deep_interval = 0
+        last_deep = time.monotonic()
 
         while not self._stop_requested:
             await asyncio.sleep(self.config.health_check_interval)
@@ -301,26 +674,55 @@ class MoshiServerManager:
                 break
 
             # Check if process is still alive
-            if self._process and self._process.poll() is not None:
+            if self._process and self._process.returncode is not None:
                 exit_code = self._process.returncode
                 logger.error(f"Server process exited with code {exit_code}")
-                self._set_status(ServerStatus.ERROR)
-                await self._try_restart()
-                consecutive_failures = 0
+                await self._recover(self._process, f"exited with code {exit_code}")
+                consecutive_failures = consecutive_degraded = 0
+                last_deep = time.monotonic()
                 continue
 
+            # Rebuild a standby that died while idle
+            if self._standby is not None and self._standby.returncode is not None:
+                logger.error(f"Standby exited with code {self._standby.returncode} — rebuilding")
+                self._standby, self._standby_ready = None, False
+                self._ensure_standby()
+
             # Only health-check once server should be ready
-            if self._status == ServerStatus.READY:
-                healthy = await self._health_check()
-                if not healthy:
-                    consecutive_failures += 1
-                    logger.warning(f"Health check failed ({consecutive_failures}/{max_consecutive})")
-                    if consecutive_failures >= max_consecutive:
-                        logger.error("Too many consecutive health check failures — restarting")
-                        await self._try_restart()
-                        consecutive_failures = 0
-                else:
-                    consecutive_failures = 0
+            if self._status != ServerStatus.READY:
+                continue
+
+            healthy = await self._health_check()
+            if not healthy:
+                _HEALTH_FAILURES.inc()
+                consecutive_failures += 1
+                logger.warning(f"Health check failed ({consecutive_failures}/{max_consecutive})")
+                if consecutive_failures >= max_consecutive:
+                    logger.error("Too many consecutive health check failures — restarting")
+                    await self._recover(self._process, "health checks failing")
+                    consecutive_failures = consecutive_degraded = 0
+                    last_deep = time.monotonic()
+                continue
+            consecutive_failures = 0
+
+            if deep_interval <= 0 or time.monotonic() - last_deep < deep_interval:
+                continue
+            deep = await self._deep_health_check()
+            if deep is None:
+                continue  # busy; retry next tick
+            last_deep = time.monotonic()
+            if deep:
+                consecutive_degraded = 0
+                continue
+            consecutive_degraded += 1
+            if consecutive_degraded >= self.config.max_degraded_probes:
+                logger.error(
+                    f"Server degraded for {consecutive_degraded} consecutive deep probes "
+                    "— restarting"
+                )
+                await self._recover(self._process, "degraded")
+                consecutive_degraded = 0
+                last_deep = time.monotonic()
 
     async def _try_restart(self) -> None:
         """Attempt to restart with exponential backoff."""
@@ -340,6 +742,7 @@ class MoshiServerManager:
             self.config.restart_backoff_max
         )
         self._restart_count += 1
+        _RESTARTS.inc()
 
         logger.info(
             f"Restarting server (attempt {self._restart_count}/"
@@ -0,0 +1,527 @@
+"""Session Log — Record MoshiAgent WebSocket traffic and replay it deterministically.
+
+Recording (AgentConfig.record_path, or `agent_api --record PATH`) appends
+every /api/chat message in both directions to a compact binary file:
+
+    header:  b"CONSREC1" | u32 length | JSON metadata
+    record:  i64 t_ns | u8 direction | u8 kind | u32 length | payload
+
+t_ns is time.monotonic_ns() relative to the recorder's start, so recordings
+are immune to wall-clock jumps. Each connection starts with a CONNECT record
+and ends with a CLOSE record; auto-reconnects show up as further segments.
+Records are written through a buffered file and flushed about once a second,
+and the reader ignores a truncated final record, so a crash costs at most
+the last second.
+
+Replay:
+    - SessionReplayServer plays the server side of each segment back to
+      whoever connects (one segment per connection) at `speed` times real
+      time, or as fast as possible with speed=0. It prints the real
+      server's ready line, so MoshiServerManager can launch it and a
+      MoshiAgentAPI can be driven by recorded traffic (`agent_api --replay`).
+      A connection only takes its segment once the client sends something,
+      so handshake probes (connect, read 0x00, leave) don't use one up. A
+      segment in which the client never sent anything is taken once its
+      script has been delivered, or the client left after it had started.
+    - replay_session() drives a MoshiAgent against that server, feeding the
+      recorded client audio back in on the same schedule, and reports
+      throughput and delivery latency.
+
+Usage:
+    conscious replay session.rec --speed 0         # as fast as possible
+    python -m conscious.voice.session_log session.rec --port 8998 --speed 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+import numpy as np
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from .server_manager import ServerManagerConfig
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CONSREC1"
+_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<qBBI")
+
+# Direction
+OUTBOUND = 0  # agent -> server
+INBOUND = 1  # server -> agent
+
+# Record kinds
+KIND_MESSAGE = 0
+KIND_CONNECT = 1
+KIND_CLOSE = 2
+
+MSG_AUDIO = 0x01
+READY_LINE = "Access the Web UI directly at"
+
+FLUSH_INTERVAL_NS = 1_000_000_000
+# Slack on top of a segment's recorded duration before replay_session gives up
+SEGMENT_TIMEOUT_S = 10.0
+
+
+class Record(NamedTuple):
+    t_ns: int
+    direction: int
+    kind: int
+    data: bytes
+
+
+class SessionRecorder:
+    """Append-only writer for one recording file.
+
+    One recorder spans all of an agent's connections: each connect()/disconnect()
+    pair becomes a segment, so reconnecting never truncates the file.
+
+    Usage:
+        recorder = SessionRecorder("session.rec", {"url": url})
+        recorder.connect()
+        recorder.sent(data)
+        recorder.close()
+    """
+
+    def __init__(self, path: str, metadata: Optional[dict] = None):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._start_ns = time.monotonic_ns()
+        self._last_flush_ns = self._start_ns
+        self._file = open(self.path, "wb", buffering=64 * 1024)
+        meta = {"version": 1, "created": time.time(), **(metadata or {})}
+        header = json.dumps(meta).encode("utf-8")
+        self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+        self.records = 0
+        self.bytes_written = 0
+        logger.info(f"Recording session to {self.path}")
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def sent(self, data: bytes) -> None:
+        self._write(OUTBOUND, KIND_MESSAGE, data)
+
+    def received(self, data: bytes) -> None:
+        self._write(INBOUND, KIND_MESSAGE, data)
+
+    def connect(self) -> None:
+        self._write(INBOUND, KIND_CONNECT, b"")
+
+    def disconnect(self) -> None:
+        self._write(INBOUND, KIND_CLOSE, b"")
+
+    def _write(self, direction: int, kind: int, data: bytes) -> None:
+        if self._file.closed:
+            return
+        now = time.monotonic_ns()
+        self._file.write(_RECORD.pack(now - self._start_ns, direction, kind, len(data)))
+        self._file.write(data)
+        self.records += 1
+        self.bytes_written += _RECORD.size + len(data)
+        if now - self._last_flush_ns >= FLUSH_INTERVAL_NS:
+            self._file.flush()
+            self._last_flush_ns = now
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+            self._last_flush_ns = time.monotonic_ns()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+            logger.info(f"Recorded {self.records} records ({self.bytes_written} bytes) "
+                        f"to {self.path}")
+
+
+class SessionReader:
+    """Reads a recording: metadata, records and per-connection segments.
+
+    Raises:
+        ValueError: If the file is not a session recording.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path).expanduser()
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a session recording: {self.path}")
+            (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            self.metadata = json.loads(f.read(length))
+            self._data_offset = f.tell()
+
+    def __iter__(self) -> Iterator[Record]:
+        with open(self.path, "rb") as f:
+            f.seek(self._data_offset)
+            while True:
+                head = f.read(_RECORD.size)
+                if len(head) < _RECORD.size:
+                    return
+                t_ns, direction, kind, length = _RECORD.unpack(head)
+                data = f.read(length)
+                if len(data) < length:
+                    return  # truncated by a crash mid-write
+                yield Record(t_ns, direction, kind, data)
+
+    def segments(self) -> list[list[Record]]:
+        """Message records grouped by connection, CONNECT to CLOSE."""
+        segments: list[list[Record]] = []
+        current: Optional[list[Record]] = None
+        for record in self:
+            if record.kind == KIND_CONNECT:
+                current = [record]
+                segments.append(current)
+            elif current is not None:
+                current.append(record)
+                if record.kind == KIND_CLOSE:
+                    current = None
+        return segments
+
+
+def _segment_start(segment: list[Record]) -> int:
+    return segment[0].t_ns
+
+
+def _handshake(segment: list[Record]) -> Optional[Record]:
+    """The server's first message in a segment (the 0x00 handshake)."""
+    for record in segment:
+        if record.direction == INBOUND and record.kind == KIND_MESSAGE:
+            return record
+    return None
+
+
+def _has_outbound(segment: list[Record]) -> bool:
+    return any(r.direction == OUTBOUND and r.kind == KIND_MESSAGE for r in segment)
+
+
+def _segment_duration_s(segment: list[Record]) -> float:
+    return (segment[-1].t_ns - segment[0].t_ns) / 1e9
+
+
+async def _sleep_until(t0: float, offset_ns: int, speed: float) -> None:
+    if speed <= 0:
+        # As fast as possible; still yield so the peer's reads interleave
+        await asyncio.sleep(0)
+        return
+    delay = t0 + offset_ns / 1e9 / speed - time.perf_counter()
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+class SessionReplayServer:
+    """Plays recorded server traffic back over /api/chat, one segment per connection.
+
+    Usage:
+        server = SessionReplayServer("session.rec", speed=4.0)
+        web.run_app(server.build_app(), port=8998)
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        if web is None:
+            raise ImportError("aiohttp is required: pip install aiohttp")
+        self.reader = SessionReader(path)
+        self.speed = speed
+        self._segments = self.reader.segments()
+        self._next_segment = 0
+        # perf_counter() of each audio message sent, for delivery latency
+        self.audio_sent_at: list[float] = []
+        self.stats = {
+            "segments": len(self._segments),
+            "segments_played": 0,
+            "messages_sent": 0,
+            "messages_received": 0,
+        }
+
+    def build_app(self) -> "web.Application":
+        app = web.Application()
+        app.router.add_get("/", self.handle_index)
+        app.router.add_get("/api/chat", self.handle_chat)
+        return app
+
+    async def handle_index(self, request: web.Request) -> web.Response:
+        return web.Response(text="moshi session replay")
+
+    async def handle_chat(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        if self._next_segment >= len(self._segments):
+            await ws.close()
+            return ws
+
+        # Answer with the next segment's handshake, but claim the segment only
+        # once the client sends: readiness/standby probes read the handshake and
+        # disconnect, and must not consume the session meant for the agent
+        index = self._next_segment
+        segment = self._segments[index]
+        handshake = _handshake(segment)
+        t0 = time.perf_counter()
+        if handshake is not None:
+            await ws.send_bytes(handshake.data)
+            self.stats["messages_sent"] += 1
+        claimed = False
+        if _has_outbound(segment):
+            first = await ws.receive()
+            if first.type not in (web.WSMsgType.BINARY, web.WSMsgType.TEXT):
+                await ws.close()
+                return ws
+            if not self._claim(index):
+                await ws.close()  # another connection claimed it meanwhile
+                return ws
+            claimed = True
+            self.stats["messages_received"] += 1
+
+        drain = asyncio.create_task(self._drain(ws), name="replay-drain")
+        delivered = False
+        try:
+            delivered = await self._play(ws, segment, t0, after=handshake)
+        finally:
+            drain.cancel()
+            await asyncio.gather(drain, return_exceptions=True)
+            # With nothing from the client to tell an agent from a probe, the
+            # segment is played once its script got past the handshake
+            if claimed or (delivered and self._claim(index)):
+                self.stats["segments_played"] += 1
+        return ws
+
+    def _claim(self, index: int) -> bool:
+        if self._next_segment != index:
+            return False
+        self._next_segment += 1
+        return True
+
+    async def _play(self, ws, segment: list[Record], t0: float,
+                    after: Optional[Record] = None) -> bool:
+        """Send the segment's inbound records on schedule; t0 is when `after` went out.
+
+        Returns:
+            True if the script ran to its end, or the client left after at
+            least one record past `after` had been sent.
+        """
+        start_ns = after.t_ns if after is not None else _segment_start(segment)
+        started = after is None
+        sent = 0
+        for record in segment:
+            if not started:
+                started = record is after
+                continue
+            if record.direction != INBOUND:
+                continue
+            await _sleep_until(t0, record.t_ns - start_ns, self.speed)
+            if ws.closed:
+                return sent > 0
+            if record.kind == KIND_CLOSE:
+                await ws.close()
+                return True
+            if record.kind != KIND_MESSAGE:
+                continue
+            if record.data[:1] == bytes([MSG_AUDIO]):
+                self.audio_sent_at.append(time.perf_counter())
+            await ws.send_bytes(record.data)
+            self.stats["messages_sent"] += 1
+            sent += 1
+        return True
+
+    async def _drain(self, ws) -> None:
+        async for _ in ws:
+            self.stats["messages_received"] += 1
+
+
+async def replay_outbound(agent, segment: list[Record], speed: float = 1.0) -> int:
+    """Feed a segment's recorded client audio into agent.send_audio on its schedule.
+
+    Returns:
+        Number of PCM samples sent.
+    """
+    if sphn is None:
+        raise ImportError("sphn is required: pip install moshi (includes sphn)")
+    decoder = sphn.OpusStreamReader(agent.config.sample_rate)
+    start_ns = _segment_start(segment)
+    t0 = time.perf_counter()
+    samples = 0
+    for record in segment:
+        if record.direction != OUTBOUND or record.kind != KIND_MESSAGE:
+            continue
+        if record.data[:1] != bytes([MSG_AUDIO]):
+            continue
+        pcm = np.asarray(decoder.append_bytes(record.data[1:]), dtype=np.float32).reshape(-1)
+        await _sleep_until(t0, record.t_ns - start_ns, speed)
+        if pcm.size:
+            await agent.send_audio(pcm)
+            samples += pcm.size
+    return samples
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of replay_session()."""
+    path: str
+    speed: float
+    segments: int
+    recorded_seconds: float
+    wall_seconds: float
+    audio_packets: int
+    text_tokens: int
+    samples_decoded: int
+    samples_sent: int
+    delivery_ms: dict = field(default_factory=dict)
+
+    @property
+    def speedup(self) -> float:
+        return self.recorded_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {**self.__dict__, "speedup": round(self.speedup, 2)}
+
+
+async def replay_session(path: str, speed: float = 1.0, agent_config=None) -> ReplayReport:
+    """Run a MoshiAgent against a recording and measure how it handles the traffic.
+
+    Each recorded connection is replayed in turn: the agent connects to an
+    in-process SessionReplayServer, receives the recorded server messages and
+    sends the recorded client audio, both at `speed` (0 = as fast as possible).
+    Coalescing is disabled, since the recorded client audio already has the
+    send cadence the coalescer produced.
+    """
+    import dataclasses
+
+    from .moshi_agent import AgentConfig, MoshiAgent
+
+    server = SessionReplayServer(path, speed)
+    runner = web.AppRunner(server.build_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    config = dataclasses.replace(
+        agent_config or AgentConfig(),
+        server_ws_url=f"ws://127.0.0.1:{port}/api/chat",
+        coalesce_frames=False,
+        auto_reconnect=False,
+        record_path=None,
+        metrics_role="replay",
+    )
+    agent = MoshiAgent(config)
+    delivery: list[float] = []
+    decoded = 0
+    pending: list[float] = []
+
+    def on_opus(payload: bytes) -> None:
+        index = agent.stats.total_audio_received - 1
+        if index < len(server.audio_sent_at):
+            pending.append(server.audio_sent_at[index])
+
+    def on_audio(pcm) -> None:
+        nonlocal decoded
+        decoded += pcm.shape[-1]
+        if pending:
+            delivery.append((time.perf_counter() - pending.pop()) * 1000)
+            pending.clear()
+
+    agent.on_opus_received = on_opus
+    agent.on_audio_received = on_audio
+
+    segments = server.reader.segments()
+    sent = 0
+    start = time.perf_counter()
+    try:
+        for i, segment in enumerate(segments):
+            played_before = server.stats["segments_played"]
+            if not await agent.connect():
+                raise RuntimeError("Agent could not connect to the replay server")
+            sent += await replay_outbound(agent, segment, speed)
+            # Wait for the server side of this segment to finish playing
+            timeout = SEGMENT_TIMEOUT_S
+            if speed > 0:
+                timeout += _segment_duration_s(segment) / speed
+            deadline = time.perf_counter() + timeout
+            while server.stats["segments_played"] == played_before:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError(
+                        f"Replay server did not finish segment {i} within {timeout:.0f}s"
+                    )
+                await asyncio.sleep(0.01)
+            await agent.disconnect()
+    finally:
+        wall = time.perf_counter() - start
+        await agent.disconnect()
+        await runner.cleanup()
+
+    def pct(q):
+        return round(float(np.percentile(delivery, q)), 3) if delivery else None
+
+    return ReplayReport(
+        path=str(path),
+        speed=speed,
+        segments=len(segments),
+        recorded_seconds=round(sum(_segment_duration_s(s) for s in segments), 3),
+        wall_seconds=round(wall, 3),
+        audio_packets=agent.stats.total_audio_received,
+        text_tokens=agent.stats.total_text_tokens,
+        samples_decoded=decoded,
+        samples_sent=sent,
+        delivery_ms={"p50": pct(50), "p99": pct(99), "max": pct(100)},
+    )
+
+
+def manager_config(path: str, speed: float = 1.0, port: int = 8998,
+                   host: str = "localhost", **kwargs) -> ServerManagerConfig:
+    """ServerManagerConfig that launches a replay server instead of moshi.server.
+
+    Deep health checks are off: their inference probe sends audio, which would
+    take a recorded segment away from the agent.
+    """
+    return ServerManagerConfig(**{
+        "host": host,
+        "port": port,
+        "python_exe": sys.executable,
+        "server_module": __name__,
+        "server_args": [str(path), "--speed", str(speed)],
+        "min_vram_mb": 0,
+        "deep_health_interval": 0,
+        **kwargs,
+    })
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Replay a recorded Moshi session as a server")
+    parser.add_argument("path", help="Session recording")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8998)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Playback rate (1 = real time, 0 = as fast as possible)")
+    args = parser.parse_args(argv)
+
+    server = SessionReplayServer(args.path, args.speed)
+    app = server.build_app()
+
+    async def announce_ready(app):
+        print(f"{READY_LINE} http://{args.host}:{args.port}", flush=True)
+
+    app.on_startup.append(announce_ready)
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
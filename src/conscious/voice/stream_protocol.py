@@ -0,0 +1,221 @@
+"""Stream Protocol — Output framing for the /api/voice/stream WebSocket.
+
+The stream endpoint historically sent every audio chunk as a JSON text message
+with base64 float32 PCM. That costs ~33% size overhead plus a json.dumps per
+80ms chunk per client. This module adds a negotiated binary framing while
+keeping the JSON mode as the default for existing clients.
+
+Negotiation (query string on the WS upgrade, or a "configure" command):
+    /api/voice/stream?protocol=binary&encoding=s16
+    {"command": "configure", "protocol": "binary", "encoding": "opus"}
+
+Binary frame layout (all integers little-endian):
+    [kind: u8][seq: u32][payload...]
+
+    kind 0x01 = audio   payload = PCM f32 / PCM s16 / Ogg Opus bytes
+    kind 0x02 = text    payload = UTF-8 text token
+    kind 0x03 = control payload = UTF-8 JSON (status, config ack)
+
+Sequence numbers count per message kind: audio frames carry the index of the
+Moshi server packet they came from, text frames the token index. Clients can
+detect gaps (dropped messages) without any extra bookkeeping.
+
+Opus output is passed through from the Moshi server untouched (no decode or
+re-encode). Clients joining mid-stream first receive the session's cached
+OpusHead/OpusTags pages so their decoders can initialise.
+"""
+
+import base64
+import json
+import struct
+from dataclasses import dataclass
+from enum import Enum
+from typing import Mapping, Optional
+
+import numpy as np
+
+# Binary frame kinds (audio/text mirror the Moshi server protocol bytes)
+FRAME_AUDIO = 0x01
+FRAME_TEXT = 0x02
+FRAME_CONTROL = 0x03
+
+FRAME_HEADER = struct.Struct("<BI")
+SEQ_MASK = 0xFFFFFFFF
+
+
+class WireProtocol(Enum):
+    JSON = "json"
+    BINARY = "binary"
+
+
+class AudioEncoding(Enum):
+    F32 = "f32"
+    S16 = "s16"
+    OPUS = "opus"
+
+
+@dataclass(frozen=True)
+class StreamFormat:
+    """Negotiated output format for one stream client."""
+    protocol: WireProtocol = WireProtocol.JSON
+    encoding: AudioEncoding = AudioEncoding.F32
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, str],
+                    default: Optional["StreamFormat"] = None) -> "StreamFormat":
+        """Build a format from query params or a configure command.
+
+        Raises:
+            ValueError: If a protocol or encoding value is unknown.
+        """
+        base = default or cls()
+        protocol = params.get("protocol", base.protocol.value)
+        encoding = params.get("encoding", base.encoding.value)
+        try:
+            return cls(WireProtocol(protocol), AudioEncoding(encoding))
+        except ValueError:
+            raise ValueError(
+                f"Unsupported stream format: protocol={protocol!r}, encoding={encoding!r}"
+            ) from None
+
+    def describe(self, sample_rate: int) -> dict:
+        """Config acknowledgement sent to the client after negotiation."""
+        return {
+            "type": "config",
+            "protocol": self.protocol.value,
+            "encoding": self.encoding.value,
+            "sample_rate": sample_rate,
+        }
+
+
+DEFAULT_FORMAT = StreamFormat()
+
+
+# ── PCM payload codecs ───────────────────────────────────────
+
+def encode_pcm(pcm: np.ndarray, encoding: AudioEncoding) -> bytes:
+    """Serialize float32 PCM as raw f32 or s16 little-endian bytes."""
+    if encoding == AudioEncoding.F32:
+        return np.ascontiguousarray(pcm, dtype="<f4").tobytes()
+    if encoding == AudioEncoding.S16:
+        scaled = np.clip(pcm, -1.0, 1.0) * 32767.0
+        return scaled.astype("<i2").tobytes()
+    raise ValueError(f"Not a PCM encoding: {encoding.value}")
+
+
+def decode_pcm(data: bytes, encoding: AudioEncoding) -> np.ndarray:
+    """Parse raw f32 or s16 little-endian bytes into float32 PCM."""
+    if encoding == AudioEncoding.F32:
+        return np.frombuffer(data, dtype="<f4").astype(np.float32, copy=False)
+    if encoding == AudioEncoding.S16:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    raise ValueError(f"Not a PCM encoding: {encoding.value}")
+
+
+# ── Framing ──────────────────────────────────────────────────
+
+def pack_frame(kind: int, seq: int, payload: bytes) -> bytes:
+    """Build a binary frame: kind byte + u32 sequence number + payload."""
+    return FRAME_HEADER.pack(kind, seq & SEQ_MASK) + payload
+
+
+def unpack_frame(data: bytes) -> tuple[int, int, memoryview]:
+    """Split a binary frame into (kind, seq, payload view)."""
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError(f"Frame too short: {len(data)} bytes")
+    kind, seq = FRAME_HEADER.unpack_from(data)
+    return kind, seq, memoryview(data)[FRAME_HEADER.size:]
+
+
+def json_audio_message(pcm: np.ndarray, seq: int) -> str:
+    """Legacy JSON audio message (base64 float32 PCM)."""
+    audio_b64 = base64.b64encode(encode_pcm(pcm, AudioEncoding.F32)).decode()
+    return json.dumps({"type": "audio", "data": audio_b64, "samples": len(pcm), "seq": seq})
+
+
+def json_text_message(text: str, seq: int) -> str:
+    return json.dumps({"type": "text", "data": text, "seq": seq})
+
+
+class StreamEncoder:
+    """Serializes outbound stream messages once per negotiated format.
+
+    All clients sharing a format receive the exact same str/bytes object, so
+    per-message cost scales with the number of distinct formats in use rather
+    than the number of clients.
+    """
+
+    def __init__(self):
+        self._text_seq = 0
+        self._control_seq = 0
+
+    def encode_audio(self, pcm: np.ndarray, formats: set[StreamFormat], seq: int) -> dict:
+        """Serialize one decoded PCM chunk for every PCM format in use.
+
+        Returns:
+            Mapping of StreamFormat -> str (JSON) or bytes (binary). Opus
+            formats are omitted; they are fed by encode_opus().
+        """
+        pcm = np.asarray(pcm, dtype=np.float32).reshape(-1)
+        out = {}
+        for fmt in formats:
+            if fmt.protocol == WireProtocol.JSON:
+                out[fmt] = json_audio_message(pcm, seq)
+            elif fmt.encoding != AudioEncoding.OPUS:
+                out[fmt] = pack_frame(FRAME_AUDIO, seq, encode_pcm(pcm, fmt.encoding))
+        return out
+
+    def encode_opus(self, opus_bytes: bytes, formats: set[StreamFormat], seq: int) -> dict:
+        """Frame one Moshi server Opus packet for passthrough clients."""
+        frame = None
+        out = {}
+        for fmt in formats:
+            if is_passthrough(fmt):
+                if frame is None:
+                    frame = pack_frame(FRAME_AUDIO, seq, opus_bytes)
+                out[fmt] = frame
+        return out
+
+    def encode_text(self, text: str, formats: set[StreamFormat]) -> dict:
+        """Serialize one text token for every format in use."""
+        seq = self._text_seq
+        self._text_seq = (self._text_seq + 1) & SEQ_MASK
+        out = {}
+        binary = None
+        for fmt in formats:
+            if fmt.protocol == WireProtocol.JSON:
+                out[fmt] = json_text_message(text, seq)
+            else:
+                if binary is None:
+                    binary = pack_frame(FRAME_TEXT, seq, text.encode("utf-8"))
+                out[fmt] = binary
+        return out
+
+    def encode_control(self, data: dict, fmt: StreamFormat):
+        """Serialize a control/status message for a single client."""
+        if fmt.protocol == WireProtocol.JSON:
+            return json.dumps(data)
+        seq = self._control_seq
+        self._control_seq = (self._control_seq + 1) & SEQ_MASK
+        return pack_frame(FRAME_CONTROL, seq, json.dumps(data).encode("utf-8"))
+
+
+def is_passthrough(fmt: StreamFormat) -> bool:
+    """True if the format is served by forwarding the server's Opus bytes."""
+    return fmt.protocol == WireProtocol.BINARY and fmt.encoding == AudioEncoding.OPUS
+
+
+def opus_header_pages(ogg_bytes: bytes) -> bytes:
+    """Extract the OpusHead/OpusTags Ogg pages from the start of a stream."""
+    headers = bytearray()
+    pos = 0
+    while pos + 27 <= len(ogg_bytes) and ogg_bytes[pos:pos + 4] == b"OggS":
+        n_segments = ogg_bytes[pos + 26]
+        body_start = pos + 27 + n_segments
+        body_len = sum(ogg_bytes[pos + 27:body_start])
+        page_end = body_start + body_len
+        if ogg_bytes[body_start:body_start + 8] not in (b"OpusHead", b"OpusTags"):
+            break
+        headers += ogg_bytes[pos:page_end]
+        pos = page_end
+    return bytes(headers)
@@ -0,0 +1,330 @@
+"""Stub Moshi Server — Protocol-compatible stand-in for moshi.server, no model or GPU.
+
+Speaks the same /api/chat protocol as the real server (0x00 handshake,
+0x01 Ogg Opus audio, 0x02 text) so MoshiAgent, MoshiAgentAPI and the server
+manager can be exercised on any CPU box.
+
+Behaviour:
+    - Client audio is decoded and cut into 80ms frames. Each frame produces
+      one reply frame (an echo of the input, or a quiet tone) after
+      response_delay_ms. Replies are produced serially, as the real LM does,
+      so a delay above 80ms builds a growing backlog.
+    - latency_growth_ms_per_min adds delay with session age, mimicking
+      KV-cache degradation; reconnecting resets it.
+    - Text tokens are sent at text_tokens_per_s.
+    - Fault injection: rejected handshakes, dropped reply frames, a one-off
+      stall, and server-side disconnects after N seconds.
+
+Usage:
+    python -m conscious.voice.stub_server --port 8998 --response-delay-ms 60
+
+    # or under MoshiServerManager, in place of the real server:
+    manager = MoshiServerManager(manager_config(StubServerConfig(), port=8998))
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+try:
+    import sphn
+except ImportError:
+    sphn = None
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from .framing import FRAME_SIZE, SAMPLE_RATE, PcmFramer
+from .server_manager import ServerManagerConfig
+
+logger = logging.getLogger(__name__)
+
+MSG_HANDSHAKE = 0x00
+MSG_AUDIO = 0x01
+MSG_TEXT = 0x02
+
+# Printed once "loaded", mirroring the real server's log line (readiness itself is probed)
+READY_LINE = "Access the Web UI directly at"
+
+_WORDS = ("hello", "there", "I", "am", "listening", "tell", "me", "more", "about", "that")
+
+
+@dataclass
+class StubServerConfig:
+    """Behaviour and fault injection for the stub server."""
+    response_delay_ms: float = 40.0  # per reply frame, produced serially
+    jitter_ms: float = 0.0  # uniform +/- on response_delay_ms
+    latency_growth_ms_per_min: float = 0.0  # extra delay per minute of session
+    text_tokens_per_s: float = 3.0
+    echo: bool = True  # reply with the client's audio (else a quiet tone)
+    load_time_s: float = 0.0  # simulated model load before accepting sessions
+    handshake_delay_ms: float = 0.0
+    # Fault injection
+    reject_rate: float = 0.0  # fraction of sessions closed before the handshake
+    drop_rate: float = 0.0  # fraction of reply frames never sent
+    stall_after_s: float = 0.0  # 0 = never; stall replies once, this far into a session
+    stall_s: float = 0.0
+    disconnect_after_s: float = 0.0  # 0 = never; server closes sessions after this long
+    seed: int = 0
+
+
+class StubMoshiServer:
+    """aiohttp app implementing the Moshi server's /api/chat protocol.
+
+    Usage:
+        server = StubMoshiServer(StubServerConfig(response_delay_ms=60))
+        web.run_app(server.build_app(), port=8998)
+    """
+
+    def __init__(self, config: Optional[StubServerConfig] = None):
+        if web is None:
+            raise ImportError("aiohttp is required: pip install aiohttp")
+        if sphn is None:
+            raise ImportError("sphn is required for Opus: pip install moshi (includes sphn)")
+        self.config = config or StubServerConfig()
+        self._rng = random.Random(self.config.seed)
+        self._loaded = asyncio.Event()
+        self.stats = {
+            "sessions": 0,
+            "rejected": 0,
+            "active": 0,
+            "frames_in": 0,
+            "frames_out": 0,
+            "frames_dropped": 0,
+            "text_tokens": 0,
+            "disconnects": 0,
+        }
+
+    def build_app(self) -> "web.Application":
+        app = web.Application()
+        app.router.add_get("/", self.handle_index)
+        app.router.add_get("/api/chat", self.handle_chat)
+        app.router.add_get("/api/stub/stats", self.handle_stats)
+        app.on_startup.append(self._on_startup)
+        return app
+
+    async def _on_startup(self, app) -> None:
+        asyncio.create_task(self._load(), name="stub-load")
+
+    async def _load(self) -> None:
+        if self.config.load_time_s > 0:
+            logger.info(f"Simulating model load ({self.config.load_time_s:.1f}s)")
+            await asyncio.sleep(self.config.load_time_s)
+        self._loaded.set()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    async def wait_loaded(self) -> None:
+        await self._loaded.wait()
+
+    # ── Routes ───────────────────────────────────────────────────
+
+    async def handle_index(self, request: web.Request) -> web.Response:
+        """Health endpoint: 200 once loaded, like the real server's web UI."""
+        if not self.loaded:
+            return web.Response(status=503, text="loading")
+        return web.Response(text="moshi stub server")
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    async def handle_chat(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        cfg = self.config
+
+        if not self.loaded or self._rng.random() < cfg.reject_rate:
+            self.stats["rejected"] += 1
+            await ws.close()
+            return ws
+
+        if cfg.handshake_delay_ms > 0:
+            await asyncio.sleep(cfg.handshake_delay_ms / 1000)
+        await ws.send_bytes(bytes([MSG_HANDSHAKE]))
+        self.stats["sessions"] += 1
+        self.stats["active"] += 1
+
+        session = _Session(self, ws)
+        try:
+            await session.run()
+        finally:
+            self.stats["active"] -= 1
+        return ws
+
+
+class _Session:
+    """One /api/chat connection: decode -> serial reply worker -> encode."""
+
+    def __init__(self, server: StubMoshiServer, ws):
+        self.server = server
+        self.config = server.config
+        self.ws = ws
+        self.started = time.monotonic()
+        self._reader = sphn.OpusStreamReader(SAMPLE_RATE)
+        self._writer = sphn.OpusStreamWriter(SAMPLE_RATE)
+        self._framer = PcmFramer(FRAME_SIZE)
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._stalled = False
+        self._tone_phase = 0
+
+    def frame_delay(self) -> float:
+        """Seconds to produce the next reply frame."""
+        cfg = self.config
+        age_min = (time.monotonic() - self.started) / 60
+        delay_ms = cfg.response_delay_ms + cfg.latency_growth_ms_per_min * age_min
+        if cfg.jitter_ms:
+            delay_ms += self.server._rng.uniform(-cfg.jitter_ms, cfg.jitter_ms)
+        return max(0.0, delay_ms) / 1000
+
+    async def run(self) -> None:
+        tasks = [
+            asyncio.create_task(self._reply_loop(), name="stub-reply"),
+            asyncio.create_task(self._text_loop(), name="stub-text"),
+        ]
+        if self.config.disconnect_after_s > 0:
+            tasks.append(asyncio.create_task(self._disconnect_later(), name="stub-disconnect"))
+        try:
+            async for msg in self.ws:
+                if msg.type != web.WSMsgType.BINARY or not msg.data:
+                    continue
+                if msg.data[0] != MSG_AUDIO:
+                    continue
+                pcm = np.asarray(self._reader.append_bytes(msg.data[1:]), dtype=np.float32)
+                for frame in self._framer.push(pcm.reshape(-1)):
+                    self.server.stats["frames_in"] += 1
+                    self._frames.put_nowait(frame)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _reply_loop(self) -> None:
+        cfg = self.config
+        stats = self.server.stats
+        while True:
+            frame = await self._frames.get()
+            await asyncio.sleep(self.frame_delay())
+
+            age = time.monotonic() - self.started
+            if cfg.stall_after_s > 0 and not self._stalled and age >= cfg.stall_after_s:
+                self._stalled = True
+                logger.info(f"Injecting {cfg.stall_s:.1f}s stall")
+                await asyncio.sleep(cfg.stall_s)
+
+            out = frame if cfg.echo else self._tone()
+            opus = self._writer.append_pcm(out)
+            if cfg.drop_rate and self.server._rng.random() < cfg.drop_rate:
+                stats["frames_dropped"] += 1
+                continue
+            if opus:
+                await self.ws.send_bytes(bytes([MSG_AUDIO]) + opus)
+                stats["frames_out"] += 1
+
+    async def _text_loop(self) -> None:
+        if self.config.text_tokens_per_s <= 0:
+            return
+        interval = 1.0 / self.config.text_tokens_per_s
+        i = 0
+        while True:
+            await asyncio.sleep(interval)
+            word = _WORDS[i % len(_WORDS)]
+            await self.ws.send_bytes(bytes([MSG_TEXT]) + f" {word}".encode("utf-8"))
+            self.server.stats["text_tokens"] += 1
+            i += 1
+
+    async def _disconnect_later(self) -> None:
+        await asyncio.sleep(self.config.disconnect_after_s)
+        logger.info("Injecting server-side disconnect")
+        self.server.stats["disconnects"] += 1
+        await self.ws.close()
+
+    def _tone(self) -> np.ndarray:
+        n = np.arange(self._tone_phase, self._tone_phase + FRAME_SIZE)
+        self._tone_phase += FRAME_SIZE
+        return (0.05 * np.sin(2 * np.pi * 220 * n / SAMPLE_RATE)).astype(np.float32)
+
+
+# ── Command line / server manager integration ────────────────────
+
+def _flag(name: str) -> str:
+    return "--" + name.replace("_", "-")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add one --flag per StubServerConfig field."""
+    for f in dataclasses.fields(StubServerConfig):
+        if f.type is bool:
+            parser.add_argument(_flag(f.name), type=lambda v: v.lower() in ("1", "true", "yes"),
+                                default=f.default, metavar="BOOL")
+        else:
+            kind = int if f.type is int else float
+            parser.add_argument(_flag(f.name), type=kind, default=f.default)
+
+
+def config_from_args(args: argparse.Namespace) -> StubServerConfig:
+    return StubServerConfig(**{
+        f.name: getattr(args, f.name) for f in dataclasses.fields(StubServerConfig)
+    })
+
+
+def config_to_args(config: StubServerConfig) -> list[str]:
+    """Command-line flags reproducing a config (non-default fields only)."""
+    args = []
+    for f in dataclasses.fields(StubServerConfig):
+        value = getattr(config, f.name)
+        if value != f.default:
+            args += [_flag(f.name), str(value)]
+    return args
+
+
+def manager_config(stub: Optional[StubServerConfig] = None, port: int = 8998,
+                   host: str = "localhost", **kwargs) -> ServerManagerConfig:
+    """ServerManagerConfig that launches the stub server instead of moshi.server."""
+    return ServerManagerConfig(
+        host=host,
+        port=port,
+        python_exe=sys.executable,
+        server_module=__name__,
+        server_args=config_to_args(stub or StubServerConfig()),
+        min_vram_mb=0,
+        **kwargs,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s")
+    parser = argparse.ArgumentParser(
+        description="Stub Moshi server (protocol-compatible, no model)")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8998)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    server = StubMoshiServer(config_from_args(args))
+    app = server.build_app()
+
+    async def announce_ready(app):
+        async def wait_and_print():
+            await server.wait_loaded()
+            print(f"{READY_LINE} http://{args.host}:{args.port}", flush=True)
+        asyncio.create_task(wait_and_print(), name="stub-ready")
+
+    app.on_startup.append(announce_ready)
+    web.run_app(app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
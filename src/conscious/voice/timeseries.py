@@ -0,0 +1,196 @@
+"""Time Series — In-process ring buffers of per-second voice pipeline metrics.
+
+MoshiAgentAPI samples its counters once per second into a fixed-size ring.
+Every full minute of samples is downsampled into a 1-minute ring, and every
+full hour of minutes into a 1-hour ring, so /api/voice/stats can serve long
+ranges by slicing preallocated arrays instead of recomputing from raw events.
+
+Tiers:
+    1s  x 3600  (last hour)
+    1m  x 1440  (last day)
+    1h  x 168   (last week)
+
+Missing values (e.g. no latency sample in a second) are stored as NaN and
+served as null.
+"""
+
+import math
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+# (field, downsampling aggregation)
+FIELDS = (
+    ("realtime_factor", "mean"),
+    ("latency_p50_ms", "mean"),
+    ("latency_p95_ms", "max"),
+    ("latency_p99_ms", "max"),
+    ("stream_queue_depth", "max"),
+    ("input_queue_depth", "max"),
+    ("drops", "sum"),
+    ("reconnects", "sum"),
+    ("clients", "max"),
+)
+FIELD_NAMES = tuple(name for name, _ in FIELDS)
+
+# resolution -> (seconds per sample, capacity)
+TIERS = {
+    "1s": (1, 3600),
+    "1m": (60, 1440),
+    "1h": (3600, 168),
+}
+
+
+class RingSeries:
+    """Fixed-capacity ring of timestamped metric rows."""
+
+    def __init__(self, resolution_s: int, capacity: int, n_fields: int):
+        self.resolution_s = resolution_s
+        self.capacity = capacity
+        self._ts = np.zeros(capacity, dtype=np.int64)
+        self._values = np.full((capacity, n_fields), np.nan, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, ts: int, row: np.ndarray) -> None:
+        self._ts[self._head] = ts
+        self._values[self._head] = row
+        self._head = (self._head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def window(self, since: Optional[float] = None, until: Optional[float] = None,
+               limit: Optional[int] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Rows in chronological order within [since, until], newest `limit` rows."""
+        if self._count < self.capacity:
+            ts = self._ts[:self._count]
+            values = self._values[:self._count]
+        else:
+            order = np.r_[self._head:self.capacity, 0:self._head]
+            ts = self._ts[order]
+            values = self._values[order]
+
+        lo = 0 if since is None else int(np.searchsorted(ts, since, side="left"))
+        hi = len(ts) if until is None else int(np.searchsorted(ts, until, side="right"))
+        if limit is not None and hi - lo > limit:
+            lo = hi - limit
+        return ts[lo:hi], values[lo:hi]
+
+
+class _Downsampler:
+    """Aggregates rows of a finer tier into one row per coarser bucket."""
+
+    def __init__(self, resolution_s: int, n_fields: int):
+        self.resolution_s = resolution_s
+        self._bucket: Optional[int] = None
+        self._rows: list[np.ndarray] = []
+        self._aggs = [agg for _, agg in FIELDS]
+
+    def add(self, ts: int, row: np.ndarray) -> Optional[tuple[int, np.ndarray]]:
+        """Add a row; returns the completed (bucket_ts, row) when a bucket closes."""
+        bucket = ts - ts % self.resolution_s
+        done = None
+        if self._bucket is not None and bucket != self._bucket and self._rows:
+            done = (self._bucket, self._aggregate())
+            self._rows = []
+        self._bucket = bucket
+        self._rows.append(row)
+        return done
+
+    def _aggregate(self) -> np.ndarray:
+        stacked = np.vstack(self._rows)
+        out = np.full(stacked.shape[1], np.nan)
+        for i, agg in enumerate(self._aggs):
+            column = stacked[:, i]
+            column = column[~np.isnan(column)]
+            if not len(column):
+                continue
+            if agg == "sum":
+                out[i] = column.sum()
+            elif agg == "max":
+                out[i] = column.max()
+            else:
+                out[i] = column.mean()
+        return out
+
+
+class MetricsTimeSeries:
+    """Per-second samples downsampled into 1-minute and 1-hour rings.
+
+    Usage:
+        series = MetricsTimeSeries()
+        series.record({"realtime_factor": 0.8, "clients": 3, ...})  # once per second
+        series.query("1m", since=time.time() - 3600)
+    """
+
+    def __init__(self):
+        n = len(FIELDS)
+        self._rings = {res: RingSeries(step, cap, n) for res, (step, cap) in TIERS.items()}
+        self._minute = _Downsampler(TIERS["1m"][0], n)
+        self._hour = _Downsampler(TIERS["1h"][0], n)
+
+    def record(self, sample: dict, ts: Optional[float] = None) -> None:
+        """Store one per-second sample; unknown fields are ignored, missing ones NaN."""
+        ts = int(time.time() if ts is None else ts)
+        row = np.array([sample.get(name, np.nan) for name in FIELD_NAMES], dtype=np.float64)
+        self._rings["1s"].append(ts, row)
+
+        minute = self._minute.add(ts, row)
+        if minute is not None:
+            self._rings["1m"].append(*minute)
+            hour = self._hour.add(*minute)
+            if hour is not None:
+                self._rings["1h"].append(*hour)
+
+    def query(self, resolution: str = "1s", since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = None,
+              fields: Optional[Iterable[str]] = None) -> dict:
+        """Columnar slice of one tier.
+
+        Raises:
+            ValueError: On an unknown resolution or field name.
+        """
+        if resolution not in self._rings:
+            raise ValueError(f"Unknown resolution {resolution!r} (use {', '.join(TIERS)})")
+        names = list(fields) if fields else list(FIELD_NAMES)
+        unknown = [name for name in names if name not in FIELD_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        ts, values = self._rings[resolution].window(since, until, limit)
+        series = {}
+        for name in names:
+            column = values[:, FIELD_NAMES.index(name)].tolist()
+            series[name] = [None if math.isnan(v) else round(v, 3) for v in column]
+        return {
+            "resolution": resolution,
+            "timestamps": ts.tolist(),
+            "series": series,
+        }
+
+
+class LatencyWindow:
+    """Collects latency observations for the current second, in a fixed buffer."""
+
+    def __init__(self, capacity: int = 512):
+        self._buf = np.empty(capacity, dtype=np.float64)
+        self._n = 0
+        self._seen = 0
+
+    def observe(self, ms: float) -> None:
+        # Past capacity, overwrite in round-robin: keeps a spread of the second
+        self._buf[self._seen % len(self._buf)] = ms
+        self._seen += 1
+        self._n = min(self._n + 1, len(self._buf))
+
+    def drain(self) -> tuple[float, float, float]:
+        """(p50, p95, p99) of the observations since the last drain, NaN if none."""
+        if self._n == 0:
+            return (math.nan, math.nan, math.nan)
+        p50, p95, p99 = np.percentile(self._buf[:self._n], (50, 95, 99))
+        self._n = 0
+        self._seen = 0
+        return (float(p50), float(p95), float(p99))